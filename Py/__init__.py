@@ -2,4 +2,17 @@
 # implementation in the `Py` directory. This lets us keep the user's existing
 # `Py/repo_clone.py` etc. and still import them via `py_module("py.repo_clone")`.
 
-# Nothing needed here; modules live in this package directory as wrappers.
+# Submodules load lazily on attribute access (PEP 562), so `import Py` stays free and
+# `Py.parser_ccg` etc. are only imported by the entry points that actually use them.
+import importlib as _importlib
+
+
+def __getattr__(name):
+    if name.startswith("_"):
+        raise AttributeError(name)
+    try:
+        return _importlib.import_module(f"{__name__}.{name}")
+    except ModuleNotFoundError as e:
+        if e.name != f"{__name__}.{name}":
+            raise
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
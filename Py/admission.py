@@ -0,0 +1,173 @@
+# Py/admission.py - Admission control for documentation requests
+# Bounded queue + concurrency limit, per-client token buckets and repo size budgets
+
+import asyncio
+import contextlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class AdmissionError(Exception):
+    """
+    Raised when a request cannot be admitted.
+    Carries the HTTP status the API should answer with and an optional retry-after hint (seconds).
+    """
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    def retry_after_header(self) -> Optional[str]:
+        """Retry-After header value (whole seconds, at least 1), or None if retrying is pointless."""
+        if self.retry_after is None:
+            return None
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class RateLimited(AdmissionError):
+    """Client exceeded its token-bucket rate limit."""
+    status_code = 429
+
+
+class QueueFull(AdmissionError):
+    """Server is at its concurrency limit and the wait queue is full (or the wait timed out)."""
+    status_code = 503
+
+
+class RepoTooLarge(AdmissionError):
+    """Repository exceeds the configured file-count or byte-size budget."""
+    status_code = 413
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `capacity` tokens, refilled at `rate` tokens per second.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def consume(self, tokens: float = 1.0) -> float:
+        """
+        Try to take `tokens` from the bucket.
+        Returns 0.0 on success, otherwise the number of seconds until enough tokens are available.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (tokens - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Per-client token buckets. Idle clients are evicted LRU-style once `max_clients` is reached.
+    """
+
+    def __init__(self, rate: float = 0.2, burst: float = 5, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, client_id: str) -> None:
+        """Consume one token for `client_id` or raise RateLimited with a retry-after hint."""
+        with self._lock:
+            bucket = self._buckets.get(client_id)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self._buckets[client_id] = bucket
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client_id)
+            wait = bucket.consume()
+        if wait:
+            raise RateLimited(f"Rate limit exceeded for client '{client_id}'", retry_after=wait)
+
+
+class AdmissionController:
+    """
+    Bounds how many pipeline runs execute at once and how many may wait for a slot.
+    Requests beyond `max_concurrent + max_queue` are rejected immediately; queued requests
+    give up after `queue_timeout` seconds. Both cases raise QueueFull with a retry-after
+    hint derived from the moving average run duration.
+    """
+
+    def __init__(self, max_concurrent: int = 2, max_queue: int = 8, queue_timeout: float = 60.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.avg_duration = 30.0  # seconds; seeded guess, updated as runs finish
+        self._sem = asyncio.Semaphore(max_concurrent)
+
+    def estimate_wait(self) -> float:
+        """Rough seconds until a new request would get a slot."""
+        ahead = self.waiting + 1
+        return self.avg_duration * ahead / max(1, self.max_concurrent)
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Async context manager holding one concurrency slot for the duration of a run."""
+        if self.active >= self.max_concurrent and self.waiting >= self.max_queue:
+            raise QueueFull("Server busy: admission queue is full", retry_after=self.estimate_wait())
+
+        self.waiting += 1
+        acquire = asyncio.ensure_future(self._sem.acquire())
+        try:
+            await asyncio.wait_for(acquire, timeout=self.queue_timeout)
+        except BaseException as e:
+            # Before Python 3.12, wait_for can time out (or be cancelled) just as the acquire
+            # succeeds and still raise: hand that permit back instead of leaking it
+            acquire.add_done_callback(lambda t: t.cancelled() or t.exception() or self._sem.release())
+            if isinstance(e, asyncio.TimeoutError):
+                raise QueueFull("Server busy: timed out waiting for a free slot",
+                                retry_after=self.estimate_wait()) from None
+            raise
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            # Exponential moving average keeps the retry-after hint close to recent reality
+            self.avg_duration = 0.8 * self.avg_duration + 0.2 * (time.monotonic() - start)
+            self._sem.release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "avg_duration_s": round(self.avg_duration, 2),
+        }
+
+
+def check_size_budget(stats: dict, max_files: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+    """
+    Raise RepoTooLarge if `stats` (see repo_clone.tree_stats) exceeds the file or byte budget.
+    A budget of None disables that check.
+    """
+    if max_files is not None and stats.get("files", 0) > max_files:
+        raise RepoTooLarge(f"Repository has {stats['files']} files (budget {max_files})")
+    if max_bytes is not None and stats.get("bytes", 0) > max_bytes:
+        raise RepoTooLarge(f"Repository is {stats['bytes']} bytes (budget {max_bytes})")
@@ -0,0 +1,113 @@
+# Py/analyzers.py - Language analyzer registry for the CodeAnalyzer stage
+# Maps file extensions to analyzers that all produce the parser_ccg result schema
+
+import os
+from typing import Callable, Optional
+
+from Py import parser_ccg
+from Py.parser_ccg import LanguageSpec
+
+# extension -> (language, analyze(path, budgets) -> dict)
+_REGISTRY = {}
+
+
+def register_analyzer(language: str, extensions, analyze: Callable) -> None:
+    """
+    Register `analyze(path, budgets)` for every extension in `extensions` (e.g. [".ts", ".tsx"]).
+    The analyzer must return the parser_ccg schema (functions, classes, calls, imports,
+    inheritance, globals; optional skipped/sampled notes). Later registrations win.
+    Worker processes re-import this module, so register at import time of a module that
+    the workers also import when using the "spawn" start method.
+    """
+    for ext in extensions:
+        _REGISTRY[ext.lower()] = (language, analyze)
+
+
+def language_for(path: str) -> Optional[str]:
+    """Language registered for this file's extension, or None."""
+    entry = _REGISTRY.get(os.path.splitext(path)[1].lower())
+    return entry[0] if entry else None
+
+
+def supported_extensions() -> set:
+    return set(_REGISTRY)
+
+
+def analyze_file(path: str, budgets: Optional[dict] = None) -> dict:
+    """Dispatch `path` to the analyzer registered for its extension."""
+    entry = _REGISTRY.get(os.path.splitext(path)[1].lower())
+    if entry is None:
+        raise ValueError(f"No analyzer registered for {path}")
+    return entry[1](path, budgets)
+
+
+def _spec_analyzer(spec: LanguageSpec) -> Callable:
+    def analyze(path: str, budgets: Optional[dict] = None) -> dict:
+        return parser_ccg.parse_source_file(path, spec, budgets)
+    return analyze
+
+
+# ─── Jac: walkers/nodes/edges/objects as classes, abilities as functions, globs as globals ───
+JAC_SPEC = LanguageSpec(
+    "jac",
+    defs=[r"^\s*(?:(?:static|override|abs)\s+)*can\s+(?P<name>{ident})",
+          r"^\s*def\s+(?P<name>{ident})\s*\("],
+    classes=[r"^\s*(?P<kind>walker|node|edge|obj|class|enum)\s+(?P<name>{ident})\s*(?:\((?P<parent>[^)]*)\))?"],
+    globals_=[r"^\s*glob\s+(?P<name>{ident})"],
+    imports=[r"^\s*import\s*(?::\s*\w+\s+)?(?P<module>{ident}(?:\.{ident})*)",
+             r"^\s*include\s+(?P<module>{ident}(?:\.{ident})*)"],
+    calls=r"(?P<name>{ident})\s*\(",
+    skip_calls=['if', 'elif', 'for', 'while', 'with', 'try', 'except', 'catch', 'can', 'spawn',
+                'print', 'len', 'range', 'str', 'int', 'dict', 'list', 'set', 'tuple', 'open'],
+    ignore_parents=['object'],
+    sig_tail=r"\s*(?:->\s*(?P<returns>[^{;\n]+?))?\s*[{;]",
+    line_comment="#",
+    decorator="@",
+)
+
+# ─── JavaScript / TypeScript ───
+_JS_IDENT = r"[A-Za-z_$][\w$]*"
+_JS_KEYWORDS = ['if', 'for', 'while', 'switch', 'catch', 'with', 'return', 'function', 'typeof',
+                'super', 'require', 'import', 'new', 'await', 'yield', 'constructor']
+
+JS_SPEC = LanguageSpec(
+    "javascript",
+    defs=[r"^\s*(?:export\s+)?(?:default\s+)?(?P<is_async>async\s+)?function\s*\*?\s*(?P<name>{ident})",
+          r"^\s*(?:export\s+)?(?:const|let|var)\s+(?P<name>{ident})\s*(?::[^=\n]+)?=\s*(?P<is_async>async\s+)?"
+          r"(?:function\b|\([^)]*\)\s*(?::\s*[^=\n]+)?=>|{ident}\s*=>)",
+          r"^[ \t]+(?:(?:public|private|protected|static|async|readonly|override|get|set)\s+)*"
+          r"(?!(?:if|for|while|switch|catch|with|return|function)\b)(?P<name>{ident})\s*(?:<[^>\n]*>)?"
+          r"\([^)]*\)\s*(?::\s*[^{;\n]+)?\{"],
+    classes=[r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?(?P<kind>class|interface)\s+(?P<name>{ident})"
+             r"(?:\s*<[^>{\n]*>)?(?:\s+extends\s+(?P<parent>[\w$.]+))?"],
+    imports=[r"^\s*import\s+(?:[^'\";]*?\s+from\s+)?['\"](?P<module>[^'\"\n]+)['\"]",
+             r"^\s*export\s+[^'\";]*?\s+from\s+['\"](?P<module>[^'\"\n]+)['\"]",
+             r"\brequire\(\s*['\"](?P<module>[^'\"\n]+)['\"]\s*\)"],
+    calls=r"(?P<name>{ident})\s*\(",
+    ident=_JS_IDENT,
+    skip_calls=_JS_KEYWORDS + ['console', 'log', 'catch', 'then', 'push', 'map', 'forEach', 'filter'],
+    ignore_parents=['Object'],
+    sig_tail=r"[ \t]*(?::[ \t]*(?P<returns>[^{=;\n]+?))?[ \t]*(?:\{|=>)",
+    decorator="@",
+)
+
+# ─── Go ───
+GO_SPEC = LanguageSpec(
+    "go",
+    defs=[r"^func\s+(?:\(\s*(?:{ident}\s+)?\*?(?P<receiver>{ident})[^)]*\)\s*)?(?P<name>{ident})"],
+    classes=[r"^type\s+(?P<name>{ident})\s+(?P<kind>struct|interface)\b"],
+    globals_=[r"^(?:var|const)\s+(?P<name>{ident})"],
+    imports=[r"^import\s+(?:{ident}\s+|[._]\s+)?\"(?P<module>[^\"\n]+)\"",
+             r"^[ \t]+(?:{ident}\s+|[._]\s+)?\"(?P<module>[^\"\n]+)\"[ \t]*$"],
+    calls=r"(?P<name>{ident})\s*\(",
+    skip_calls=['if', 'for', 'switch', 'func', 'return', 'make', 'new', 'len', 'cap', 'append',
+                'panic', 'recover', 'copy', 'delete', 'print', 'println', 'string', 'int'],
+    sig_tail=r"[ \t]*(?P<returns>[^{\n]*?)[ \t]*\{",
+)
+
+
+register_analyzer("python", [".py"], parser_ccg.parse_python_file)
+register_analyzer("jac", [".jac"], _spec_analyzer(JAC_SPEC))
+register_analyzer("javascript", [".js", ".jsx", ".mjs", ".cjs"], _spec_analyzer(JS_SPEC))
+register_analyzer("typescript", [".ts", ".tsx", ".mts", ".cts"], _spec_analyzer(JS_SPEC))
+register_analyzer("go", [".go"], _spec_analyzer(GO_SPEC))
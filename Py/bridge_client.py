@@ -0,0 +1,95 @@
+# Py/bridge_client.py - Client for the persistent bridge server (Py/bridge_server.py)
+# Used by Jac walkers: connects to CG_BRIDGE_SOCKET if set, otherwise spawns one stdio server
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+from typing import Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class BridgeError(Exception):
+    """A request failed on the server side; `type` is the server-side exception name."""
+
+    def __init__(self, error_type: str, message: str):
+        super().__init__(f"{error_type}: {message}")
+        self.type = error_type
+
+
+class BridgeClient:
+    """
+    Line-delimited JSON client. With `socket_path` it connects to a running server,
+    otherwise it starts `python -m Py.bridge_server` and talks over its stdin/stdout.
+    Calls are serialized, so one client can be shared by several walkers/threads.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, server_args: Optional[list] = None):
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._proc = None
+        self._sock = None
+        if socket_path:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.connect(socket_path)
+            self._reader = self._sock.makefile("r", encoding="utf-8")
+            self._writer = self._sock.makefile("w", encoding="utf-8")
+        else:
+            self._proc = subprocess.Popen(
+                [sys.executable, "-m", "Py.bridge_server", *(server_args or [])],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                cwd=PROJECT_ROOT, text=True, encoding="utf-8", bufsize=1,
+            )
+            self._reader = self._proc.stdout
+            self._writer = self._proc.stdin
+
+    def call(self, method: str, **params):
+        """Send one request and return its result, raising BridgeError on a server-side error."""
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+            self._writer.write(json.dumps({"id": request_id, "method": method, "params": params}) + "\n")
+            self._writer.flush()
+            line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Bridge server closed the connection")
+        response = json.loads(line)
+        if response.get("id") != request_id:
+            raise ConnectionError(f"Out-of-order response from bridge server: {response.get('id')} != {request_id}")
+        if not response["ok"]:
+            raise BridgeError(response["error"]["type"], response["error"]["message"])
+        return response["result"]
+
+    def close(self) -> None:
+        """Disconnect; a server this client started is asked to shut down."""
+        if self._proc is not None and self._proc.poll() is None:
+            try:
+                self.call("shutdown")
+            except (OSError, ConnectionError, ValueError):
+                pass
+            self._proc.stdin.close()
+            self._proc.wait(timeout=10)
+        if self._sock is not None:
+            self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared() -> BridgeClient:
+    """Process-wide client (what the Jac walkers use): CG_BRIDGE_SOCKET if set, else a spawned stdio server."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = BridgeClient(os.environ.get("CG_BRIDGE_SOCKET"))
+        return _shared
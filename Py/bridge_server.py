@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# Py/bridge_server.py - Persistent Jac-to-Python bridge
+# One long-lived process answers line-delimited JSON requests over stdin/stdout or a Unix socket,
+# so Jac walkers pay interpreter startup, imports and parser warm-up once instead of per call.
+"""
+Protocol: one JSON object per line in each direction.
+
+    -> {"id": 1, "method": "analyze_file", "params": {"path": "/tmp/repo/app.py"}}
+    <- {"id": 1, "ok": true, "result": {...}}
+    <- {"id": 1, "ok": false, "error": {"type": "ValueError", "message": "..."}}
+
+Methods:
+    ping                                  liveness check (pid, uptime)
+    stats                                 request counts, parse-cache and git pool statistics
+    preflight(url, size_budget=None, analysis_budget=None)
+                                          size estimate and processing strategy before cloning (Py/preflight.py)
+    clone_and_map(url)                    RepoMapper: clone, file tree, README summary
+    plan(repo_info, max_files=None)       Supervisor: source files ranked by importance (Py/planner.py)
+    analyze_file(path)                    CodeAnalyzer: one file, served from the parse cache when unchanged
+    build_ccg(file_paths, repo_root=None) CodeAnalyzer: CCG (+ call resolution when repo_root is given) and Mermaid
+    generate_docs(repo_info, file_paths=None, formats=None)
+                                          DocGenie: render docs for a mapped repository; returns the
+                                          docs.md path (first rendered format without markdown)
+    run(url, verbose=False, analysis_budget=None, formats=None)  full pipeline (Orchestrator.run)
+    query(repo_name, kind, symbol, offset=0, limit=50, k=1, direction="both")
+                                          CCG queries (Py/ccg_query.py): definition, callers, callees,
+                                          subclasses, importers, neighborhood
+    search(q, repo=None, kinds=None, offset=0, limit=50)  symbol/path/README search across documented repos
+    shutdown                              stop serving after this response
+
+Usage:
+    python -m Py.bridge_server                     # stdin/stdout
+    python -m Py.bridge_server --socket /tmp/cg.sock
+    python Py/jac_bridge.py --serve [--socket PATH]
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Py import repo_clone, parser_ccg, analyzers, call_resolver, planner, ccg_query, search_index, renderers, \
+    git_exec, preflight
+from Py.orchestrator import Orchestrator
+
+
+class BridgeServer:
+    """
+    Warm state shared by all requests: one Orchestrator, a parser_ccg.ParseCache keyed by
+    (path, mtime, size) and, when workers > 1, a process pool whose workers already have the
+    analyzers imported. Transports (stdio, Unix socket) only move lines in and out of handle_line().
+    """
+
+    def __init__(self, output_root: str = "./outputs", parse_budgets: Optional[dict] = None,
+                 workers: Optional[int] = None, cache_entries: int = 20000):
+        self.parse_budgets = parse_budgets
+        self.cache = parser_ccg.ParseCache(cache_entries)
+        self.workers = parser_ccg.DEFAULT_WORKERS if workers is None else workers
+        self.executor = None
+        if self.workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            # Warm-up: each worker imports the analyzers now rather than on the first real build
+            for _ in range(self.workers):
+                self.executor.submit(parser_ccg._analyze_chunk, [], {})
+        self.orchestrator = Orchestrator(output_root, parse_budgets, self.cache, self.executor)
+        self.started = time.monotonic()
+        self.requests = Counter()
+        self.stopping = threading.Event()
+        self.methods = {
+            "ping": self.ping,
+            "stats": self.stats,
+            "preflight": self.preflight,
+            "clone_and_map": self.clone_and_map,
+            "plan": self.plan,
+            "analyze_file": self.analyze_file,
+            "build_ccg": self.build_ccg,
+            "generate_docs": self.generate_docs,
+            "run": self.run,
+            "query": self.query,
+            "search": self.search,
+            "shutdown": self.shutdown,
+        }
+
+    # ─── Methods ───
+
+    def ping(self) -> dict:
+        return {"pong": True, "pid": os.getpid(), "uptime_s": round(time.monotonic() - self.started, 3)}
+
+    def stats(self) -> dict:
+        return {
+            "uptime_s": round(time.monotonic() - self.started, 3),
+            "requests": dict(self.requests),
+            "parse_cache": self.cache.stats(),
+            "git": git_exec.get_pool().stats(),
+            "workers": self.workers,
+        }
+
+    def preflight(self, url: str, size_budget: Optional[dict] = None,
+                  analysis_budget: Optional[dict] = None) -> dict:
+        return preflight.estimate(url, size_budget, analysis_budget)
+
+    def clone_and_map(self, url: str) -> dict:
+        repo_info = repo_clone.clone_repo(url, None)
+        repo_info["file_tree"] = repo_clone.generate_file_tree(repo_info["root"])
+        repo_info["readme_summary"] = repo_clone.summarize_readme(repo_info["root"])
+        return repo_info
+
+    def plan(self, repo_info: dict, max_files: Optional[int] = None) -> dict:
+        repo_root = repo_info["root"]
+        if "file_tree" not in repo_info:
+            repo_info["file_tree"] = repo_clone.generate_file_tree(repo_root)
+        source_files = self.orchestrator._collect_source_files(repo_info["file_tree"], repo_root, limit=None)
+        plan = planner.plan_analysis(source_files, repo_root, repo_info.get("readme"), max_files)
+        return {"priority_files": plan["files"], "ranked": plan["ranked"], "total": plan["total"]}
+
+    def analyze_file(self, path: str) -> dict:
+        budgets = parser_ccg.resolve_budgets(self.parse_budgets)
+        stamp = self.cache.stamp(path)
+        hit = self.cache.get(path, stamp, budgets)
+        if hit is not None:
+            return hit[1]
+        parsed = analyzers.analyze_file(path, budgets)
+        self.cache.put(path, stamp, budgets, analyzers.language_for(path), parsed, stamp[1] if stamp else 0)
+        return parsed
+
+    def build_ccg(self, file_paths: list, repo_root: Optional[str] = None) -> dict:
+        ccg = parser_ccg.build_ccg_for_files(file_paths, self.parse_budgets,
+                                             cache=self.cache, executor=self.executor)
+        if repo_root:
+            ccg = call_resolver.resolve_calls(ccg, repo_root)
+        return {"graph": ccg, "mermaid": parser_ccg.ccg_to_mermaid(ccg)}
+
+    def generate_docs(self, repo_info: dict, file_paths: Optional[list] = None,
+                      formats: Optional[list] = None) -> str:
+        repo_root = repo_info["root"]
+        if "file_tree" not in repo_info:
+            repo_info["file_tree"] = repo_clone.generate_file_tree(repo_root)
+        if file_paths is None:
+            file_paths = self.orchestrator._collect_source_files(repo_info["file_tree"], repo_root, limit=None)
+        built = self.build_ccg(file_paths, repo_root) if file_paths else {"graph": None, "mermaid": None}
+        outputs = self.orchestrator._generate_docs(repo_info["name"], repo_info, built["graph"], built["mermaid"],
+                                                   renderers.validate_formats(formats) if formats else None)
+        return outputs.get("markdown") or next(iter(outputs.values()))
+
+    def run(self, url: str, verbose: bool = False, analysis_budget: Optional[dict] = None,
+            formats: Optional[list] = None) -> dict:
+        return self.orchestrator.run(url, verbose=verbose, analysis_budget=analysis_budget, formats=formats)
+
+    def query(self, repo_name: str, kind: str, symbol: str, offset: int = 0, limit: int = ccg_query.DEFAULT_LIMIT,
+              k: int = 1, direction: str = "both") -> dict:
+        index = ccg_query.index_for_repo(self.orchestrator.output_root, repo_name)
+        if kind == "neighborhood":
+            return index.neighborhood(symbol, k, direction, offset, limit)
+        methods = {"definition": index.definition, "callers": index.callers_of, "callees": index.callees_of,
+                   "subclasses": index.subclasses_of, "importers": index.importers_of}
+        if kind not in methods:
+            raise ValueError(f"Unknown query kind: {kind!r}")
+        return methods[kind](symbol, offset, limit)
+
+    def search(self, q: str, repo: Optional[str] = None, kinds: Optional[list] = None,
+               offset: int = 0, limit: int = ccg_query.DEFAULT_LIMIT) -> dict:
+        index = search_index.get_index(self.orchestrator.output_root)
+        return index.search(q, repo, set(kinds) if kinds else None, offset, limit)
+
+    def shutdown(self) -> dict:
+        self.stopping.set()
+        return {"stopping": True}
+
+    # ─── Dispatch ───
+
+    def dispatch(self, request: dict) -> dict:
+        request_id = request.get("id")
+        method = self.methods.get(request.get("method"))
+        if method is None:
+            return _error(request_id, "MethodNotFound", f"Unknown method: {request.get('method')!r}")
+        params = request.get("params") or {}
+        self.requests[request["method"]] += 1
+        try:
+            result = method(**params) if isinstance(params, dict) else method(*params)
+        except Exception as e:
+            return _error(request_id, type(e).__name__, str(e))
+        return {"id": request_id, "ok": True, "result": result}
+
+    def handle_line(self, line: str) -> str:
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            response = _error(None, "BadRequest", str(e))
+        else:
+            response = self.dispatch(request)
+        return json.dumps(response, default=str)
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+
+def _error(request_id, error_type: str, message: str) -> dict:
+    return {"id": request_id, "ok": False, "error": {"type": error_type, "message": message}}
+
+
+# ─── Transports ───
+
+def serve_stdio(server: BridgeServer) -> None:
+    """Serve requests from stdin until EOF or shutdown; responses go to the original stdout."""
+    out = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8", buffering=1)
+    # Keep the protocol stream clean: prints and child processes (git clone) now write to stderr
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        out.write(server.handle_line(line) + "\n")
+        if server.stopping.is_set():
+            break
+    out.close()
+
+
+def serve_socket(server: BridgeServer, path: str) -> None:
+    """Serve requests on a Unix socket; each connection is handled on its own thread."""
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                line = raw.decode("utf-8").strip()
+                if not line:
+                    continue
+                self.wfile.write((server.handle_line(line) + "\n").encode("utf-8"))
+                if server.stopping.is_set():
+                    threading.Thread(target=srv.shutdown, daemon=True).start()
+                    return
+
+    if os.path.exists(path):
+        os.unlink(path)  # stale socket from a previous run
+    srv = socketserver.ThreadingUnixStreamServer(path, Handler)
+    srv.daemon_threads = True
+    os.chmod(path, 0o600)
+    print(f"[Bridge] Listening on {path} (pid {os.getpid()})", file=sys.stderr)
+    try:
+        srv.serve_forever()
+    finally:
+        srv.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Persistent Jac-to-Python bridge server")
+    parser.add_argument("--socket", help="Unix socket path (default: serve on stdin/stdout)")
+    parser.add_argument("--output-root", default="./outputs", help="Docs output directory")
+    parser.add_argument("--workers", type=int, default=None, help="Parser worker processes")
+    args = parser.parse_args(argv)
+
+    server = BridgeServer(output_root=args.output_root, workers=args.workers)
+    try:
+        if args.socket:
+            serve_socket(server, args.socket)
+        else:
+            serve_stdio(server)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
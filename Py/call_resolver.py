@@ -0,0 +1,219 @@
+# Py/call_resolver.py - Cross-file call resolution for the Code Context Graph
+# Builds per-module symbol and import/alias tables, then resolves each call site with hash lookups
+
+import builtins
+import os
+from collections import Counter
+from typing import Optional
+
+SELF_NAMES = frozenset(["self", "cls"])
+BUILTIN_NAMES = frozenset(dir(builtins))
+
+# Re-export chains (pkg/__init__ importing from pkg.sub) are followed at most this deep
+MAX_ALIAS_HOPS = 8
+
+
+def module_name(path: str, repo_root: str) -> str:
+    """Dotted module name for a source file: pkg/sub/mod.py -> pkg.sub.mod, pkg/__init__.py -> pkg."""
+    rel = os.path.relpath(path, repo_root)
+    parts = os.path.splitext(rel)[0].replace("\\", "/").split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    if len(parts) > 1 and parts[0] == "src":
+        parts = parts[1:]
+    return ".".join(parts) or os.path.basename(os.path.normpath(repo_root))
+
+
+def resolve_relative(path: str, module: str, is_package: bool) -> str:
+    """Absolute dotted path for a (possibly relative) import written inside `module`."""
+    level = len(path) - len(path.lstrip("."))
+    if not level:
+        return path
+    base = module.split(".") if is_package else module.split(".")[:-1]
+    if level > 1:
+        base = base[:max(0, len(base) - (level - 1))]
+    rest = path[level:]
+    return ".".join(base + [rest] if rest else base)
+
+
+class CallResolver:
+    """
+    Symbol tables for one CCG:
+      definitions: "pkg.mod.Class.method" -> "function" | "class"
+      imports:     module -> {local alias -> absolute dotted target}
+      star_imports: module -> [absolute module paths imported with *]
+    Every lookup is a dict/set probe; resolve() results are memoized per
+    (module, enclosing class, qualifier, name), so cost is linear in call sites.
+    """
+
+    def __init__(self, ccg: dict, repo_root: str):
+        self.repo_root = repo_root
+        self.modules = {}
+        self.packages = set()
+        self.definitions = {}
+        self.imports = {}
+        self.star_imports = {}
+        self._cache = {}
+
+        for kind, key in (("function", "functions"), ("class", "classes")):
+            for record in ccg.get(key, []):
+                module = self.module_of(record["file"])
+                self.definitions[f"{module}.{record.get('qualname', record['name'])}"] = kind
+
+        for record in ccg.get("imports", []):
+            if "path" not in record:
+                continue  # analyzers without import tables (non-Python) resolve locally only
+            module = self.module_of(record["file"])
+            target = resolve_relative(record["path"], module, module in self.packages)
+            table = self.imports.setdefault(module, {})
+            if "names" in record:
+                for name, alias in record["names"]:
+                    if name == "*":
+                        self.star_imports.setdefault(module, []).append(target)
+                    else:
+                        table[alias or name] = f"{target}.{name}"
+            elif record.get("alias"):
+                table[record["alias"]] = target
+            else:
+                # `import a.b` binds `a`
+                top = target.split(".")[0]
+                table.setdefault(top, top)
+        self.top_level = {module.split(".")[0] for module in self.modules.values()}
+
+    def module_of(self, path: str) -> str:
+        module = self.modules.get(path)
+        if module is None:
+            module = module_name(path, self.repo_root)
+            self.modules[path] = module
+            if os.path.basename(path).startswith("__init__."):
+                self.packages.add(module)
+        return module
+
+    def _lookup(self, module: str, name: str) -> Optional[str]:
+        """What `name` refers to inside `module`: a local definition, an import alias or a star import."""
+        local = f"{module}.{name}"
+        if local in self.definitions:
+            return local
+        target = self.imports.get(module, {}).get(name)
+        if target is not None:
+            return target
+        for star in self.star_imports.get(module, ()):
+            if f"{star}.{name}" in self.definitions:
+                return f"{star}.{name}"
+        return None
+
+    def _follow(self, target: str) -> str:
+        """Chase re-exports (`pkg.save` where pkg/__init__ imports save, or *, from pkg.store)."""
+        for _ in range(MAX_ALIAS_HOPS):
+            if target in self.definitions:
+                return target
+            parts = target.split(".")
+            for i in range(len(parts) - 1, 0, -1):
+                prefix = ".".join(parts[:i])
+                if prefix in self.imports and parts[i] in self.imports[prefix]:
+                    target = ".".join([self.imports[prefix][parts[i]]] + parts[i + 1:])
+                    break
+                star = next((s for s in self.star_imports.get(prefix, ()) if f"{s}.{parts[i]}" in self.definitions), None)
+                if star is not None:
+                    target = ".".join([star] + parts[i:])
+                    break
+            else:
+                return target
+        return target
+
+    def resolve(self, call: dict) -> tuple:
+        """Return (target, status) with status in resolved | external | builtin | unresolved."""
+        module = self.module_of(call["file"])
+        qualifier = call.get("qualifier")
+        name = call["callee"]
+        scope = None
+        if qualifier in SELF_NAMES:
+            scope = call.get("caller_qualname", "").rpartition(".")[0]
+        key = (module, scope, qualifier, name)
+        cached = self._cache.get(key)
+        if cached is None:
+            cached = self._resolve(module, scope, qualifier, name)
+            self._cache[key] = cached
+        return cached
+
+    def _resolve(self, module: str, scope: Optional[str], qualifier: Optional[str], name: str) -> tuple:
+        if qualifier is None:
+            target = self._lookup(module, name)
+            if target is None:
+                return (None, "builtin" if name in BUILTIN_NAMES else "unresolved")
+        elif qualifier in SELF_NAMES:
+            if not scope:
+                return (None, "unresolved")
+            target = f"{module}.{scope}.{name}"
+        else:
+            head, _, rest = qualifier.partition(".")
+            base = self._lookup(module, head)
+            if base is None:
+                return (None, "unresolved")  # attribute call on a local variable/parameter
+            target = ".".join(filter(None, [base, rest, name]))
+        return self._classify(target)
+
+    def resolve_name(self, path: str, name: str, scope: Optional[str] = None) -> tuple:
+        """
+        (target, status) of a dotted name used in `path` outside any function, e.g. a base class
+        (`Base`, `typing.NamedTuple`); names of the enclosing class body `scope` come first.
+        """
+        module = self.module_of(path)
+        head, _, rest = name.partition(".")
+        if scope and f"{module}.{scope}.{head}" in self.definitions:
+            target = f"{module}.{scope}.{head}"
+        else:
+            target = self._lookup(module, head)
+            if target is None:
+                return (None, "builtin" if head in BUILTIN_NAMES else "unresolved")
+        return self._classify(".".join(filter(None, [target, rest])))
+
+    def _classify(self, target: str) -> tuple:
+        target = self._follow(target)
+        if target in self.definitions:
+            return (target, "resolved")
+        if target.split(".")[0] in self.top_level:
+            return (None, "unresolved")  # points into the repo but no such definition was found
+        return (target, "external")
+
+
+def resolve_calls(ccg: Optional[dict], repo_root: str) -> Optional[dict]:
+    """
+    Resolution pass: annotate every call with "target" (qualified definition or external
+    dotted path) and "resolution" status and every class with "base_targets", record the
+    file -> module map in ccg["modules"] and summary counts (plus the most common unresolved
+    names) in ccg["resolution"].
+    """
+    if not ccg:
+        return ccg
+    resolver = CallResolver(ccg, repo_root)
+    counts = Counter()
+    unresolved = Counter()
+    for call in ccg.get("calls", []):
+        target, status = resolver.resolve(call)
+        call["target"] = target
+        call["resolution"] = status
+        counts[status] += 1
+        if status == "unresolved":
+            unresolved[call["callee"]] += 1
+
+    # Base classes: "base_targets" parallels "bases" - a qualified definition, an external dotted
+    # path, the builtin's name, or None when the base could not be resolved
+    for cls in ccg.get("classes", []):
+        if cls.get("bases"):
+            scope = cls.get("qualname", cls["name"]).rpartition(".")[0]
+            targets = []
+            for base in cls["bases"]:
+                target, status = resolver.resolve_name(cls["file"], base, scope)
+                targets.append(base if status == "builtin" else target)
+            cls["base_targets"] = targets
+
+    ccg["modules"] = resolver.modules
+    ccg["resolution"] = {
+        "resolved": counts["resolved"],
+        "external": counts["external"],
+        "builtin": counts["builtin"],
+        "unresolved": counts["unresolved"],
+        "top_unresolved": sorted(unresolved.items(), key=lambda kv: (-kv[1], kv[0]))[:10],
+    }
+    return ccg
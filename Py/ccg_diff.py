@@ -0,0 +1,223 @@
+# Py/ccg_diff.py - Architecture changes between two refs of a repository
+# Only the files that differ between the refs are parsed for the older one; every other parse is
+# shared through a cache keyed by git blob id. The two CCGs are compared into a structured delta
+
+import os
+import threading
+from typing import Optional
+
+from Py import git_exec, parser_ccg, repo_clone
+from Py.call_resolver import module_name
+from Py.hierarchy import Hierarchy
+from Py.import_graph import ImportGraph, go_module, strongly_connected_components
+from Py.preflight import _ls_tree
+
+CACHE_ENTRIES = int(os.environ.get("CG_DIFF_CACHE_ENTRIES", "50000"))
+DIFF_DIRNAME = "diffs"             # <output_root>/<repo>/diffs/<base>..<head>/
+DELTA_FILE = "ccg_delta.json"
+REPORT_FILE = "architecture_changes.md"
+MAX_LISTED = 25                    # rows per list in the report; the JSON delta is complete
+STATUS = {"A": "added", "D": "deleted", "M": "modified", "T": "modified"}
+
+
+def _copy(parsed: dict) -> dict:
+    """A per-file result with its own record dicts: aggregation and resolution annotate records in place."""
+    return {key: [dict(r) for r in value] if key in parser_ccg.CCG_KEYS else value
+            for key, value in parsed.items()}
+
+
+class BlobParseCache(parser_ccg.ParseCache):
+    """
+    ParseCache keyed by content: a file's git blob id (plus its extension, which picks the
+    analyzer). A parse is reused wherever the same content shows up again - under the other
+    ref, in a later clone, in the next diff of the same repository. Paths are mapped to blob ids
+    with track() before a build and forgotten after it; records are copied in and out.
+    """
+
+    def __init__(self, max_entries: int = CACHE_ENTRIES):
+        super().__init__(max_entries)
+        self._blobs = {}
+        self._blobs_lock = threading.Lock()
+
+    def track(self, blobs: dict) -> None:
+        """Register {absolute path: blob id} for the files about to be built."""
+        with self._blobs_lock:
+            self._blobs.update(blobs)
+
+    def forget(self, paths) -> None:
+        with self._blobs_lock:
+            for path in paths:
+                self._blobs.pop(path, None)
+
+    def stamp(self, path: str) -> Optional[tuple]:
+        oid = self._blobs.get(path)
+        return None if oid is None else (oid, os.path.splitext(path)[1].lower())
+
+    def get(self, path: str, stamp: Optional[tuple], budgets: dict) -> Optional[tuple]:
+        hit = super().get(stamp, stamp, budgets)
+        return None if hit is None else (hit[0], _copy(hit[1]), hit[2])
+
+    def put(self, path: str, stamp: Optional[tuple], budgets: dict, language: Optional[str],
+            parsed: dict, size: int) -> None:
+        super().put(stamp, stamp, budgets, language, _copy(parsed), size)
+
+
+# ─── Git ───
+
+def changed_files(root: str, base: str, head: str) -> dict:
+    """{repository-relative path: "added" | "deleted" | "modified"} between two commits (a rename is a delete plus an add)."""
+    output = git_exec.run_git(["diff", "--name-status", "-z", "--no-renames", base, head, "--"],
+                              cwd=root, op="diff", timeout=120)
+    fields = output.split("\0")
+    return {path: STATUS.get(status[:1], "modified") for status, path in zip(fields[::2], fields[1::2]) if path}
+
+
+def blob_ids(root: str, commit: str) -> dict:
+    """{repository-relative path: blob id} of every file in a commit (read from trees only)."""
+    output = git_exec.run_git(["ls-tree", "-r", "-z", commit], cwd=root, op="ls-tree", timeout=120)
+    return {path: oid for mode, kind, oid, size, path in _ls_tree(output) if kind == "blob"}
+
+
+def is_source(rel: str, extensions: set) -> bool:
+    """A path the pipeline analyzes: registered extension, outside repo_clone.IGNORE_DIRS."""
+    return (os.path.splitext(rel)[1].lower() in extensions
+            and not any(part in repo_clone.IGNORE_DIRS for part in rel.split("/")[:-1]))
+
+
+def checkout_paths(root: str, directory: str, commit: str, paths: list) -> None:
+    """Check out only `paths` (repository-relative) of `commit` into a new worktree at `directory`."""
+    git_exec.run_git(["worktree", "add", "--quiet", "--no-checkout", "--detach", directory, commit],
+                     cwd=root, op="worktree", timeout=120)
+    if paths:
+        git_exec.run_git(["checkout", "--quiet", commit, "--pathspec-from-file=-", "--pathspec-file-nul"],
+                         cwd=directory, op="checkout", input="\0".join(paths))
+
+
+def rebase_paths(ccg: Optional[dict], source: str, target: str) -> Optional[dict]:
+    """Move every record (and skip note) of files under `source` to the same path under `target`."""
+    if not ccg:
+        return ccg
+    prefix = source.rstrip(os.sep) + os.sep
+    for key in parser_ccg.CCG_KEYS:
+        for record in ccg.get(key, []):
+            if record["file"].startswith(prefix):
+                record["file"] = os.path.join(target, record["file"][len(prefix):])
+    for note in ccg.get("skipped", []):
+        if note["path"].startswith(prefix):
+            note["path"] = os.path.join(target, note["path"][len(prefix):])
+    return ccg
+
+
+# ─── Delta ───
+
+class _Side:
+    """The comparable view of one ref's CCG: qualified definitions, call and import edges, cycles."""
+
+    def __init__(self, ccg: Optional[dict], root: str):
+        ccg = ccg or {}
+        self.root = root
+        known = ccg.get("modules") or {}
+        self.modules = set(known.values())
+
+        def qualified(path: str, qualname: str) -> str:
+            return f"{known.get(path) or module_name(path, root)}.{qualname}"
+
+        self.functions = {}
+        for record in ccg.get("functions", []):
+            self.functions.setdefault(qualified(record["file"], record.get("qualname", record["name"])),
+                                      (record, _signature(record)))
+
+        hierarchy = Hierarchy(ccg)
+        self.classes = {}
+        for i, record in enumerate(ccg.get("classes", [])):
+            bases = [hierarchy.names[j] if j >= 0 else base for j, base in hierarchy.bases[i]]
+            self.classes.setdefault(hierarchy.names[i], (record, bases))
+
+        self.calls = set()
+        for call in ccg.get("calls", []):
+            callee = call.get("target") or (f"{call['qualifier']}.{call['callee']}" if call.get("qualifier")
+                                            else call["callee"])
+            self.calls.add((qualified(call["file"], call.get("caller_qualname", call["caller"])), callee))
+
+        graph = ImportGraph(ccg, root, go_module(root))
+        self.graph = graph
+        self.imports = {(graph.modules[a], graph.modules[b]) for a, targets in enumerate(graph.adjacency)
+                        for b in targets}
+        # Import cycles as module-id components; cycle_of: module name -> its cycle's index
+        self.cycles = [c for c in strongly_connected_components(graph.adjacency) if len(c) > 1]
+        self.cycle_of = {graph.modules[m]: k for k, cycle in enumerate(self.cycles) for m in cycle}
+
+    def location(self, record: dict) -> dict:
+        return {"file": os.path.relpath(record["file"], self.root).replace("\\", "/"), "line": record.get("line")}
+
+
+def _signature(record: dict) -> str:
+    returns = f" -> {record['returns']}" if record.get("returns") else ""
+    return ("async " if record.get("async") else "") + (record.get("signature") or "()") + returns
+
+
+def _cycle_changes(side: _Side, other: _Side, moved: str, surviving: bool) -> list:
+    """
+    Cycles of `side` whose modules were not all on one cycle in `other`: new or grown cycles of
+    the head (against the base), broken or shrunk ones of the base (against the head; with
+    `surviving`, modules the head no longer has are left out). `moved` names the modules that
+    share no cycle with the rest in `other`; the cycle path runs through the first of them.
+    """
+    changes = []
+    names = side.graph.modules
+    for component in side.cycles:
+        members = [names[m] for m in component if not surviving or names[m] in other.graph.ids]
+        groups = {}
+        for module in members:
+            groups.setdefault(other.cycle_of.get(module, module), []).append(module)
+        if len(members) > 1 and len(groups) == 1:
+            continue
+        alone = sorted(group[0] for group in groups.values() if len(group) == 1)
+        start = side.graph.ids[alone[0]] if alone else None
+        changes.append({"size": len(component), "modules": sorted(names[m] for m in component),
+                        moved: alone, "path": side.graph._cycle_path(component, start)})
+    changes.sort(key=lambda c: (-c["size"], c["modules"][0]))
+    return changes
+
+
+def compare(base_ccg: Optional[dict], head_ccg: Optional[dict], root: str) -> dict:
+    """
+    CCG delta between two resolved CCGs whose files live under the same `root`: modules,
+    classes (added, removed, bases changed) and functions (added, removed, signature changed)
+    by qualified name; distinct call edges (caller -> resolved target, else the callee as
+    written) and module import edges, added and removed; import cycles that are new or grew
+    ("added") and that were broken or shrank ("removed"); plus "summary" counts.
+    """
+    base, head = _Side(base_ccg, root), _Side(head_ccg, root)
+
+    def definitions(before: dict, after: dict, field: str) -> dict:
+        """Definitions by qualified name: {name: (record, compared value)} on each side."""
+        return {
+            "added": [{"name": name, **head.location(after[name][0]), field: after[name][1]}
+                      for name in sorted(after.keys() - before.keys())],
+            "removed": [{"name": name, **base.location(before[name][0]), field: before[name][1]}
+                        for name in sorted(before.keys() - after.keys())],
+            "changed": [{"name": name, **head.location(record), "before": before[name][1], "after": value}
+                        for name, (record, value) in sorted(after.items())
+                        if name in before and before[name][1] != value],
+        }
+
+    def edges(before: set, after: set, keys: tuple) -> dict:
+        return {"added": [dict(zip(keys, edge)) for edge in sorted(after - before)],
+                "removed": [dict(zip(keys, edge)) for edge in sorted(before - after)]}
+
+    delta = {
+        "modules": {"added": sorted(head.modules - base.modules), "removed": sorted(base.modules - head.modules)},
+        "classes": definitions(base.classes, head.classes, "bases"),
+        "functions": definitions(base.functions, head.functions, "signature"),
+        "calls": edges(base.calls, head.calls, ("caller", "callee")),
+        "imports": edges(base.imports, head.imports, ("importer", "imported")),
+        "import_cycles": {
+            "added": _cycle_changes(head, base, "joined", surviving=False),
+            "removed": _cycle_changes(base, head, "left", surviving=True),
+        },
+    }
+    delta["summary"] = {f"{section}_{change}": len(delta[section][change])
+                        for section in ("modules", "classes", "functions", "calls", "imports", "import_cycles")
+                        for change in ("added", "removed", "changed") if change in delta[section]}
+    return delta
@@ -0,0 +1,301 @@
+# Py/ccg_query.py - Query layer over a stored Code Context Graph
+# Precomputed hash indexes answer callers/callees/subclasses/importers/definition/k-hop lookups
+# in time proportional to the page returned, not to the size of the graph
+
+import contextlib
+import gc
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Optional
+
+from Py.call_resolver import resolve_relative
+
+CCG_FILENAME = "ccg.json"
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+MAX_HOPS = 5
+MAX_NEIGHBORHOOD = 100000  # nodes visited by one k-hop query
+
+
+def paginate(items: list, offset: int = 0, limit: int = DEFAULT_LIMIT) -> dict:
+    """Slice `items` into one page: {items, total, offset, limit, next_offset (None on the last page)}."""
+    offset = max(0, int(offset))
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    page = items[offset:offset + limit]
+    next_offset = offset + limit if offset + limit < len(items) else None
+    return {"items": page, "total": len(items), "offset": offset, "limit": limit, "next_offset": next_offset}
+
+
+def _short(symbol: str) -> str:
+    return symbol.rpartition(".")[2]
+
+
+def _edge_order(edge: tuple) -> tuple:
+    return (edge[0], edge[1], edge[2]["file"], edge[2].get("line") or 0)
+
+
+def _item_order(item: dict) -> tuple:
+    return (item["symbol"] if "symbol" in item else item["file"], item["file"], item.get("line") or 0)
+
+
+class CCGIndex:
+    """
+    Read-only indexes over one CCG (as produced by parser_ccg + call_resolver):
+      definitions:  qualified name ("pkg.mod.Class.method") -> [definition]
+      by_name:      bare name -> [qualified names]
+      callees:      qualified caller -> [call edge]
+      callers:      callee (qualified target, external dotted path or bare name) -> [call edge]
+      subclasses:   parent name (as written and its last segment) -> [class]
+      importers:    absolute dotted module -> [import site]
+    Building is one pass over the graph. Each list is sorted the first time it is queried and
+    call edges are only turned into response dicts for the page being returned, so a query
+    costs a dict probe plus a slice. Symbols may be qualified or bare names (a bare name
+    matches every definition with that name).
+    """
+
+    def __init__(self, ccg: dict, root: Optional[str] = None):
+        self.root = root or ccg.get("root")
+        modules = ccg.get("modules", {})
+        self.definitions = {}
+        self.by_name = {}
+        self.callers = {}
+        self.callers_by_name = {}
+        self.callees = {}
+        self.subclasses = {}
+        self.importers = {}
+        self._rel_cache = {}
+        self._sorted = set()
+        self._sort_lock = threading.Lock()
+
+        def module_of(path: str) -> str:
+            return modules.get(path) or os.path.splitext(os.path.basename(path))[0]
+
+        qualname_by_class = {}
+        for kind, key in (("function", "functions"), ("class", "classes")):
+            for record in ccg.get(key, []):
+                qualified = f"{module_of(record['file'])}.{record.get('qualname', record['name'])}"
+                definition = {"symbol": qualified, "kind": kind, "file": self._rel(record["file"]), "line": record.get("line")}
+                if "signature" in record:
+                    definition["signature"] = record["signature"]
+                self.definitions.setdefault(qualified, []).append(definition)
+                self.by_name.setdefault(record["name"], []).append(qualified)
+                if kind == "class":
+                    qualname_by_class.setdefault((record["file"], record["name"]), qualified)
+
+        # Edges are (caller, callee, call record); callee is the resolved target or
+        # external dotted path when known, else the bare name as written
+        callers, callees, callers_by_name = self.callers, self.callees, self.callers_by_name
+        for call in ccg.get("calls", []):
+            caller = f"{module_of(call['file'])}.{call.get('caller_qualname', call['caller'])}"
+            name = call["callee"]
+            callee = call.get("target") or name
+            edge = (caller, callee, call)
+            callees.setdefault(caller, []).append(edge)
+            callers.setdefault(callee, []).append(edge)
+            if callee != name:
+                callers_by_name.setdefault(name, []).append(edge)
+
+        self.inheritance_count = len(ccg.get("inheritance", []))
+        for rel in ccg.get("inheritance", []):
+            child = qualname_by_class.get((rel.get("file"), rel["child"]), rel["child"])
+            item = {"symbol": child, "parent": rel["parent"], "file": self._rel(rel.get("file", ""))}
+            for key in {rel["parent"], _short(rel["parent"])}:
+                self.subclasses.setdefault(key, []).append(item)
+
+        for record in ccg.get("imports", []):
+            path = record.get("path", record["module"])
+            module = module_of(record["file"])
+            if "path" in record:
+                path = resolve_relative(path, module, os.path.basename(record["file"]).startswith("__init__."))
+            site = {"file": self._rel(record["file"]), "module": module, "imported": path, "line": record.get("line")}
+            targets = {path}
+            for name, _alias in record.get("names", []):
+                if name != "*":
+                    targets.add(f"{path}.{name}")  # `from pkg import sub` may import a submodule
+            for target in targets:
+                self.importers.setdefault(target, []).append(site)
+
+    def _rel(self, path: str) -> str:
+        rel = self._rel_cache.get(path)
+        if rel is None:
+            rel = os.path.relpath(path, self.root) if self.root and path else path
+            self._rel_cache[path] = rel
+        return rel
+
+    def _ordered(self, index: dict, key: str) -> list:
+        """index[key], sorted in place on first use so pages are stable slices."""
+        items = index.get(key)
+        if not items:
+            return []
+        marker = (id(index), key)
+        if marker not in self._sorted:
+            with self._sort_lock:
+                if marker not in self._sorted:
+                    items.sort(key=_edge_order if isinstance(items[0], tuple) else _item_order)
+                    self._sorted.add(marker)
+        return items
+
+    def _edge_item(self, edge: tuple) -> dict:
+        caller, callee, call = edge
+        return {"caller": caller, "callee": callee, "resolution": call.get("resolution"),
+                "file": self._rel(call["file"]), "line": call.get("line")}
+
+    def _edge_page(self, edges: list, offset: int, limit: int) -> dict:
+        page = paginate(edges, offset, limit)
+        page["items"] = [self._edge_item(edge) for edge in page["items"]]
+        return page
+
+    def _qualified(self, symbol: str) -> list:
+        """Qualified definitions a query symbol stands for."""
+        if symbol in self.definitions:
+            return [symbol]
+        return sorted(set(self.by_name.get(symbol, [])))
+
+    def _merged(self, index: dict, keys: list) -> list:
+        if len(keys) == 1:
+            return self._ordered(index, keys[0])
+        items = [item for key in keys for item in index.get(key, [])]
+        return sorted(items, key=_edge_order if items and isinstance(items[0], tuple) else _item_order)
+
+    # ─── Queries ───
+
+    def definition(self, symbol: str, offset: int = 0, limit: int = DEFAULT_LIMIT) -> dict:
+        return paginate(self._merged(self.definitions, self._qualified(symbol)), offset, limit)
+
+    def callers_of(self, symbol: str, offset: int = 0, limit: int = DEFAULT_LIMIT) -> dict:
+        """Call sites targeting `symbol`: resolved/external edges for a dotted name, all same-named callees for a bare name."""
+        if symbol in self.callers_by_name and symbol not in self.definitions and "." not in symbol:
+            # Resolved calls are keyed by their target; merge them back with unresolved same-named calls
+            edges = sorted(self.callers.get(symbol, []) + self.callers_by_name[symbol], key=_edge_order)
+        else:
+            edges = self._ordered(self.callers, symbol)
+        return self._edge_page(edges, offset, limit)
+
+    def callees_of(self, symbol: str, offset: int = 0, limit: int = DEFAULT_LIMIT) -> dict:
+        keys = [q for q in self._qualified(symbol) if q in self.callees] or [symbol]
+        return self._edge_page(self._merged(self.callees, keys), offset, limit)
+
+    def subclasses_of(self, symbol: str, offset: int = 0, limit: int = DEFAULT_LIMIT) -> dict:
+        """Direct subclasses, matched on the base class name as written (and its last dotted segment)."""
+        key = symbol if symbol in self.subclasses else _short(symbol)
+        return paginate(self._ordered(self.subclasses, key), offset, limit)
+
+    def importers_of(self, module: str, offset: int = 0, limit: int = DEFAULT_LIMIT) -> dict:
+        return paginate(self._ordered(self.importers, module), offset, limit)
+
+    def neighborhood(self, symbol: str, k: int = 1, direction: str = "both",
+                     offset: int = 0, limit: int = DEFAULT_LIMIT) -> dict:
+        """
+        Symbols within `k` call hops of `symbol` (direction: out = callees, in = callers, both).
+        Items are {"symbol", "distance"} ordered by distance then name.
+        """
+        if direction not in ("in", "out", "both"):
+            raise ValueError("direction must be 'in', 'out' or 'both'")
+        k = max(0, min(int(k), MAX_HOPS))
+        seeds = self._qualified(symbol) or [symbol]
+        distance = {s: 0 for s in seeds}
+        queue = deque(seeds)
+        truncated = False
+        while queue:
+            node = queue.popleft()
+            d = distance[node]
+            if d == k:
+                continue
+            neighbours = []
+            if direction in ("out", "both"):
+                neighbours.append(edge[1] for edge in self.callees.get(node, ()))
+            if direction in ("in", "both"):
+                neighbours.append(edge[0] for edge in self.callers.get(node, ()))
+            for group in neighbours:
+                for nxt in group:
+                    if nxt not in distance:
+                        if len(distance) >= MAX_NEIGHBORHOOD:
+                            truncated = True
+                            queue.clear()
+                            break
+                        distance[nxt] = d + 1
+                        queue.append(nxt)
+        items = sorted(({"symbol": s, "distance": d} for s, d in distance.items() if d > 0),
+                       key=lambda item: (item["distance"], item["symbol"]))
+        page = paginate(items, offset, limit)
+        page["truncated"] = truncated
+        return page
+
+    def stats(self) -> dict:
+        return {
+            "definitions": len(self.definitions),
+            "call_edges": sum(len(v) for v in self.callees.values()),
+            "inheritance": self.inheritance_count,
+            "imported_modules": len(self.importers),
+        }
+
+
+# ─── Stored graphs ───
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+MAX_LOADED_INDEXES = 4
+# GC pause shared by concurrent index builds (the collector is process-wide); see _gc_paused
+_gc_lock = threading.Lock()
+_gc_pauses = 0
+_gc_was_enabled = False
+
+
+def save_ccg(ccg: dict, output_dir: str, root: Optional[str] = None) -> str:
+    """Write the CCG next to docs.md (compact JSON) so it can be queried after the run."""
+    path = os.path.join(output_dir, CCG_FILENAME)
+    stored = dict(ccg, root=root) if root else ccg
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(stored, f, separators=(",", ":"))
+    os.replace(tmp, path)
+    return path
+
+
+@contextlib.contextmanager
+def _gc_paused():
+    # Loading builds millions of long-lived containers; cyclic GC passes over them are pure overhead.
+    # Builds overlapping on worker threads share the pause; the last to finish restores the prior state
+    global _gc_pauses, _gc_was_enabled
+    with _gc_lock:
+        if _gc_pauses == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_was_enabled:
+                gc.enable()
+
+
+def load_index(path: str) -> CCGIndex:
+    """
+    CCGIndex for a stored ccg.json. Built indexes are kept for the most recently used graphs
+    and rebuilt when the file changes, so only the first query after a run pays the build.
+    """
+    mtime = os.stat(path).st_mtime_ns
+    with _indexes_lock:
+        cached = _indexes.get(path)
+        if cached and cached[0] == mtime:
+            _indexes.move_to_end(path)
+            return cached[1]
+    with open(path, "r", encoding="utf-8") as f, _gc_paused():
+        index = CCGIndex(json.load(f))
+    with _indexes_lock:
+        _indexes[path] = (mtime, index)
+        _indexes.move_to_end(path)
+        while len(_indexes) > MAX_LOADED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def index_for_repo(output_root: str, repo_name: str) -> CCGIndex:
+    """Index of the CCG stored for `repo_name` under `output_root`; FileNotFoundError if none."""
+    if os.sep in repo_name or (os.altsep and os.altsep in repo_name) or repo_name in ("", ".", ".."):
+        raise FileNotFoundError(f"Invalid repository name: {repo_name!r}")
+    return load_index(os.path.join(output_root, repo_name, CCG_FILENAME))
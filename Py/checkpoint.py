@@ -0,0 +1,187 @@
+# Py/checkpoint.py - Resumable pipeline runs
+# Each completed stage's output is stored as gzip-compressed JSON under outputs/<repo>/.checkpoint/;
+# a rerun of the same request resumes after the last completed stage
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+import zlib
+from typing import Optional
+
+from Py import parser_ccg
+
+ENABLED = os.environ.get("CG_CHECKPOINT", "1") not in ("0", "false", "no")
+DIRNAME = ".checkpoint"
+STATE_FILE = "state.json"
+STATE_VERSION = 1
+COMPRESS_LEVEL = 6
+PARSE_LOG = "parse"        # per-file parse results: parse.<segment>.jsonl.gz, one segment per run attempt
+PARSE_FLUSH_EVERY = 64     # results buffered before a sync flush (a crash loses at most this many)
+
+
+def run_key(repo_url: str, **config) -> str:
+    """Identity of a request: a checkpoint is only resumed by a run with the same URL and settings."""
+    blob = json.dumps({"url": repo_url, **config}, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def _write_gz(path: str, value) -> int:
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=COMPRESS_LEVEL) as f:
+        json.dump(value, f, separators=(",", ":"))
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def _read_jsonl_gz(path: str) -> list:
+    """Records of one parse-log segment; a segment cut short by a crash yields what was flushed."""
+    records = []
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.endswith("\n"):
+                    records.append(json.loads(line))
+    except (EOFError, zlib.error, gzip.BadGzipFile, ValueError):
+        pass
+    return records
+
+
+class Checkpoint:
+    """
+    Stage artifacts of one repository's run. state.json lists the completed stages for the run
+    key; opening the checkpoint with another key (new URL or settings) discards the old one.
+    """
+
+    def __init__(self, directory: str, key: str, url: str):
+        self.directory = directory
+        self.key = key
+        self.url = url
+        self.state = {"version": STATE_VERSION, "key": key, "url": url, "stages": {}}
+        try:
+            with open(os.path.join(directory, STATE_FILE), "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("version") == STATE_VERSION and state.get("key") == key:
+                self.state = state
+            else:
+                self.clear()
+        except (OSError, ValueError):
+            pass
+
+    @classmethod
+    def open(cls, output_root: str, repo_name: str, key: str, url: str) -> "Checkpoint":
+        return cls(os.path.join(output_root, repo_name, DIRNAME), key, url)
+
+    def completed(self) -> list:
+        return list(self.state["stages"])
+
+    def done(self, stage: str) -> bool:
+        return stage in self.state["stages"]
+
+    def load(self, stage: str):
+        with gzip.open(os.path.join(self.directory, self.state["stages"][stage]["file"]), "rt",
+                       encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, stage: str, value, seconds: Optional[float] = None) -> None:
+        """Store a stage's output, then mark it completed (so a half-written artifact is never resumed)."""
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{stage}.json.gz"
+        size = _write_gz(os.path.join(self.directory, name), value)
+        self.state["stages"][stage] = {"file": name, "bytes": size, "seconds": seconds}
+        self._write_state()
+
+    def _write_state(self) -> None:
+        path = os.path.join(self.directory, STATE_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def clear(self) -> None:
+        """Forget every stage (after a successful run, or when the request changed)."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.state = {"version": STATE_VERSION, "key": self.key, "url": self.url, "stages": {}}
+
+    def parse_cache(self, fallback: Optional[parser_ccg.ParseCache] = None) -> "CheckpointParseCache":
+        os.makedirs(self.directory, exist_ok=True)
+        return CheckpointParseCache(self.directory, fallback)
+
+
+class CheckpointParseCache(parser_ccg.ParseCache):
+    """
+    ParseCache backed by the checkpoint's parse log, so a run that dies mid-parse resumes with
+    every file it had already analyzed. Files are identified by path and size: the checkpoint
+    belongs to one commit of one clone, and budgets are part of the run key. Misses fall back
+    to a shared in-memory cache (the bridge's), whose hits are logged too.
+    """
+
+    def __init__(self, directory: str, fallback: Optional[parser_ccg.ParseCache] = None):
+        super().__init__(max_entries=float("inf"))
+        self.fallback = fallback
+        segments = sorted(name for name in os.listdir(directory)
+                          if name.startswith(PARSE_LOG + ".") and name.endswith(".jsonl.gz"))
+        for name in segments:
+            for path, size, language, parsed in _read_jsonl_gz(os.path.join(directory, name)):
+                self._entries[path] = (((size,), ()), (language, parsed, size))
+        self.resumed = len(self._entries)
+        self._log_path = os.path.join(directory, f"{PARSE_LOG}.{len(segments):04d}.jsonl.gz")
+        self._log = None
+        self._unflushed = 0
+        self._log_lock = threading.Lock()
+
+    @staticmethod
+    def stamp(path: str) -> Optional[tuple]:
+        try:
+            return (os.path.getsize(path),)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _budget_key(budgets: dict) -> tuple:
+        return ()
+
+    def _append(self, path: str, language: Optional[str], parsed: dict, size: int) -> None:
+        with self._log_lock:
+            if self._log is None:
+                self._log = gzip.open(self._log_path, "at", encoding="utf-8", compresslevel=COMPRESS_LEVEL)
+            self._log.write(json.dumps([path, size, language, parsed], separators=(",", ":")) + "\n")
+            self._unflushed += 1
+            if self._unflushed >= PARSE_FLUSH_EVERY:
+                self._log.flush()
+                self._unflushed = 0
+
+    def get(self, path: str, stamp: Optional[tuple], budgets: dict) -> Optional[tuple]:
+        hit = super().get(path, stamp, budgets)
+        if hit is None and self.fallback is not None:
+            hit = self.fallback.get(path, self.fallback.stamp(path), budgets)
+            if hit is not None:
+                self._entries[path] = ((stamp, ()), hit)
+                self._append(path, *hit)
+        return hit
+
+    def put(self, path: str, stamp: Optional[tuple], budgets: dict, language: Optional[str],
+            parsed: dict, size: int) -> None:
+        if stamp is None or parsed.get("skipped"):
+            return
+        super().put(path, stamp, budgets, language, parsed, size)
+        if self.fallback is not None:
+            self.fallback.put(path, self.fallback.stamp(path), budgets, language, parsed, size)
+        self._append(path, language, parsed, size)
+
+    def flush(self) -> None:
+        """Flush the parse log now (builds call this when their parse loop ends or is interrupted)."""
+        with self._log_lock:
+            if self._log is not None:
+                self._log.flush()
+                self._unflushed = 0
+
+    def close(self) -> None:
+        with self._log_lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def stats(self) -> dict:
+        return dict(super().stats(), resumed=self.resumed)
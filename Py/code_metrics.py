@@ -0,0 +1,191 @@
+# Py/code_metrics.py - Repository-wide code metrics over the CCG
+# The CCG's record lists are loaded once into columnar NumPy arrays (integer ids for modules,
+# functions and classes); every count, distribution and histogram is then a vectorized operation
+
+import time
+from itertools import repeat
+from operator import itemgetter
+from typing import Optional
+
+from Py.call_resolver import module_name
+from Py.hierarchy import Hierarchy
+
+MAX_LISTED = 10  # rows per "largest / highest / deepest" table
+# Histogram buckets by inclusive upper bound: 0, 1, 2, 3-4, 5-8, ... 129-256, then 257+
+BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256)
+MAX_DEPTH = 64   # inheritance chains are followed at most this deep (guards against cycles)
+
+
+def _bucket_labels() -> list:
+    labels = []
+    previous = -1
+    for bound in BUCKETS:
+        labels.append(str(bound) if bound - previous == 1 else f"{previous + 1}-{bound}")
+        previous = bound
+    return labels + [f"{BUCKETS[-1] + 1}+"]
+
+
+BUCKET_LABELS = _bucket_labels()
+
+
+def _distribution(np, values) -> dict:
+    """Count, total, mean, p50/p90/p99, max and a log-bucket histogram of an integer array."""
+    if not len(values):
+        return {"count": 0, "total": 0, "mean": 0.0, "p50": 0, "p90": 0, "p99": 0, "max": 0, "histogram": []}
+    p50, p90, p99 = np.percentile(values, (50, 90, 99), method="lower")
+    counts = np.bincount(np.searchsorted(BUCKETS, values, side="left"), minlength=len(BUCKET_LABELS))
+    last = int(np.flatnonzero(counts)[-1])
+    return {
+        "count": int(len(values)),
+        "total": int(values.sum()),
+        "mean": round(float(values.mean()), 2),
+        "p50": int(p50), "p90": int(p90), "p99": int(p99),
+        "max": int(values.max()),
+        "histogram": [{"bucket": BUCKET_LABELS[i], "count": int(counts[i])} for i in range(last + 1)],
+    }
+
+
+def _top(np, values, names: list, key: str, label: str) -> list:
+    """The MAX_LISTED largest non-zero values (ties in CCG order) as [{label: name, key: value}]."""
+    order = np.argsort(-values, kind="stable")[:MAX_LISTED]
+    return [{label: names[i], key: int(values[i])} for i in order.tolist() if values[i] > 0]
+
+
+def _ids(np, table: dict, records: list, fields: tuple, key) -> "np.ndarray":
+    """
+    table id of each record's key (-1 when absent). The common case - every record has `fields` -
+    runs entirely in C (itemgetter + dict.get through map); `key(record)` handles the rest.
+    """
+    try:
+        return np.fromiter(map(table.get, map(itemgetter(*fields), records), repeat(-1)), np.int64, len(records))
+    except KeyError:
+        return np.fromiter((table.get(key(r), -1) for r in records), np.int64, len(records))
+
+
+def load_columns(ccg: dict, np) -> dict:
+    """
+    Columnar view of the CCG: module, function and class ids per record (one pass over each
+    record list), with -1 for callers, call targets and base classes outside the analyzed code.
+    """
+    root = ccg.get("root")
+    known = ccg.get("modules") or {}
+    module_ids = {}
+    file_modules = {}
+
+    def module_of(path: str) -> int:
+        mid = file_modules.get(path)
+        if mid is None:
+            name = known.get(path) or (module_name(path, root) if root else path)
+            mid = file_modules[path] = module_ids.setdefault(name, len(module_ids))
+        return mid
+
+    for path in known:
+        module_of(path)
+
+    functions = ccg.get("functions", [])
+    function_module = np.fromiter((module_of(f["file"]) for f in functions), np.int64, len(functions))
+    module_names = list(module_ids)  # records may name files missing from ccg["modules"]
+    function_ids = {(f["file"], f.get("qualname", f["name"])): i for i, f in enumerate(functions)}
+    function_names = [f"{module_names[m]}.{f.get('qualname', f['name'])}"
+                      for m, f in zip(function_module.tolist(), functions)]
+    qualified = dict(zip(function_names, range(len(functions))))  # resolved call targets are dotted names
+
+    classes = ccg.get("classes", [])
+    class_module = np.fromiter((module_of(c["file"]) for c in classes), np.int64, len(classes))
+    module_names = list(module_ids)
+    class_names = [f"{module_names[m]}.{c.get('qualname', c['name'])}" for m, c in zip(class_module.tolist(), classes)]
+
+    calls = ccg.get("calls", [])
+    caller = _ids(np, function_ids, calls, ("file", "caller_qualname"),
+                  lambda c: (c["file"], c.get("caller_qualname", c["caller"])))
+    target = _ids(np, qualified, calls, ("target",), lambda c: c.get("target"))
+
+    # One (class, base) pair per base, resolved as in the class hierarchy (see Py/hierarchy.py)
+    bases = Hierarchy(ccg).bases
+    pairs = sum(len(b) for b in bases)
+    child = np.fromiter((i for i, b in enumerate(bases) for _ in b), np.int64, pairs)
+    parent = np.fromiter((j for b in bases for j, _ in b), np.int64, pairs)
+
+    return {"module_names": module_names, "function_names": function_names, "class_names": class_names,
+            "function_module": function_module, "class_module": class_module,
+            "caller": caller, "target": target, "child": child, "parent": parent}
+
+
+def inheritance_depth(np, child, parent, classes: int):
+    """
+    Depth of each class below its root (a base outside the analyzed code counts as one level),
+    longest path over multiple bases; relaxed in rounds, one level per round.
+    """
+    depth = np.zeros(classes, np.int64)
+    keep = child >= 0
+    child, parent = child[keep], parent[keep]
+    internal = parent >= 0
+    for _ in range(MAX_DEPTH):
+        updated = np.zeros(classes, np.int64)
+        np.maximum.at(updated, child, np.where(internal, depth[np.where(internal, parent, 0)] + 1, 1))
+        if np.array_equal(updated, depth):
+            break
+        depth = updated
+    return depth
+
+
+def analyze(ccg: Optional[dict]) -> Optional[dict]:
+    """
+    Code metrics of a CCG: module, function, class and call counts; call density; distributions
+    (mean, p50/p90/p99, max, histogram) of functions and classes per module, call sites per
+    function, call-graph fan-in / fan-out (distinct resolved callers / callees per function),
+    inheritance depth and direct subclasses per class; and the largest modules, most called and
+    most calling functions and deepest classes. None without a CCG or when NumPy is missing.
+    """
+    if not ccg:
+        return None
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+    start = time.perf_counter()
+    cols = load_columns(ccg, np)
+    modules, functions, classes = len(cols["module_names"]), len(cols["function_names"]), len(cols["class_names"])
+
+    functions_per_module = np.bincount(cols["function_module"], minlength=modules)
+    classes_per_module = np.bincount(cols["class_module"], minlength=modules)
+
+    caller, target = cols["caller"], cols["target"]
+    calls_per_function = np.bincount(caller[caller >= 0], minlength=functions)
+    resolved = (caller >= 0) & (target >= 0)
+    # Distinct caller -> callee edges: one integer key per pair, deduplicated by a sort
+    edges = np.sort(caller[resolved] * max(functions, 1) + target[resolved])
+    edges = edges[np.concatenate(([True], edges[1:] != edges[:-1]))] if len(edges) else edges
+    fan_out = np.bincount(edges // max(functions, 1), minlength=functions)
+    fan_in = np.bincount(edges % max(functions, 1), minlength=functions)
+
+    child, parent = cols["child"], cols["parent"]
+    depth = inheritance_depth(np, child, parent, classes)
+    subclasses = np.bincount(parent[(parent >= 0) & (child >= 0)], minlength=classes)
+
+    largest = np.argsort(-functions_per_module, kind="stable")[:MAX_LISTED]
+    return {
+        "modules": modules,
+        "functions": functions,
+        "classes": classes,
+        "call_sites": int(len(caller)),
+        "resolved_calls": int(np.count_nonzero(target >= 0)),
+        "call_edges": int(len(edges)),
+        "call_density": round(len(caller) / functions, 2) if functions else 0.0,
+        "distributions": {
+            "functions_per_module": _distribution(np, functions_per_module),
+            "classes_per_module": _distribution(np, classes_per_module),
+            "calls_per_function": _distribution(np, calls_per_function),
+            "fan_in": _distribution(np, fan_in),
+            "fan_out": _distribution(np, fan_out),
+            "inheritance_depth": _distribution(np, depth),
+            "subclasses": _distribution(np, subclasses),
+        },
+        "largest_modules": [{"module": cols["module_names"][i], "functions": int(functions_per_module[i]),
+                             "classes": int(classes_per_module[i])}
+                            for i in largest.tolist() if functions_per_module[i] or classes_per_module[i]],
+        "highest_fan_in": _top(np, fan_in, cols["function_names"], "fan_in", "function"),
+        "highest_fan_out": _top(np, fan_out, cols["function_names"], "fan_out", "function"),
+        "deepest_classes": _top(np, depth, cols["class_names"], "depth", "class"),
+        "seconds": round(time.perf_counter() - start, 4),
+    }
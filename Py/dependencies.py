@@ -0,0 +1,552 @@
+# Py/dependencies.py - Dependency manifest analysis
+# Parses declared dependencies (requirements*, pyproject, setup.cfg, setup.py, package.json, go.mod)
+# and classifies every import as stdlib, third-party or first-party via precomputed lookup tables
+
+import json
+import os
+import re
+import sys
+from typing import Optional
+
+from Py.call_resolver import module_name
+
+# Import names that differ from the distribution that provides them (normalized distribution -> imports)
+KNOWN_IMPORT_NAMES = {
+    "pyyaml": ["yaml"],
+    "pillow": ["PIL"],
+    "scikit-learn": ["sklearn"],
+    "scikit-image": ["skimage"],
+    "opencv-python": ["cv2"],
+    "opencv-python-headless": ["cv2"],
+    "opencv-contrib-python": ["cv2"],
+    "beautifulsoup4": ["bs4"],
+    "python-dateutil": ["dateutil"],
+    "python-dotenv": ["dotenv"],
+    "python-multipart": ["multipart", "python_multipart"],
+    "python-jose": ["jose"],
+    "pyjwt": ["jwt"],
+    "pymysql": ["pymysql"],
+    "mysqlclient": ["MySQLdb"],
+    "psycopg2-binary": ["psycopg2"],
+    "psycopg-binary": ["psycopg"],
+    "protobuf": ["google.protobuf", "google"],
+    "google-cloud-storage": ["google.cloud.storage", "google"],
+    "gitpython": ["git"],
+    "pycryptodome": ["Crypto"],
+    "pycryptodomex": ["Cryptodome"],
+    "pyserial": ["serial"],
+    "pyzmq": ["zmq"],
+    "attrs": ["attr", "attrs"],
+    "setuptools": ["setuptools", "pkg_resources"],
+    "msgpack-python": ["msgpack"],
+    "py-tree-sitter": ["tree_sitter"],
+    "tree-sitter": ["tree_sitter"],
+    "typing-extensions": ["typing_extensions"],
+    "ruamel.yaml": ["ruamel"],
+    "discord.py": ["discord"],
+    "faiss-cpu": ["faiss"],
+    "faiss-gpu": ["faiss"],
+    "tensorflow-gpu": ["tensorflow"],
+    "torch": ["torch"],
+    "pytorch-lightning": ["pytorch_lightning"],
+    "jaclang": ["jaclang", "jac"],
+}
+
+NODE_BUILTINS = frozenset([
+    "assert", "buffer", "child_process", "cluster", "console", "constants", "crypto", "dgram", "dns",
+    "events", "fs", "http", "http2", "https", "module", "net", "os", "path", "perf_hooks", "process",
+    "querystring", "readline", "repl", "stream", "string_decoder", "timers", "tls", "tty", "url",
+    "util", "v8", "vm", "worker_threads", "zlib",
+])
+
+# sys.stdlib_module_names exists on 3.10+; older interpreters get the common core
+PY_STDLIB = frozenset(getattr(sys, "stdlib_module_names", ())) or frozenset([
+    "__future__", "abc", "argparse", "array", "asyncio", "base64", "bisect", "collections", "contextlib",
+    "copy", "csv", "dataclasses", "datetime", "decimal", "enum", "functools", "gc", "glob", "hashlib",
+    "heapq", "html", "http", "importlib", "inspect", "io", "itertools", "json", "logging", "math", "mmap",
+    "multiprocessing", "operator", "os", "pathlib", "pickle", "platform", "queue", "random", "re",
+    "shutil", "signal", "socket", "sqlite3", "ssl", "string", "struct", "subprocess", "sys", "tempfile",
+    "textwrap", "threading", "time", "traceback", "types", "typing", "unittest", "urllib", "uuid",
+    "warnings", "weakref", "xml", "zipfile", "zlib",
+])
+
+_LANGUAGE_BY_EXT = {".py": "python", ".jac": "python", ".go": "go"}
+_JS_EXTENSIONS = (".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".mts", ".cts")
+_REQUIREMENT = re.compile(r"^\s*(?P<name>[A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[(?P<extras>[^\]]*)\])?\s*"
+                          r"(?P<spec>[^;]*?)\s*(?:;\s*(?P<marker>.*))?$")
+_EGG = re.compile(r"#egg=([A-Za-z0-9._-]+)")
+
+
+def normalize(name: str) -> str:
+    """PEP 503 distribution name normalization."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _requirement(text: str, source: str, group: str) -> Optional[dict]:
+    """One PEP 508 requirement string (or pip URL line) -> declared dependency record."""
+    text = text.strip()
+    if not text:
+        return None
+    url = None
+    if "://" in text or text.startswith(("git+", "hg+", "svn+", "bzr+")):
+        egg = _EGG.search(text)
+        if " @ " in text and not text.split(" @ ", 1)[0].count("/"):
+            text, url = (part.strip() for part in text.split(" @ ", 1))
+        elif egg:
+            url, text = text, egg.group(1)
+        else:
+            url = text
+            text = os.path.basename(text.split("#")[0].rstrip("/"))
+            text = text[:-4] if text.endswith(".git") else text
+    elif " @ " in text:
+        text, url = (part.strip() for part in text.split(" @ ", 1))
+    match = _REQUIREMENT.match(text)
+    if not match:
+        return None
+    extras = [e.strip() for e in (match.group("extras") or "").split(",") if e.strip()]
+    record = {"name": match.group("name"), "spec": match.group("spec").strip("() ") or None,
+              "extras": extras, "marker": match.group("marker"), "source": source, "group": group}
+    if url:
+        record["url"] = url
+    return record
+
+
+# ─── Manifest parsers (each returns declared dependency records) ───
+
+def _requirements_group(rel: str) -> str:
+    stem = os.path.splitext(os.path.basename(rel))[0].lower()
+    if os.path.dirname(rel).lower() == "requirements" and stem not in ("base", "main", "prod", "requirements"):
+        return stem
+    stem = stem.replace("requirements", "").strip("-_.")
+    return stem if stem and stem not in ("base", "main", "prod") else "main"
+
+
+def parse_requirements(path: str, repo_root: str, seen: Optional[set] = None) -> list:
+    """
+    requirements.txt format: comments, line continuations, -e/URL lines and -r includes inside the
+    repository. Each file is read once per `seen` set; its group comes from its own name (dev, test, ...).
+    """
+    seen = set() if seen is None else seen
+    real = os.path.realpath(path)
+    if real in seen:
+        return []
+    seen.add(real)
+    rel = os.path.relpath(path, repo_root)
+    group = _requirements_group(rel)
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            content = f.read().replace("\\\n", " ")
+    except OSError:
+        return []
+    records = []
+    for line in content.splitlines():
+        line = re.split(r"(?:^|\s)#(?!egg=)", line, 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith(("-r ", "--requirement")):
+            include = line.split(None, 1)[1].strip() if " " in line else line.split("=", 1)[-1]
+            target = os.path.realpath(os.path.join(os.path.dirname(path), include))
+            if target.startswith(os.path.realpath(repo_root) + os.sep):
+                records.extend(parse_requirements(target, repo_root, seen))
+            continue
+        if line.startswith(("-e ", "--editable")):
+            line = line.split(None, 1)[1] if " " in line else ""
+            if not _EGG.search(line):
+                continue  # local editable install of the project itself
+        elif line.startswith("-"):
+            continue  # pip options (-c constraints, --index-url, ...)
+        record = _requirement(line, rel, group)
+        if record:
+            records.append(record)
+    return records
+
+
+def _load_toml(path: str) -> Optional[dict]:
+    try:
+        import tomllib  # Python 3.11+
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            print(f"[Dependencies] ⚠ No TOML parser available (Python < 3.11 without tomli); skipping {path}")
+            return None
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[Dependencies] ⚠ Could not parse {path}: {e}")
+        return None
+
+
+def _poetry_requirement(name: str, value, source: str, group: str) -> Optional[dict]:
+    if name.lower() == "python":
+        return None
+    spec = value if isinstance(value, str) else (value.get("version") if isinstance(value, dict) else None)
+    record = {"name": name, "spec": None if spec in (None, "*") else spec, "extras": [], "marker": None,
+              "source": source, "group": group}
+    if isinstance(value, dict):
+        record["extras"] = list(value.get("extras", []))
+        for key in ("git", "url", "path"):
+            if key in value:
+                record["url"] = value[key]
+    return record
+
+
+def parse_pyproject(path: str, repo_root: str) -> list:
+    """PEP 621 [project], PEP 735 [dependency-groups], Poetry tables and [build-system].requires."""
+    data = _load_toml(path)
+    if not data:
+        return []
+    rel = os.path.relpath(path, repo_root)
+    records = []
+
+    def add(items, group):
+        for item in items or []:
+            if isinstance(item, str):
+                record = _requirement(item, rel, group)
+                if record:
+                    records.append(record)
+
+    project = data.get("project", {})
+    add(project.get("dependencies"), "main")
+    for extra, items in (project.get("optional-dependencies") or {}).items():
+        add(items, extra)
+    for group, items in (data.get("dependency-groups") or {}).items():
+        add(items, group)
+    add(data.get("build-system", {}).get("requires"), "build")
+
+    poetry = data.get("tool", {}).get("poetry", {})
+    tables = [("main", poetry.get("dependencies")), ("dev", poetry.get("dev-dependencies"))]
+    tables += [(group, body.get("dependencies")) for group, body in (poetry.get("group") or {}).items()]
+    for group, table in tables:
+        for name, value in (table or {}).items():
+            record = _poetry_requirement(name, value, rel, group)
+            if record:
+                records.append(record)
+    return records
+
+
+def parse_setup_cfg(path: str, repo_root: str) -> list:
+    """[options] install_requires / setup_requires / tests_require and [options.extras_require]."""
+    import configparser
+
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        parser.read(path, encoding="utf-8")
+    except (OSError, configparser.Error) as e:
+        print(f"[Dependencies] ⚠ Could not parse {path}: {e}")
+        return []
+    rel = os.path.relpath(path, repo_root)
+    records = []
+
+    def add(value, group):
+        for line in (value or "").splitlines():
+            record = _requirement(line.split("#", 1)[0], rel, group)
+            if record:
+                records.append(record)
+
+    if parser.has_section("options"):
+        for key, group in (("install_requires", "main"), ("setup_requires", "build"), ("tests_require", "test")):
+            add(parser.get("options", key, fallback=""), group)
+    if parser.has_section("options.extras_require"):
+        for extra, value in parser.items("options.extras_require"):
+            add(value, extra)
+    return records
+
+
+def parse_setup_py(path: str, repo_root: str) -> list:
+    """
+    Static read of setup(...) keywords: install_requires, extras_require, tests_require and
+    setup_requires given as literals or as module-level names bound to literals. Never executed.
+    """
+    import ast
+
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            tree = ast.parse(f.read(), path)
+    except (OSError, SyntaxError, ValueError) as e:
+        print(f"[Dependencies] ⚠ Could not parse {path}: {e}")
+        return []
+    rel = os.path.relpath(path, repo_root)
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            constants[node.targets[0].id] = node.value
+
+    def literal(node):
+        if isinstance(node, ast.Name) and node.id in constants:
+            node = constants[node.id]
+        try:
+            return ast.literal_eval(node)
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+            return None
+
+    records = []
+
+    def add(value, group):
+        if isinstance(value, str):
+            value = value.splitlines()
+        for item in value if isinstance(value, (list, tuple)) else []:
+            record = _requirement(item, rel, group) if isinstance(item, str) else None
+            if record:
+                records.append(record)
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        func = node.func
+        name = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else ""
+        if name != "setup":
+            continue
+        for keyword in node.keywords:
+            if keyword.arg in ("install_requires", "setup_requires", "tests_require"):
+                add(literal(keyword.value), {"install_requires": "main", "setup_requires": "build",
+                                             "tests_require": "test"}[keyword.arg])
+            elif keyword.arg == "extras_require":
+                extras = literal(keyword.value)
+                for extra, value in (extras.items() if isinstance(extras, dict) else []):
+                    add(value, str(extra))
+    return records
+
+
+def parse_package_json(path: str, repo_root: str) -> list:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[Dependencies] ⚠ Could not parse {path}: {e}")
+        return []
+    rel = os.path.relpath(path, repo_root)
+    records = []
+    for key, group in (("dependencies", "main"), ("devDependencies", "dev"), ("peerDependencies", "peer"),
+                       ("optionalDependencies", "optional")):
+        for name, spec in (data.get(key) or {}).items():
+            records.append({"name": name, "spec": spec, "extras": [], "marker": None, "source": rel,
+                            "group": group, "ecosystem": "npm"})
+    return records
+
+
+_GO_REQUIRE = re.compile(r"^\s*(?:require\s+)?(?P<path>[\w.\-~/]+\.[\w.\-~/]+)\s+(?P<version>v[\w.\-+]+)(?P<rest>.*)$")
+
+
+def parse_go_mod(path: str, repo_root: str) -> tuple:
+    """(module path, requirement records) from go.mod."""
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None, []
+    rel = os.path.relpath(path, repo_root)
+    module = None
+    records = []
+    in_require = False
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("module "):
+            module = stripped.split()[1]
+        elif stripped.startswith("require ("):
+            in_require = True
+        elif in_require and stripped == ")":
+            in_require = False
+        elif in_require or stripped.startswith("require "):
+            match = _GO_REQUIRE.match(stripped)
+            if match:
+                group = "indirect" if "// indirect" in match.group("rest") else "main"
+                records.append({"name": match.group("path"), "spec": match.group("version"), "extras": [],
+                                "marker": None, "source": rel, "group": group, "ecosystem": "go"})
+    return module, records
+
+
+# ─── Manifest discovery ───
+
+def find_manifests(repo_root: str) -> list:
+    """Manifests at the repository root (plus a requirements/ directory), as (kind, path) pairs."""
+    found = []
+    try:
+        names = sorted(os.listdir(repo_root))
+    except OSError:
+        return found
+    for name in names:
+        path = os.path.join(repo_root, name)
+        lower = name.lower()
+        if lower.endswith(".txt") and "requirements" in lower and os.path.isfile(path):
+            found.append(("requirements", path))
+        elif lower == "requirements" and os.path.isdir(path):
+            found.extend(("requirements", os.path.join(path, f)) for f in sorted(os.listdir(path)) if f.endswith(".txt"))
+    for kind, name in (("pyproject", "pyproject.toml"), ("setup.cfg", "setup.cfg"), ("setup.py", "setup.py"),
+                       ("package.json", "package.json"), ("go.mod", "go.mod")):
+        path = os.path.join(repo_root, name)
+        if os.path.isfile(path):
+            found.append((kind, path))
+    return found
+
+
+# ─── Import classification ───
+
+class DependencyTables:
+    """
+    Lookup tables built once per repository; classify() is then a few dict/set probes per import:
+      first_party:     top-level Python modules/packages defined in the repository
+      python_imports:  import name -> declared distribution (normalized dist names + KNOWN_IMPORT_NAMES)
+      npm_packages:    declared npm package names
+      go_module / go_requires: the module path and required module paths from go.mod
+    """
+
+    def __init__(self, declared: list, source_files: list, repo_root: str, go_module: Optional[str] = None):
+        self.first_party = set()
+        for path in source_files:
+            if path.endswith((".py", ".jac")):
+                self.first_party.add(module_name(path, repo_root).split(".")[0])
+        self.python_imports = {}
+        self.npm_packages = {}
+        self.go_requires = {}
+        for record in declared:
+            ecosystem = record.get("ecosystem", "pypi")
+            if ecosystem == "npm":
+                self.npm_packages.setdefault(record["name"], record["name"])
+            elif ecosystem == "go":
+                self.go_requires.setdefault(record["name"], record["name"])
+            else:
+                dist = normalize(record["name"])
+                candidates = [dist.replace("-", "_")] + KNOWN_IMPORT_NAMES.get(dist, [])
+                if dist.startswith("python-"):
+                    candidates.append(dist[len("python-"):].replace("-", "_"))
+                for name in candidates:
+                    self.python_imports.setdefault(name.lower(), record["name"])
+        self.go_module = go_module
+
+    def classify(self, module: str, language: str) -> tuple:
+        """(category, top-level import, declared distribution or None) for one import."""
+        if language == "javascript":
+            if module.startswith((".", "/", "@/", "~/")):
+                return "first_party", module, None
+            if module.startswith("node:") or module.split("/")[0] in NODE_BUILTINS:
+                return "stdlib", module.split("/")[0], None
+            parts = module.split("/")
+            package = "/".join(parts[:2]) if module.startswith("@") else parts[0]
+            return "third_party", package, self.npm_packages.get(package)
+        if language == "go":
+            if self.go_module and (module == self.go_module or module.startswith(self.go_module + "/")):
+                return "first_party", module, None
+            if "." not in module.split("/")[0]:
+                return "stdlib", module, None
+            for depth in range(module.count("/") + 1, 0, -1):
+                prefix = "/".join(module.split("/")[:depth])
+                if prefix in self.go_requires:
+                    return "third_party", prefix, prefix
+            return "third_party", "/".join(module.split("/")[:3]), None
+        if module.startswith("."):
+            return "first_party", module, None
+        top = module.split(".")[0]
+        if top in self.first_party:
+            # A vendored copy of a declared distribution still counts as using it
+            return "first_party", top, self.python_imports.get(top.lower())
+        if top in PY_STDLIB:
+            return "stdlib", top, None
+        dist = self.python_imports.get(module.lower()) or self.python_imports.get(top.lower())
+        return "third_party", top, dist
+
+
+def _language(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    return "javascript" if ext in _JS_EXTENSIONS else _LANGUAGE_BY_EXT.get(ext, "python")
+
+
+def analyze(repo_root: str, ccg: Optional[dict] = None, source_files: Optional[list] = None) -> dict:
+    """
+    Complete, deduplicated dependency report for a repository:
+      manifests:  [{"path", "kind", "dependencies"}]
+      declared:   one entry per distribution: {"name", "spec", "extras", "groups", "sources", "imported", ...}
+      imports:    {"stdlib" | "third_party" | "first_party": [{"module", "files", "distribution"?}]}
+      undeclared: third-party imports no manifest declares
+      unused:     runtime ("main") distributions never imported by analyzed code
+      install:    install commands for the manifests found
+    """
+    declared_records = []
+    manifests = []
+    go_module = None
+    seen = set()  # requirement files already read (directly or through -r)
+    for kind, path in find_manifests(repo_root):
+        if kind == "requirements":
+            if os.path.realpath(path) in seen:
+                continue
+            records = parse_requirements(path, repo_root, seen)
+        elif kind == "pyproject":
+            records = parse_pyproject(path, repo_root)
+        elif kind == "setup.cfg":
+            records = parse_setup_cfg(path, repo_root)
+        elif kind == "setup.py":
+            records = parse_setup_py(path, repo_root)
+        elif kind == "package.json":
+            records = parse_package_json(path, repo_root)
+        else:
+            go_module, records = parse_go_mod(path, repo_root)
+        manifests.append({"path": os.path.relpath(path, repo_root), "kind": kind, "dependencies": len(records)})
+        declared_records.extend(records)
+
+    # Deduplicate by (ecosystem, normalized name); groups and sources accumulate
+    declared = {}
+    for record in declared_records:
+        key = (record.get("ecosystem", "pypi"), normalize(record["name"]))
+        entry = declared.get(key)
+        if entry is None:
+            entry = declared[key] = {"name": record["name"], "ecosystem": key[0], "spec": record["spec"],
+                                     "extras": [], "groups": [], "sources": [], "imported": False}
+        elif not entry["spec"] and record["spec"]:
+            entry["spec"] = record["spec"]
+        for field, value in (("extras", record["extras"]), ("groups", [record["group"]]), ("sources", [record["source"]])):
+            entry[field].extend(v for v in value if v not in entry[field])
+        if record.get("marker") and "marker" not in entry:
+            entry["marker"] = record["marker"]
+        if record.get("url") and "url" not in entry:
+            entry["url"] = record["url"]
+
+    if source_files is None:
+        source_files = sorted({r["file"] for key in ("functions", "classes", "imports") for r in (ccg or {}).get(key, [])})
+    tables = DependencyTables(declared_records, source_files, repo_root, go_module)
+
+    imported = {"stdlib": {}, "third_party": {}, "first_party": {}}
+    used_dists = set()
+    for record in (ccg or {}).get("imports", []):
+        module = record.get("path", record["module"])
+        category, top, dist = tables.classify(module, _language(record["file"]))
+        if category == "first_party" and top.startswith("."):
+            continue  # relative imports are first-party by construction; not worth listing
+        entry = imported[category].setdefault(top, {"module": top, "files": set()})
+        entry["files"].add(record["file"])
+        if dist:
+            entry["distribution"] = dist
+            used_dists.add(normalize(dist))
+
+    for (ecosystem, key), entry in declared.items():
+        entry["imported"] = key in used_dists
+
+    report_imports = {
+        category: [dict(entry, files=len(entry["files"])) for _, entry in sorted(entries.items())]
+        for category, entries in imported.items()
+    }
+    return {
+        "manifests": manifests,
+        "declared": sorted(declared.values(), key=lambda e: (e["ecosystem"], normalize(e["name"]))),
+        "imports": report_imports,
+        "undeclared": [e["module"] for e in report_imports["third_party"] if not e.get("distribution")],
+        "unused": sorted(e["name"] for e in declared.values()
+                         if "main" in e["groups"] and not e["imported"] and e["ecosystem"] == "pypi"),
+        "install": install_commands(manifests),
+    }
+
+
+def install_commands(manifests: list) -> list:
+    """Install commands for the manifests found (project install first, then requirement files)."""
+    kinds = {m["kind"] for m in manifests}
+    commands = []
+    if kinds & {"pyproject", "setup.py", "setup.cfg"}:
+        commands.append("pip install .")
+    for manifest in manifests:
+        if manifest["kind"] == "requirements" and _requirements_group(manifest["path"]) == "main":
+            commands.append(f"pip install -r {manifest['path']}")
+    if "package.json" in kinds:
+        commands.append("npm install")
+    if "go.mod" in kinds:
+        commands.append("go mod download")
+    return commands
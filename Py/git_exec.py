@@ -0,0 +1,238 @@
+# Py/git_exec.py - Bounded, pooled execution of git subprocesses
+# At most CG_GIT_MAX_PROCS git processes at once; timeouts and cancellation kill the whole process
+# tree, failures carry captured stderr, transient network errors are retried with backoff
+
+import os
+import random
+import signal
+import subprocess
+import threading
+import time
+from typing import Callable, Optional
+
+from Py import tracing
+
+MAX_PROCS = int(os.environ.get("CG_GIT_MAX_PROCS", "4"))
+QUEUE_TIMEOUT = float(os.environ.get("CG_GIT_QUEUE_TIMEOUT", "300"))
+DEFAULT_TIMEOUT = float(os.environ.get("CG_GIT_TIMEOUT", "600"))
+RETRIES = int(os.environ.get("CG_GIT_RETRIES", "2"))
+BACKOFF = float(os.environ.get("CG_GIT_BACKOFF", "1.0"))  # seconds before the first retry; doubles after
+MAX_BACKOFF = 30.0
+KILL_GRACE = 2.0    # seconds between SIGTERM and SIGKILL
+POLL_INTERVAL = 0.2  # how often a running command checks for cancellation
+STDERR_TAIL = 20    # stderr lines kept in error messages
+
+# stderr fragments of failures worth retrying (network trouble, overloaded remotes)
+TRANSIENT_ERRORS = (
+    "could not resolve host", "connection timed out", "connection reset", "connection refused",
+    "operation timed out", "early eof", "rpc failed", "the remote end hung up", "unexpected disconnect",
+    "gnutls", "ssl_read", "tls connection", "http/2 stream", "502", "503", "504", "temporarily unavailable",
+)
+
+
+class GitError(Exception):
+    """A git command failed; carries the command, exit status, captured stderr and attempts made."""
+
+    def __init__(self, message: str, args: list, returncode: Optional[int] = None, stderr: str = "",
+                 attempts: int = 1):
+        tail = "\n".join(stderr.strip().splitlines()[-STDERR_TAIL:])
+        super().__init__(f"{message}: git {' '.join(args)}" + (f"\n{tail}" if tail else ""))
+        self.git_args = args
+        self.returncode = returncode
+        self.stderr = stderr
+        self.attempts = attempts
+
+
+class GitTimeout(GitError):
+    """The command ran longer than its timeout (its process tree was killed)."""
+
+
+class GitCancelled(GitError):
+    """The caller cancelled the command (its process tree was killed)."""
+
+
+class GitBusy(GitError):
+    """No execution slot became free within the queue timeout."""
+
+
+def _kill_tree(proc: subprocess.Popen) -> None:
+    """SIGTERM the command's process group (git and its helpers), SIGKILL whatever survives."""
+    for sig, wait in ((signal.SIGTERM, KILL_GRACE), (signal.SIGKILL, None)):
+        try:
+            os.killpg(proc.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            return
+        try:
+            proc.wait(timeout=wait)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+
+
+def is_transient(stderr: str) -> bool:
+    lower = stderr.lower()
+    return any(fragment in lower for fragment in TRANSIENT_ERRORS)
+
+
+class GitPool:
+    """
+    Runs git commands with at most `max_procs` child processes alive at once. Callers beyond that
+    wait for a slot (up to `queue_timeout`); a slot is held only while a process runs, not while
+    a retry backs off. Per-operation stats: calls, failures, timeouts, retries, queue wait and
+    execution time.
+    """
+
+    def __init__(self, max_procs: int = MAX_PROCS, queue_timeout: float = QUEUE_TIMEOUT):
+        self.max_procs = max(1, max_procs)
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.max_procs)
+        self._lock = threading.Lock()
+        self._running = 0
+        self._waiting = 0
+        self._ops = {}
+
+    def _record(self, op: str, **values) -> None:
+        with self._lock:
+            stats = self._ops.setdefault(op, {"calls": 0, "failures": 0, "timeouts": 0, "cancelled": 0,
+                                              "retries": 0, "queue_wait_s": 0.0, "max_queue_wait_s": 0.0,
+                                              "exec_s": 0.0, "max_exec_s": 0.0})
+            for key, value in values.items():
+                if key.startswith("max_"):
+                    stats[key] = max(stats[key], value)
+                else:
+                    stats[key] += value
+
+    def stats(self) -> dict:
+        with self._lock:
+            ops = {}
+            for op, stats in self._ops.items():
+                runs = stats["calls"] + stats["retries"]
+                ops[op] = dict(stats, queue_wait_s=round(stats["queue_wait_s"], 4),
+                               max_queue_wait_s=round(stats["max_queue_wait_s"], 4),
+                               exec_s=round(stats["exec_s"], 4), max_exec_s=round(stats["max_exec_s"], 4),
+                               mean_exec_s=round(stats["exec_s"] / runs, 4) if runs else 0.0)
+            return {"max_procs": self.max_procs, "running": self._running, "waiting": self._waiting,
+                    "operations": ops}
+
+    def _execute(self, args: list, cwd: Optional[str], timeout: float, cancel: Optional[threading.Event],
+                 op: str, input: Optional[str] = None) -> tuple:
+        """
+        One attempt inside a slot: (returncode, stdout, stderr), or raises GitTimeout/GitCancelled/GitBusy,
+        or GitError if git cannot be started at all (not on PATH, `cwd` missing).
+        """
+        queued = time.monotonic()
+        with self._lock:
+            self._waiting += 1
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        waited = time.monotonic() - queued
+        with self._lock:
+            self._waiting -= 1
+        self._record(op, queue_wait_s=waited, max_queue_wait_s=waited)
+        if not acquired:
+            raise GitBusy(f"No git slot free after {waited:.0f}s ({self.max_procs} running)", args)
+        with self._lock:
+            self._running += 1
+        started = time.monotonic()
+        try:
+            env = dict(os.environ, GIT_TERMINAL_PROMPT="0")  # never block on a credential prompt
+            stdin = subprocess.DEVNULL if input is None else subprocess.PIPE
+            data = None if input is None else input.encode("utf-8")
+            try:
+                proc = subprocess.Popen(["git"] + args, cwd=cwd, env=env, stdin=stdin,
+                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                        start_new_session=True)  # own process group, so the tree can be killed
+            except OSError as e:  # git not on PATH, or cwd gone
+                raise GitError(str(e), args) from e
+            deadline = started + timeout
+            while True:
+                try:
+                    wait = POLL_INTERVAL if cancel is not None else deadline - time.monotonic()
+                    stdout, stderr = proc.communicate(data, timeout=max(0.0, min(wait, deadline - time.monotonic())))
+                    break
+                except subprocess.TimeoutExpired:
+                    data = None  # already handed to communicate(), which keeps writing it on the next call
+                    cancelled = cancel is not None and cancel.is_set()
+                    if cancelled or time.monotonic() >= deadline:
+                        _kill_tree(proc)
+                        stdout, stderr = proc.communicate()
+                        stderr = stderr.decode("utf-8", "replace")
+                        if cancelled:
+                            raise GitCancelled("Cancelled", args, proc.returncode, stderr)
+                        raise GitTimeout(f"Timed out after {timeout:.0f}s", args, proc.returncode, stderr)
+            return proc.returncode, stdout.decode("utf-8", "replace"), stderr.decode("utf-8", "replace")
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._running -= 1
+            self._slots.release()
+            self._record(op, exec_s=elapsed, max_exec_s=elapsed)
+            tracing.add_span(f"git {op}", elapsed, command=args[0], queue_wait_s=round(waited, 4))
+
+    def run(self, args: list, cwd: Optional[str] = None, timeout: Optional[float] = None,
+            retries: Optional[int] = None, op: Optional[str] = None, cancel: Optional[threading.Event] = None,
+            cleanup: Optional[Callable] = None, input: Optional[str] = None) -> str:
+        """
+        Run `git <args>` (with `input` on stdin, if given) and return its stdout. Transient failures (network errors, timeouts) are
+        retried up to `retries` times with exponential backoff and jitter; `cleanup` runs before
+        each retry (e.g. to remove a partial clone). Setting `cancel` kills the command.
+        Raises GitError (GitTimeout, GitCancelled, GitBusy) with the captured stderr.
+        """
+        op = op or args[0]
+        timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+        retries = RETRIES if retries is None else retries
+        self._record(op, calls=1)
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                returncode, stdout, stderr = self._execute(args, cwd, timeout, cancel, op, input)
+                if returncode == 0:
+                    return stdout
+                error = GitError(f"Exited with status {returncode}", args, returncode, stderr, attempt)
+                retryable = is_transient(stderr)
+            except GitTimeout as e:
+                self._record(op, timeouts=1)
+                error, retryable = e, True
+            except GitCancelled as e:
+                self._record(op, cancelled=1, failures=1)
+                e.attempts = attempt
+                raise
+            except GitBusy as e:
+                self._record(op, failures=1)
+                raise
+            except GitError as e:
+                self._record(op, failures=1)
+                e.attempts = attempt
+                raise
+            error.attempts = attempt
+            if not retryable or attempt > retries or (cancel is not None and cancel.is_set()):
+                self._record(op, failures=1)
+                raise error
+            delay = min(MAX_BACKOFF, BACKOFF * 2 ** (attempt - 1)) * (0.5 + random.random() / 2)
+            print(f"[Git] ⚠ {op} failed (attempt {attempt}/{retries + 1}), retrying in {delay:.1f}s: "
+                  f"{str(error).splitlines()[0]}")
+            self._record(op, retries=1)
+            if cleanup is not None:
+                cleanup()
+            if cancel is not None and cancel.wait(delay):
+                raise GitCancelled("Cancelled", args, attempts=attempt)
+            elif cancel is None:
+                time.sleep(delay)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> GitPool:
+    """Process-wide pool shared by every clone (API requests, bridge, CLI)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = GitPool()
+        return _pool
+
+
+def run_git(args: list, **kwargs) -> str:
+    """get_pool().run(args, **kwargs)."""
+    return get_pool().run(args, **kwargs)
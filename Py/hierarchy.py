@@ -0,0 +1,317 @@
+# Py/hierarchy.py - Class hierarchy engine: every base of every class, resolved across files
+# Ancestor and descendant sets and MROs are memoized over the strongly connected components of
+# the base graph (cycles only come from misresolved names, but must not hang a traversal)
+
+import time
+from typing import Optional
+
+from Py.call_resolver import module_name
+from Py.import_graph import reach_counts, strongly_connected_components
+
+MAX_TREES = 12        # class trees in the docs, largest first
+MAX_TREE_NODES = 100  # classes shown per tree; the rest are counted on the node where it stops
+MAX_LISTED = 10       # external bases listed in the report
+IMPLICIT_BASES = frozenset(["object", "Object"])  # every class's root anyway: not recorded as a base
+
+
+def _merge(sequences: list) -> Optional[list]:
+    """C3 merge; None when the bases admit no consistent order."""
+    sequences = [list(seq) for seq in sequences if seq]
+    result = []
+    while sequences:
+        for seq in sequences:
+            head = seq[0]
+            if not any(head in other[1:] for other in sequences):
+                break
+        else:
+            return None
+        result.append(head)
+        sequences = [rest for rest in (seq[1:] if seq[0] == head else seq for seq in sequences) if rest]
+    return result
+
+
+class Hierarchy:
+    """
+    Inheritance graph of a CCG's classes. A class id indexes `names` (qualified module.Class) and
+    `files`; `parents[i]` holds the ids of i's bases defined in the repository and `external[i]`
+    its other bases (resolved dotted path, else as written), both in declaration order, and
+    `children[i]` its direct subclasses. `bases[i]` keeps every base in order as (id or -1,
+    name); `object` is left out.
+
+    A base resolves through its class record's "base_targets" (see call_resolver.resolve_calls);
+    unresolved ones fall back to a class of that name in the same file, then to the only class of
+    that name in the repository.
+    """
+
+    def __init__(self, ccg: dict):
+        root = ccg.get("root")
+        modules = ccg.get("modules") or {}
+        classes = ccg.get("classes", [])
+        self.names = []
+        self.files = []
+        self.index = {}
+        in_file = {}
+        by_name = {}
+        for i, cls in enumerate(classes):
+            module = modules.get(cls["file"]) or (module_name(cls["file"], root) if root else cls["file"])
+            name = f"{module}.{cls.get('qualname', cls['name'])}"
+            self.names.append(name)
+            self.files.append(cls["file"])
+            self.index.setdefault(name, i)
+            in_file.setdefault((cls["file"], cls["name"]), i)
+            by_name[cls["name"]] = i if cls["name"] not in by_name else -1  # -1: ambiguous
+
+        self.bases = []
+        self.parents = []
+        self.external = []
+        self.children = [[] for _ in classes]
+        for i, cls in enumerate(classes):
+            written = cls.get("bases") or ([cls["parent"]] if cls.get("parent") else [])
+            targets = cls.get("base_targets") or [None] * len(written)
+            bases, parents, external = [], [], []
+            for base, target in zip(written, targets):
+                if base in IMPLICIT_BASES:
+                    continue
+                if target is not None:
+                    j = self.index.get(target, -1)
+                    base = base if j >= 0 or target == base else target  # external: the resolved dotted path
+                else:
+                    short = base.rsplit(".", 1)[-1]
+                    j = in_file.get((cls["file"], short), by_name.get(short, -1))
+                if j == i:
+                    j = -1  # `class Foo(Foo)` extends an imported Foo the tables could not see
+                bases.append((j, base))
+                if j >= 0 and j not in parents:
+                    parents.append(j)
+                    self.children[j].append(i)
+                elif j < 0:
+                    external.append(base)
+            self.bases.append(bases)
+            self.parents.append(parents)
+            self.external.append(external)
+
+        self._components = None
+        self._ancestors = {}
+        self._descendants = {}
+        self._mro = {}
+        self._counts = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def lookup(self, name: str) -> int:
+        """Id of a class by qualified name, or by class name when only one class has it; KeyError otherwise."""
+        i = self.index.get(name)
+        if i is not None:
+            return i
+        matches = [j for j, qualified in enumerate(self.names)
+                   if qualified == name or qualified.endswith("." + name)]
+        if len(matches) != 1:
+            raise KeyError(f"{'Ambiguous' if matches else 'Unknown'} class '{name}'")
+        return matches[0]
+
+    # ─── Transitive closures ───
+
+    def _condense(self) -> tuple:
+        """(component of each class, members, parent components, child components), built once."""
+        if self._components is None:
+            members = strongly_connected_components(self.parents)
+            comp_of = [0] * len(self.names)
+            for c, component in enumerate(members):
+                for i in component:
+                    comp_of[i] = c
+            up = [[] for _ in members]
+            down = [[] for _ in members]
+            for i, parents in enumerate(self.parents):
+                for j in parents:
+                    a, b = comp_of[i], comp_of[j]
+                    if a != b:
+                        up[a].append(b)
+                        down[b].append(a)
+            up = [list(dict.fromkeys(succ)) for succ in up]
+            down = [list(dict.fromkeys(succ)) for succ in down]
+            self._components = (comp_of, members, up, down)
+        return self._components
+
+    @staticmethod
+    def _reach(start: int, members: list, succ: list, memo: dict) -> frozenset:
+        """
+        Classes reachable from component `start` along `succ` (a cycle's members reach each
+        other). Iterative post-order: every component's set is built once from its successors'.
+        """
+        stack = [start]
+        while stack:
+            c = stack[-1]
+            if c in memo:
+                stack.pop()
+                continue
+            pending = [s for s in succ[c] if s not in memo]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            if len(succ[c]) == 1 and len(members[c]) == 1:
+                s = succ[c][0]
+                memo[c] = memo[s].union(members[s])
+                continue
+            reach = set(members[c]) if len(members[c]) > 1 else set()
+            for s in succ[c]:
+                reach.update(members[s])
+                reach.update(memo[s])
+            memo[c] = frozenset(reach)
+        return memo[start]
+
+    def ancestor_ids(self, i: int) -> frozenset:
+        comp_of, members, up, _ = self._condense()
+        return self._reach(comp_of[i], members, up, self._ancestors) - {i}
+
+    def descendant_ids(self, i: int) -> frozenset:
+        comp_of, members, _, down = self._condense()
+        return self._reach(comp_of[i], members, down, self._descendants) - {i}
+
+    def descendant_counts(self) -> list:
+        """
+        Per class id: how many classes inherit from it, directly or not. Counted with bitsets in
+        blocks (see import_graph), so whole-repository counts never materialize every set.
+        """
+        if self._counts is None:
+            comp_of, members, _, down = self._condense()
+            k = len(members)
+            # Subclasses come after their bases in `members`: reversed, subclasses come first
+            reach = reach_counts(members[::-1], [k - 1 - c for c in comp_of],
+                                 [[k - 1 - d for d in down[k - 1 - c]] for c in range(k)], len(self.names))
+            self._counts = [reach[k - 1 - comp_of[i]] - 1 for i in range(len(self.names))]
+        return self._counts
+
+    def ancestors(self, name: str) -> list:
+        """Every class in the repository `name` inherits from, directly or not, sorted."""
+        return sorted(self.names[j] for j in self.ancestor_ids(self.lookup(name)))
+
+    def descendants(self, name: str) -> list:
+        """Every class in the repository inheriting from `name`, directly or not, sorted."""
+        return sorted(self.names[j] for j in self.descendant_ids(self.lookup(name)))
+
+    # ─── Method resolution order ───
+
+    def _linearize(self, i: int) -> tuple:
+        """C3 linearization over resolved and external bases; (order, consistent)."""
+        order = _merge([self._mro[j][0] if j >= 0 else (base,) for j, base in self.bases[i]]
+                       + [[j if j >= 0 else base for j, base in self.bases[i]]])
+        if order is not None:
+            return (i,) + tuple(order), True
+        # No C3 order: depth-first, left to right, first occurrence wins
+        fallback = {}
+        for j, base in self.bases[i]:
+            for key in (self._mro[j][0] if j >= 0 else (base,)):
+                fallback.setdefault(key, None)
+        return (i,) + tuple(fallback), False
+
+    def mro_ids(self, i: int) -> tuple:
+        """(ids of repository classes and names of external bases, in MRO order; C3-consistent?)"""
+        comp_of, members, _, _ = self._condense()
+        memo = self._mro
+        stack = [i]
+        while stack:
+            c = stack[-1]
+            if c in memo:
+                stack.pop()
+                continue
+            if len(members[comp_of[c]]) > 1:
+                # On an inheritance cycle there is no linearization: ancestors breadth-first instead
+                order = [c]
+                seen = {c}
+                for j in order:
+                    for k in self.parents[j]:
+                        if k not in seen:
+                            seen.add(k)
+                            order.append(k)
+                external = dict.fromkeys(base for j in order for base in self.external[j])
+                memo[c] = (tuple(order) + tuple(external), False)
+                stack.pop()
+                continue
+            pending = [j for j in self.parents[c] if j not in memo]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            memo[c] = self._linearize(c)
+        return memo[i]
+
+    def mro(self, name: str) -> list:
+        """Method resolution order of `name`: qualified repository classes and external bases as written."""
+        order, _ = self.mro_ids(self.lookup(name))
+        return [self.names[key] if isinstance(key, int) else key for key in order]
+
+    # ─── Class trees ───
+
+    def roots(self) -> list:
+        """Classes with subclasses but no base in the repository, most descendants first."""
+        counts = self.descendant_counts()
+        found = [i for i in range(len(self.names)) if self.children[i] and not self.parents[i]]
+        return sorted(found, key=lambda i: (-counts[i], self.names[i]))
+
+    def tree(self, i: int, max_nodes: int = MAX_TREE_NODES) -> dict:
+        """
+        `i` and every descendant as nested {"name", "bases" (external), "also" (other repository
+        bases), "descendants", "children"}; a class with several repository bases appears under
+        each of them. After `max_nodes` classes, nodes stop expanding and count what they hold
+        back in "more".
+        """
+        counts = self.descendant_counts()
+
+        def node(j: int, parent: Optional[int]) -> dict:
+            return {"name": self.names[j], "bases": self.external[j],
+                    "also": [self.names[k] for k in self.parents[j] if k != parent],
+                    "descendants": counts[j], "children": [], "more": 0}
+
+        top = node(i, None)
+        shown = 1
+        stack = [(top, i, {i})]
+        while stack:
+            entry, j, path = stack.pop()
+            expand = []
+            children = sorted(self.children[j], key=lambda k: self.names[k])
+            for k, child in enumerate(children):
+                if shown >= max_nodes:
+                    entry["more"] = len(children) - k
+                    break
+                if child in path:
+                    continue  # inheritance cycle
+                entry["children"].append(node(child, j))
+                expand.append((entry["children"][-1], child, path | {child}))
+                shown += 1
+            stack.extend(reversed(expand))  # depth-first, first child next
+        return top
+
+    def trees(self, max_trees: int = MAX_TREES, max_nodes: int = MAX_TREE_NODES) -> list:
+        return [self.tree(i, max_nodes) for i in self.roots()[:max_trees]]
+
+
+def analyze(ccg: Optional[dict]) -> Optional[dict]:
+    """
+    Class hierarchy report: class and inheritance edge counts (repository and external bases),
+    classes with several bases, inheritance cycles, the most extended external bases and the
+    largest class trees (see Hierarchy.tree). None without a CCG or classes.
+    """
+    if not ccg or not ccg.get("classes"):
+        return None
+    start = time.perf_counter()
+    hierarchy = Hierarchy(ccg)
+    external = {}
+    for bases in hierarchy.external:
+        for base in bases:
+            external[base] = external.get(base, 0) + 1
+    _, members, _, _ = hierarchy._condense()
+    roots = hierarchy.roots()
+    return {
+        "classes": len(hierarchy),
+        "edges": sum(len(p) for p in hierarchy.parents),
+        "external_edges": sum(len(e) for e in hierarchy.external),
+        "multiple_bases": sum(1 for bases in hierarchy.bases if len(bases) > 1),
+        "cycles": sum(1 for component in members if len(component) > 1),
+        "roots": len(roots),
+        "external_bases": [{"base": base, "subclasses": count}
+                           for base, count in sorted(external.items(), key=lambda kv: (-kv[1], kv[0]))[:MAX_LISTED]],
+        "trees": [hierarchy.tree(i) for i in roots[:MAX_TREES]],
+        "seconds": round(time.perf_counter() - start, 4),
+    }
@@ -0,0 +1,356 @@
+# Py/import_graph.py - Module-level import graph: cycles, layering and transitive fan-in/fan-out
+# Imports from the CCG are resolved to repository modules (dotted, relative, JS paths, Go packages)
+
+import os
+import time
+from typing import Optional
+
+from Py.call_resolver import module_name, resolve_relative
+
+# Modules per reachability pass: transitive fan-in/fan-out use one bitset per strongly connected
+# component, computed in blocks of this many modules to keep memory flat on very large repos
+REACH_BLOCK = 8192
+MAX_LISTED = 20  # cycles, violations and fan-in/fan-out rows in the report
+
+# Configured layers, top to bottom (comma-separated module prefixes): a lower layer importing a
+# higher one is a violation. Without it, layers are inferred from the package graph.
+LAYERS = [p.strip() for p in os.environ.get("CG_LAYERS", "").split(",") if p.strip()]
+
+_JS_EXTENSIONS = (".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".mts", ".cts")
+
+
+def strongly_connected_components(adjacency: list) -> list:
+    """
+    Iterative Tarjan: SCCs of a graph given as successor lists over 0..n-1, in reverse
+    topological order (a component comes after every component it can reach). O(V + E).
+    """
+    n = len(adjacency)
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    stack = []
+    components = []
+    counter = 0
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, 0)]
+        while work:
+            v, i = work[-1]
+            successors = adjacency[v]
+            if i < len(successors):
+                work[-1] = (v, i + 1)
+                w = successors[i]
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, 0))
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+            work.pop()
+            if work:
+                u = work[-1][0]
+                if low[v] < low[u]:
+                    low[u] = low[v]
+            if low[v] == index[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component.append(w)
+                    if w == v:
+                        break
+                components.append(component)
+    return components
+
+
+def reach_counts(components: list, comp_of: list, comp_succ: list, n: int) -> list:
+    """
+    Per component: how many nodes (modules, classes) it reaches (itself included). Components arrive sinks first,
+    so each bitset is its members' bits OR'ed with its successors' finished bitsets.
+    """
+    counts = [0] * len(components)
+    for start in range(0, n, REACH_BLOCK):
+        reach = [0] * len(components)
+        for m in range(start, min(n, start + REACH_BLOCK)):
+            reach[comp_of[m]] |= 1 << (m - start)
+        for c, successors in enumerate(comp_succ):
+            bits = reach[c]
+            for d in successors:
+                bits |= reach[d]
+            reach[c] = bits
+            counts[c] += bits.bit_count()
+    return counts
+
+
+_reach_counts = reach_counts  # former private name
+
+
+class ImportGraph:
+    """
+    Repository modules (dotted names, see call_resolver.module_name) and the imports between them:
+      modules:   sorted module names; a module's id is its position
+      adjacency: id -> sorted ids of the repository modules it imports
+    Imports of anything outside the repository are counted in `external` but not stored.
+    """
+
+    def __init__(self, ccg: dict, repo_root: str, go_module: Optional[str] = None):
+        files = sorted({r["file"] for key in ("functions", "classes", "imports") for r in ccg.get(key, [])})
+        known = ccg.get("modules", {})  # file -> module map recorded by call_resolver.resolve_calls
+        module_of = {path: known.get(path) or module_name(path, repo_root) for path in files}
+        self.modules = sorted(set(module_of.values()))
+        self.ids = {module: i for i, module in enumerate(self.modules)}
+        self.packages = {module_of[p] for p in files if os.path.basename(p).startswith("__init__.")}
+        self.repo_root = repo_root
+        self.go_module = go_module
+        self._go_packages = {}  # directory -> module ids
+        for path in files:
+            if path.endswith(".go"):
+                rel = os.path.relpath(os.path.dirname(path), repo_root).replace("\\", "/")
+                self._go_packages.setdefault("" if rel == "." else rel, []).append(self.ids[module_of[path]])
+
+        edges = [set() for _ in self.modules]
+        self.external = 0
+        for record in ccg.get("imports", []):
+            source = self.ids[module_of[record["file"]]]
+            targets = self._resolve(record, module_of[record["file"]])
+            if not targets:
+                self.external += 1
+            for target in targets:
+                if target != source:
+                    edges[source].add(target)
+        self.adjacency = [sorted(e) for e in edges]
+        self.edge_count = sum(len(e) for e in self.adjacency)
+
+    # ─── Resolution ───
+
+    def _longest_module(self, dotted: str) -> Optional[int]:
+        """Id of the longest repository module that prefixes `dotted` (`a.b.func` -> `a.b`)."""
+        while dotted:
+            i = self.ids.get(dotted)
+            if i is not None:
+                return i
+            dotted = dotted.rpartition(".")[0]
+        return None
+
+    def _resolve(self, record: dict, module: str) -> list:
+        path = record["file"]
+        if path.endswith(_JS_EXTENSIONS):
+            return self._resolve_js(record["module"], path)
+        if path.endswith(".go"):
+            return self._resolve_go(record["module"])
+        target = resolve_relative(record.get("path", record["module"]), module, module in self.packages)
+        if "names" in record:
+            # `from pkg import mod` imports the submodule when there is one, else a name in pkg
+            targets = []
+            for name, _alias in record["names"]:
+                i = self.ids.get(f"{target}.{name}")
+                if i is None:
+                    i = self._longest_module(target)
+                if i is not None:
+                    targets.append(i)
+            return targets
+        i = self._longest_module(target)
+        return [] if i is None else [i]
+
+    def _resolve_js(self, spec: str, path: str) -> list:
+        if not spec.startswith("."):
+            return []
+        base = os.path.normpath(os.path.join(os.path.dirname(path), spec))
+        stem, ext = os.path.splitext(base)
+        for candidate in ((stem,) if ext in _JS_EXTENSIONS else (base, os.path.join(base, "index"))):
+            i = self.ids.get(module_name(candidate + ".js", self.repo_root))
+            if i is not None:
+                return [i]
+        return []
+
+    def _resolve_go(self, spec: str) -> list:
+        if not self.go_module or not (spec == self.go_module or spec.startswith(self.go_module + "/")):
+            return []
+        return self._go_packages.get(spec[len(self.go_module) + 1:], [])
+
+    # ─── Analysis ───
+
+    def cycles(self, components: list) -> list:
+        """Import cycles (components of more than one module), largest first, each with one cycle path."""
+        cycles = []
+        for component in components:
+            if len(component) < 2:
+                continue
+            names = sorted(self.modules[m] for m in component)
+            cycles.append({"size": len(component), "modules": names, "path": self._cycle_path(component)})
+        cycles.sort(key=lambda c: (-c["size"], c["modules"][0]))
+        return cycles
+
+    def _cycle_path(self, component: list, start: Optional[int] = None) -> list:
+        """Shortest cycle through `start` (default: the component's first module), BFS restricted to the component."""
+        members = set(component)
+        if start is None:
+            start = min(component, key=lambda m: self.modules[m])
+        parent = {start: None}
+        queue = [start]
+        for v in queue:
+            for w in self.adjacency[v]:
+                if w == start:
+                    path = [v]
+                    while parent[path[-1]] is not None:
+                        path.append(parent[path[-1]])
+                    return [self.modules[m] for m in [start] + path[::-1][1:] + [start]]
+                if w in members and w not in parent:
+                    parent[w] = v
+                    queue.append(w)
+        return []
+
+    def fan(self, components: list) -> list:
+        """Per module id: (fan_in, fan_out, transitive_fan_in, transitive_fan_out)."""
+        n = len(self.modules)
+        comp_of = [0] * n
+        for c, component in enumerate(components):
+            for m in component:
+                comp_of[m] = c
+        comp_succ = [set() for _ in components]
+        comp_pred = [set() for _ in components]
+        fan_in = [0] * n
+        for v, successors in enumerate(self.adjacency):
+            for w in successors:
+                fan_in[w] += 1
+                cv, cw = comp_of[v], comp_of[w]
+                if cv != cw:
+                    comp_succ[cv].add(cw)
+                    comp_pred[cw].add(cv)
+        reach_out = reach_counts(components, comp_of, comp_succ, n)
+        # Reversed graph: reverse the component order so sources come first
+        k = len(components)
+        reversed_pred = [{k - 1 - d for d in comp_pred[k - 1 - c]} for c in range(k)]
+        reach_in = reach_counts(components[::-1], [k - 1 - c for c in comp_of], reversed_pred, n)
+        return [(fan_in[m], len(self.adjacency[m]), reach_in[k - 1 - comp_of[m]] - 1, reach_out[comp_of[m]] - 1)
+                for m in range(n)]
+
+    def layers(self, layers: Optional[list] = None) -> dict:
+        """
+        Layering. With configured `layers` (module prefixes, top to bottom) every import from a lower
+        layer into a higher one is a violation. Otherwise packages (a module's parent package) are
+        layered by the package graph: a package sits above everything it imports, and within a
+        package cycle the direction with fewer imports is the violation.
+        """
+        layers = LAYERS if layers is None else layers
+        if layers:
+            return self._configured_layers(layers)
+        package_of = [m if m in self.packages else (m.rpartition(".")[0] or "(root)") for m in self.modules]
+        package_names = sorted(set(package_of))
+        package_ids = {p: i for i, p in enumerate(package_names)}
+        pairs = {}  # (package, package) -> [module edges]
+        for v, successors in enumerate(self.adjacency):
+            pv = package_ids[package_of[v]]
+            for w in successors:
+                pw = package_ids[package_of[w]]
+                if pv != pw:
+                    pairs.setdefault((pv, pw), []).append((v, w))
+        adjacency = [[] for _ in package_names]
+        for pv, pw in sorted(pairs):
+            adjacency[pv].append(pw)
+        components = strongly_connected_components(adjacency)
+        comp_of = [0] * len(package_names)
+        for c, component in enumerate(components):
+            for p in component:
+                comp_of[p] = c
+        height = [0] * len(components)
+        for c, component in enumerate(components):  # sinks first
+            for p in component:
+                for q in adjacency[p]:
+                    if comp_of[q] != c and height[comp_of[q]] + 1 > height[c]:
+                        height[c] = height[comp_of[q]] + 1
+        violations = []
+        for (pv, pw), imports in pairs.items():
+            if comp_of[pv] == comp_of[pw] and len(imports) <= len(pairs.get((pw, pv), ())):
+                violations.append(self._violation(package_names[pv], package_names[pw], imports))
+        counts = {}
+        for p in package_of:
+            counts[p] = counts.get(p, 0) + 1
+        packages = [{"package": p, "layer": height[comp_of[package_ids[p]]], "modules": counts[p]}
+                    for p in package_names]
+        packages.sort(key=lambda p: (-p["layer"], p["package"]))
+        violations.sort(key=lambda v: (-v["count"], v["from"], v["to"]))
+        return {"mode": "inferred", "packages": packages, "violations": violations}
+
+    def _configured_layers(self, layers: list) -> dict:
+        def layer_of(module):
+            for i, prefix in enumerate(layers):
+                if module == prefix or module.startswith(prefix + "."):
+                    return i
+            return None
+
+        module_layer = [layer_of(m) for m in self.modules]
+        pairs = {}
+        for v, successors in enumerate(self.adjacency):
+            for w in successors:
+                lv, lw = module_layer[v], module_layer[w]
+                if lv is not None and lw is not None and lv > lw:
+                    pairs.setdefault((lv, lw), []).append((v, w))
+        counts = {}
+        for layer in module_layer:
+            if layer is not None:
+                counts[layer] = counts.get(layer, 0) + 1
+        packages = [{"package": prefix, "layer": len(layers) - 1 - i, "modules": counts.get(i, 0)}
+                    for i, prefix in enumerate(layers)]
+        violations = [self._violation(layers[lv], layers[lw], imports) for (lv, lw), imports in pairs.items()]
+        violations.sort(key=lambda v: (-v["count"], v["from"], v["to"]))
+        return {"mode": "configured", "packages": packages, "violations": violations}
+
+    def _violation(self, source: str, target: str, imports: list) -> dict:
+        examples = sorted((self.modules[v], self.modules[w]) for v, w in imports)[:5]
+        return {"from": source, "to": target, "count": len(imports),
+                "imports": [{"importer": a, "imported": b} for a, b in examples]}
+
+    def report(self, top: int = MAX_LISTED, layers: Optional[list] = None) -> dict:
+        """Complete counts plus the `top` cycles, layering violations and fan-in/fan-out modules."""
+        components = strongly_connected_components(self.adjacency)
+        cycles = self.cycles(components)
+        fan = self.fan(components)
+        layering = self.layers(layers)
+
+        def rows(key):
+            order = sorted(range(len(self.modules)), key=lambda m: (-key(fan[m]), self.modules[m]))[:top]
+            return [{"module": self.modules[m], "fan_in": fan[m][0], "fan_out": fan[m][1],
+                     "transitive_fan_in": fan[m][2], "transitive_fan_out": fan[m][3]}
+                    for m in order if key(fan[m])]
+
+        return {
+            "modules": len(self.modules),
+            "edges": self.edge_count,
+            "external_imports": self.external,
+            "cyclic_modules": sum(c["size"] for c in cycles),
+            "cycle_count": len(cycles),
+            "cycles": cycles[:top],
+            "layers": {"mode": layering["mode"], "packages": layering["packages"][:top],
+                       "package_count": len(layering["packages"])},
+            "violation_count": len(layering["violations"]),
+            "violations": layering["violations"][:top],
+            "most_depended_on": rows(lambda f: f[2]),
+            "most_dependent": rows(lambda f: f[3]),
+        }
+
+
+def go_module(repo_root: str) -> Optional[str]:
+    """Module path declared by the repository's go.mod (resolves Go imports), or None."""
+    if not os.path.isfile(os.path.join(repo_root, "go.mod")):
+        return None
+    from Py.dependencies import parse_go_mod
+    return parse_go_mod(os.path.join(repo_root, "go.mod"), repo_root)[0]
+
+
+def analyze(ccg: Optional[dict], repo_root: str, layers: Optional[list] = None) -> Optional[dict]:
+    """Import-graph report for a CCG (None without one); includes the analysis time in seconds."""
+    if not ccg:
+        return None
+    start = time.perf_counter()
+    report = ImportGraph(ccg, repo_root, go_module(repo_root)).report(layers=layers)
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    return report
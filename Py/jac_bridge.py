@@ -10,21 +10,28 @@ import os
 # Add workspace to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from Py.orchestrator import Orchestrator
-
 
 def main():
     """
     Entry point for both Jac and Python CLI.
     Reads repo URL from command-line arguments and delegates to orchestrator.
+    With --serve, runs the persistent bridge server instead (see Py/bridge_server.py).
     """
     if len(sys.argv) < 2:
         print("Usage: python jac_bridge.py <github_url>")
+        print("       python jac_bridge.py --serve [--socket PATH]")
         print("Example: python jac_bridge.py https://github.com/openai/gym")
         sys.exit(1)
 
+    if sys.argv[1] == "--serve":
+        from Py import bridge_server
+        return bridge_server.main(sys.argv[2:])
+
     repo_url = sys.argv[1]
 
+    # Imported after argument checks so usage errors return without loading the pipeline
+    from Py.orchestrator import Orchestrator
+
     print("\n" + "="*70)
     print("CODEBASE GENIUS - JAC ENTRY POINT")
     print("="*70)
@@ -3,8 +3,44 @@
 
 import os
 import json
-from typing import Optional
-from Py import repo_clone, parser_ccg, diagram_export
+import re
+import shutil
+import time
+from typing import Iterator, Optional
+from Py import repo_clone, parser_ccg, diagram_export, analyzers, call_resolver, planner, ccg_query, search_index, renderers, \
+    dependencies, import_graph, summarizer, git_exec, preflight, checkpoint, tracing, profiling, \
+    code_metrics, hierarchy, ccg_diff
+
+# Fields of a CCG definition shown in the API reference
+API_FIELDS = ("name", "line", "signature", "returns", "async", "decorators", "docstring")
+# What the code_analyzer checkpoint keeps besides the CCG: repo_info additions and metrics
+ANALYSIS_KEYS = ("analysis_plan", "dependencies", "import_graph", "hierarchy", "code_metrics")
+ANALYSIS_METRICS = ("plan", "languages", "dependencies", "import_graph", "hierarchy", "code_metrics",
+                    "search_index", "parse_resumed")
+
+
+def _api_entry(record: dict) -> dict:
+    return {key: record[key] for key in API_FIELDS if key in record}
+
+
+def _bases(cls: dict) -> list:
+    """Every base of a class record (CCGs from before multiple bases only carry "parent")."""
+    return cls.get("bases") or ([cls["parent"]] if cls.get("parent") else [])
+
+
+def _requirement_line(dep: dict) -> str:
+    """Declared dependency as its ecosystem writes it: name[extras]spec; marker, pkg@spec, module version."""
+    if dep["ecosystem"] != "pypi":
+        return dep["name"] + (("@" if dep["ecosystem"] == "npm" else " ") + dep["spec"] if dep["spec"] else "")
+    line = dep["name"] + (f"[{','.join(dep['extras'])}]" if dep["extras"] else "")
+    if dep["spec"]:
+        line += dep["spec"] if dep["spec"][0] in "<>=!~^" else f" {dep['spec']}"
+    return line + (f"; {dep['marker']}" if dep.get("marker") else "")
+
+
+def _is_public(name: str) -> bool:
+    return not name.startswith("_") or name == "__init__"
+
 
 class Orchestrator:
     """
@@ -12,93 +48,633 @@ class Orchestrator:
     Coordinates repository mapping, code analysis, and documentation generation.
     """
 
-    def __init__(self, output_root: str = "./outputs"):
+    def __init__(self, output_root: str = "./outputs", parse_budgets: Optional[dict] = None,
+                 parse_cache: Optional["parser_ccg.ParseCache"] = None, executor=None,
+                 formats: Optional[list] = None, summary_backend: Optional[str] = None,
+                 checkpoints: Optional[bool] = None):
+        """
+        Args:
+            output_root: Directory that receives one sub-directory of docs per repository.
+            parse_budgets: Overrides for parser_ccg.DEFAULT_BUDGETS (file size, lines, timeouts).
+            parse_cache: Optional parser_ccg.ParseCache shared across runs (long-lived processes).
+            executor: Optional warm process pool reused for parallel parsing.
+            formats: Documentation formats to render (Py/renderers.py: markdown, html, json, sharded);
+                default markdown only.
+            summary_backend: Summarization backend (Py/summarizer.py: stub, openai, or none to
+                skip the stage); default CG_SUMMARY_BACKEND, else none.
+            checkpoints: Store each completed stage under <output_root>/<repo>/.checkpoint/ so a
+                failed run can be resumed (Py/checkpoint.py); default CG_CHECKPOINT (on).
+        """
         self.output_root = output_root
+        self.parse_budgets = parse_budgets
+        self.parse_cache = parse_cache
+        self.executor = executor
+        self.formats = renderers.validate_formats(formats)
+        self.checkpoints = checkpoint.ENABLED if checkpoints is None else checkpoints
+        backend = summary_backend or summarizer.BACKEND
+        # One Summarizer per orchestrator: its response cache stays loaded across runs
+        self.summarizer = None if backend == "none" else summarizer.Summarizer(
+            backend, cache_dir=os.path.join(output_root, summarizer.CACHE_DIRNAME))
+        # Parses by git blob id, shared by every diff() this orchestrator runs
+        self.diff_cache = ccg_diff.BlobParseCache()
         os.makedirs(output_root, exist_ok=True)
 
-    def run(self, repo_url: str, verbose: bool = True) -> dict:
+    def run(self, repo_url: str, verbose: bool = True, size_budget: Optional[dict] = None,
+            analysis_budget: Optional[dict] = None, formats: Optional[list] = None,
+            preflight_check: Optional[bool] = None, resume: bool = True, trace: Optional[bool] = None,
+            profile=None) -> dict:
         """
-        Execute the full pipeline: clone, analyze, generate docs.
-        
+        Execute the full pipeline: pre-flight, clone, analyze, generate docs.
+
+        Args:
+            size_budget: Optional {"max_files": int, "max_bytes": int}; repos over budget are
+                rejected by the pre-flight estimate before cloning (and re-checked right after
+                cloning, before any parsing).
+            analysis_budget: Optional {"max_files": int, "seconds": float}; files are ranked by
+                Py/planner.py and analyzed most important first until either budget runs out,
+                so docs are best-effort within the deadline.
+            formats: Optional override of the Orchestrator's documentation formats
+                ("markdown", "html", "json", "sharded").
+            preflight_check: Estimate the repository before cloning (Py/preflight.py) and follow
+                its strategy; default: whenever a size_budget is given.
+            resume: Continue after the stages an earlier, failed run of the same request completed
+                (Py/checkpoint.py); False discards that checkpoint and starts over.
+            trace: Record spans of every stage, git command, parsed file and rendered format
+                (Py/tracing.py) and write <output_root>/<repo>/trace.json (Chrome trace events)
+                and trace.otlp.json; default CG_TRACE. Inside a caller's trace (e.g. an API
+                request) the run's spans join it and the caller exports them.
+            profile: Profile the CodeAnalyzer's parse (Py/profiling.py): "files" (or True) records
+                every file's parse time, "cprofile" / "sample" also run cProfile or a stack
+                sampler around the parse loop (serially, in this process); the report is saved
+                as <output_root>/<repo>/profile.json. Default CG_PROFILE (off).
+
         Returns:
-            dict: Result with keys 'success', 'repo_name', 'root', 'docs_path', 'error' (if any)
+            dict: Result with keys 'success', 'repo_name', 'root', 'docs_path', 'outputs' ({format: path}),
+                  'ccg_path', 'content_hash', 'changed' / 'removed' (document paths relative to
+                  the repo's output directory that differ from the previous run), 'preflight'
+                  (the estimate, when one was made), 'trace' (trace id, span count and file
+                  paths, when this run exported one), 'profile' (path, slowest files, when
+                  profiling), 'error' (if any).
+                  Over-budget repos fail with error_code 'repo_too_large' and their 'stats';
+                  clone failures with 'git_timeout', 'git_busy' or 'git_failed'. Every failure
+                  names the 'stage' it happened in, its 'error_type', the 'completed_stages' and
+                  whether it is 'resumable' (plus the 'checkpoint' directory).
         """
+        args = (repo_url, verbose, size_budget, analysis_budget, formats, preflight_check, resume, profile)
+        if not (tracing.ENABLED if trace is None else trace) or tracing.active():
+            with tracing.span("pipeline", url=repo_url):
+                return self._run(*args)
+        with tracing.start("pipeline", url=repo_url) as root:
+            result = self._run(*args)
+            root.set(success=result["success"], error=result.get("error"), failed_stage=result.get("stage"))
+        result["trace"] = tracing.export(root.tracer, os.path.join(self.output_root, repo_clone.repo_name(repo_url)))
+        if verbose:
+            print(f"[Tracing] {result['trace']['spans']} spans written to {result['trace']['chrome']}")
+        return result
+
+    def _run(self, repo_url: str, verbose: bool, size_budget: Optional[dict], analysis_budget: Optional[dict],
+             formats: Optional[list], preflight_check: Optional[bool], resume: bool, profile) -> dict:
+        metrics = {"stages": {}}
+        stages = tracing.StageSpans()
+        stage = stages.enter("setup")
+        ckpt = None
         try:
+            formats = renderers.validate_formats(formats) if formats else self.formats
+            profile = profiling.resolve_mode(profiling.MODE if profile is None else profile)
             if verbose:
                 print(f"\n[Orchestrator] Starting pipeline for {repo_url}")
+            if self.checkpoints:
+                key = checkpoint.run_key(repo_url, size_budget=size_budget, analysis_budget=analysis_budget,
+                                         parse_budgets=self.parse_budgets)
+                ckpt = checkpoint.Checkpoint.open(self.output_root, repo_clone.repo_name(repo_url), key, repo_url)
+                if not resume:
+                    ckpt.clear()
+                elif ckpt.completed():
+                    metrics["resumed"] = ckpt.completed()
+                    if verbose:
+                        print(f"[Checkpoint] Resuming after {', '.join(ckpt.completed())}")
+
+            # Step 0: Pre-flight estimate from cheap signals, before anything is cloned
+            stage = stages.enter("preflight")
+            estimate = None
+            if ckpt is not None and ckpt.done("preflight"):
+                estimate = metrics["preflight"] = ckpt.load("preflight")
+            elif preflight_check if preflight_check is not None else size_budget is not None:
+                stage_start = time.perf_counter()
+                try:
+                    estimate = preflight.estimate(repo_url, size_budget, analysis_budget)
+                    metrics["preflight"] = estimate
+                    if verbose:
+                        print(f"[Preflight] {estimate['files']} files, {estimate['bytes']} bytes, "
+                              f"{estimate['source_files']} source files, ~{estimate['expected_seconds']}s analysis "
+                              f"({estimate['method']}) -> {estimate['strategy']}")
+                except git_exec.GitError as e:
+                    # The clone below fails (or succeeds) with the authoritative error
+                    if verbose:
+                        print(f"  ⚠ Pre-flight estimate failed: {str(e).splitlines()[0]}")
+                metrics["stages"]["preflight"] = round(time.perf_counter() - stage_start, 3)
+                if estimate and estimate["strategy"] == "rejected":
+                    if verbose:
+                        print(f"  ✗ Rejected: {estimate['reason']}")
+                    return {
+                        "success": False,
+                        "error": estimate["reason"],
+                        "error_code": "repo_too_large",
+                        "stats": {"files": estimate["files"], "bytes": estimate["bytes"],
+                                  "py_files": estimate["python_files"], "py_bytes": estimate["python_bytes"]},
+                        "preflight": estimate,
+                        "repo_url": repo_url,
+                    }
+                if estimate and ckpt is not None:
+                    ckpt.save("preflight", estimate, metrics["stages"]["preflight"])
+            if estimate and estimate["strategy"] == "sharded" and "sharded" not in formats:
+                formats = formats + ("sharded",)
+            stage_start = time.perf_counter()
 
             # Step 1: Repository Mapping (Repo Mapper)
-            if verbose:
-                print("[RepoMapper] Cloning and mapping repository...")
-            repo_info = repo_clone.clone_repo(repo_url, None)
-            repo_name = repo_info["name"]
-            repo_root = repo_info["root"]
+            stage = stages.enter("repo_mapper")
+            repo_info = cloned = None
+            if ckpt is not None and ckpt.done("repo_mapper"):
+                repo_info = ckpt.load("repo_mapper")
+                if not os.path.isdir(repo_info["root"]):
+                    # The clone is gone (temp cleanup, restart): clone again into the same directory so
+                    # every recorded path stays valid; a moved branch invalidates the checkpoint
+                    cloned = repo_clone.clone_repo(repo_url, repo_info["repo_dir"])
+                    if cloned["commit"] != repo_info["commit"]:
+                        if verbose:
+                            print(f"[Checkpoint] {repo_url} moved to {cloned['commit'][:12]}; starting over")
+                        ckpt.clear()
+                        repo_info = None
+                    else:
+                        cloned = None
+            if repo_info is not None:
+                repo_name = repo_info["name"]
+                repo_root = repo_info["root"]
+                file_tree = repo_info["file_tree"]
+                if verbose:
+                    print(f"[RepoMapper] Resumed: {repo_root} at {repo_info['commit'][:12]}")
+            else:
+                if verbose:
+                    print("[RepoMapper] Cloning and mapping repository...")
+                repo_info = cloned or repo_clone.clone_repo(repo_url, None)
+                repo_name = repo_info["name"]
+                repo_root = repo_info["root"]
+
+                file_tree = repo_clone.generate_file_tree(repo_root)
+                if size_budget:
+                    stats = repo_clone.tree_stats(file_tree)
+                    # Imported on demand: admission pulls in asyncio, which CLI/bridge runs never need
+                    from Py.admission import RepoTooLarge, check_size_budget
+                    try:
+                        check_size_budget(stats, size_budget.get("max_files"), size_budget.get("max_bytes"))
+                    except RepoTooLarge as e:
+                        shutil.rmtree(repo_info["repo_dir"], ignore_errors=True)
+                        if ckpt is not None:
+                            ckpt.clear()
+                        if verbose:
+                            print(f"  ✗ Rejected: {e}")
+                        return {
+                            "success": False,
+                            "error": str(e),
+                            "error_code": "repo_too_large",
+                            "stats": stats,
+                            "repo_url": repo_url,
+                        }
+                readme_summary = repo_clone.summarize_readme(repo_root)
+
+                repo_info["file_tree"] = file_tree
+                repo_info["readme_summary"] = readme_summary
+
+                metrics["stages"]["repo_mapper"] = round(time.perf_counter() - stage_start, 3)
+                if verbose:
+                    print(f"  ✓ Cloned to {repo_root}")
+                    print(f"  ✓ File tree built: {len(file_tree.get('children', []))} top-level items")
+                    print(f"  ✓ README summary extracted")
+                if ckpt is not None:
+                    ckpt.save("repo_mapper", repo_info, metrics["stages"]["repo_mapper"])
 
-            file_tree = repo_clone.generate_file_tree(repo_root)
-            readme_summary = repo_clone.summarize_readme(repo_root)
+            # Step 2: Code Analysis (Code Analyzer)
+            stage = stages.enter("code_analyzer")
+            if ckpt is not None and ckpt.done("code_analyzer"):
+                analyzed = ckpt.load("code_analyzer")
+                ccg, ccg_mermaid = analyzed["ccg"], analyzed["mermaid"]
+                repo_info.update(analyzed["repo_info"])
+                metrics.update(analyzed["metrics"])
+                if verbose:
+                    print(f"[CodeAnalyzer] Resumed: {len(ccg['functions']) if ccg else 0} functions, "
+                          f"{len(ccg['classes']) if ccg else 0} classes")
+            else:
+                if verbose:
+                    print("[CodeAnalyzer] Building Code Context Graph...")
+                stage_start = time.perf_counter()
+                # Collect ALL source files in registered languages for deep analysis (removed 10-file limit)
+                source_files = self._collect_source_files(file_tree, repo_root, limit=None)
+                all_source_files = source_files
+                parse_budgets = self.parse_budgets
+                if analysis_budget and source_files:
+                    with tracing.span("plan", files=len(source_files)):
+                        plan = planner.plan_analysis(source_files, repo_root, repo_info.get("readme"),
+                                                     analysis_budget.get("max_files"), analysis_budget.get("seconds"))
+                    parse_budgets = dict(parse_budgets or {})
+                    if plan["deadline"] is not None:
+                        # Whatever planning left of the time budget becomes the parser's repository budget
+                        remaining = max(0.0, plan["deadline"] - time.monotonic())
+                        current = parser_ccg.resolve_budgets(parse_budgets)["repo_timeout"]
+                        parse_budgets["repo_timeout"] = remaining if current is None else min(current, remaining)
+                    repo_info["analysis_plan"] = {
+                        "total": plan["total"],
+                        "planned": len(plan["files"]),
+                        "budget": analysis_budget,
+                        "top": plan["ranked"][:5],
+                    }
+                    metrics["plan"] = {"planning_seconds": plan["planning_seconds"], **repo_info["analysis_plan"]}
+                    if verbose:
+                        print(f"  ✓ Planned {len(plan['files'])} of {plan['total']} files by priority "
+                              f"({plan['planning_seconds']}s)")
+                    source_files = plan["files"]
+
+                ccg = None
+                ccg_mermaid = None
+                if source_files:
+                    # Per-file results go to the checkpoint's parse log as they complete
+                    cache = ckpt.parse_cache(self.parse_cache) if ckpt is not None else self.parse_cache
+                    profiler = profiling.Profiler(profile) if profile else None
+                    try:
+                        ccg = parser_ccg.build_ccg_for_files(source_files, parse_budgets, cache=cache,
+                                                             executor=self.executor, profiler=profiler)
+                        with tracing.span("resolve_calls"):
+                            ccg = call_resolver.resolve_calls(ccg, repo_root)
+                        with tracing.span("mermaid"):
+                            ccg_mermaid = parser_ccg.ccg_to_mermaid(ccg)
+                        if ccg:
+                            metrics["languages"] = ccg["metrics"]["languages"]
+                        if verbose:
+                            print(f"  ✓ CCG built from {len(source_files)} source files")
+                            for language, stats in sorted(metrics.get("languages", {}).items()):
+                                print(f"    - {language}: {stats['files']} files, {stats['files_per_s']} files/s")
+                            skipped = ccg.get("skipped", []) if ccg else []
+                            if skipped:
+                                print(f"  ⚠ {len(skipped)} files skipped or sampled (see Metadata in docs)")
+                    except Exception as e:
+                        import traceback
+                        if verbose:
+                            print(f"  ⚠ CCG build error: {e}")
+                            traceback.print_exc()
+                        ccg = None
+                        ccg_mermaid = None
+                    finally:
+                        if ckpt is not None:
+                            cache.close()
+                            if cache.resumed:
+                                metrics["parse_resumed"] = cache.resumed
+                        if profiler is not None:
+                            # Saved even when the build failed: that is when it is needed most
+                            metrics["profile"] = profiler.save(os.path.join(self.output_root, repo_name))
+                            if verbose:
+                                slowest = metrics["profile"]["slowest"]
+                                print(f"  ✓ Profile ({profile}) saved to {metrics['profile']['path']}"
+                                      + (f"; slowest {slowest[0]['path']} ({slowest[0]['seconds']}s)" if slowest else ""))
+                else:
+                    if verbose:
+                        print("  ⚠ No supported source files found in repository")
 
-            repo_info["file_tree"] = file_tree
-            repo_info["readme_summary"] = readme_summary
+                # Dependency report: every manifest and import, classified against the whole repository
+                try:
+                    with tracing.span("dependencies"):
+                        repo_info["dependencies"] = dependencies.analyze(repo_root, ccg, all_source_files)
+                    deps = repo_info["dependencies"]
+                    metrics["dependencies"] = {"declared": len(deps["declared"]), "undeclared": len(deps["undeclared"]),
+                                               **{k: len(v) for k, v in deps["imports"].items()}}
+                    if verbose:
+                        print(f"  ✓ Dependencies: {len(deps['declared'])} declared in {len(deps['manifests'])} manifests, "
+                              f"{len(deps['imports']['third_party'])} third-party imports")
+                except Exception as e:
+                    if verbose:
+                        print(f"  ⚠ Dependency analysis failed: {e}")
 
-            if verbose:
-                print(f"  ✓ Cloned to {repo_root}")
-                print(f"  ✓ File tree built: {len(file_tree.get('children', []))} top-level items")
-                print(f"  ✓ README summary extracted")
+                # Module import graph: cycles, layering violations, transitive fan-in/fan-out
+                try:
+                    with tracing.span("import_graph"):
+                        repo_info["import_graph"] = import_graph.analyze(ccg, repo_root)
+                    graph = repo_info["import_graph"]
+                    if graph:
+                        metrics["import_graph"] = {k: graph[k] for k in ("modules", "edges", "cycle_count",
+                                                                         "violation_count", "seconds")}
+                        if verbose:
+                            print(f"  ✓ Import graph: {graph['modules']} modules, {graph['edges']} edges, "
+                                  f"{graph['cycle_count']} cycles, {graph['violation_count']} layering violations")
+                except Exception as e:
+                    if verbose:
+                        print(f"  ⚠ Import graph analysis failed: {e}")
 
-            # Step 2: Code Analysis (Code Analyzer)
-            if verbose:
-                print("[CodeAnalyzer] Building Code Context Graph...")
-            # Collect ALL Python files for deep analysis (removed 10-file limit)
-            py_files = self._collect_python_files(file_tree, repo_root, limit=None)
-            
-            ccg = None
-            ccg_mermaid = None
-            if py_files:
+                # Class hierarchy: every base resolved across files, class trees for the docs
                 try:
-                    ccg = parser_ccg.build_ccg_for_files(py_files)
-                    ccg_mermaid = parser_ccg.ccg_to_mermaid(ccg)
+                    with tracing.span("hierarchy"):
+                        repo_info["hierarchy"] = hierarchy.analyze(ccg)
+                    tree = repo_info["hierarchy"]
+                    if tree:
+                        metrics["hierarchy"] = {k: tree[k] for k in ("classes", "edges", "external_edges",
+                                                                     "cycles", "seconds")}
+                        if verbose:
+                            print(f"  ✓ Class hierarchy: {tree['edges']} repository and {tree['external_edges']} "
+                                  f"external bases over {tree['classes']} classes, {tree['roots']} class trees")
+                except Exception as e:
                     if verbose:
-                        print(f"  ✓ CCG built from {len(py_files)} Python files")
+                        print(f"  ⚠ Class hierarchy analysis failed: {e}")
+
+                # Code metrics: counts, distributions and top lists over the CCG, vectorized with NumPy
+                try:
+                    with tracing.span("code_metrics"):
+                        repo_info["code_metrics"] = code_metrics.analyze(ccg)
+                    stats = repo_info["code_metrics"]
+                    if stats:
+                        metrics["code_metrics"] = {k: stats[k] for k in ("modules", "functions", "classes",
+                                                                         "call_edges", "seconds")}
+                        if verbose:
+                            print(f"  ✓ Code metrics: {stats['functions']} functions in {stats['modules']} modules, "
+                                  f"{stats['call_density']} calls per function ({stats['seconds']}s)")
+                    elif ccg and verbose:
+                        print("  ⚠ Code metrics skipped (numpy not installed)")
                 except Exception as e:
-                    import traceback
                     if verbose:
-                        print(f"  ⚠ CCG build error: {e}")
-                        traceback.print_exc()
-                    ccg = None
-                    ccg_mermaid = None
-            else:
-                if verbose:
-                    print("  ⚠ No Python files found in repository")
+                        print(f"  ⚠ Code metrics failed: {e}")
+
+                # Search index segment for this repo (symbols, file paths, README), replacing any previous one
+                try:
+                    with tracing.span("search_index"):
+                        indexed = search_index.index_repo(self.output_root, repo_name, ccg, repo_root,
+                                                          repo_info.get("readme"))
+                    metrics["search_index"] = indexed
+                    if verbose:
+                        print(f"  ✓ Search index updated: {indexed['documents']} documents")
+                except Exception as e:
+                    if verbose:
+                        print(f"  ⚠ Search index update failed: {e}")
+                metrics["stages"]["code_analyzer"] = round(time.perf_counter() - stage_start, 3)
+                if ckpt is not None:
+                    ckpt.save("code_analyzer", {
+                        "ccg": ccg,
+                        "mermaid": ccg_mermaid,
+                        "repo_info": {k: repo_info[k] for k in ANALYSIS_KEYS if k in repo_info},
+                        "metrics": {k: metrics[k] for k in ANALYSIS_METRICS if k in metrics},
+                    }, metrics["stages"]["code_analyzer"])
+
+            # Summaries of the README, modules and classes (cached by content hash)
+            stage = stages.enter("summarizer")
+            if ckpt is not None and ckpt.done("summarizer"):
+                summarized = ckpt.load("summarizer")
+                repo_info["summaries"], metrics["summaries"] = summarized["summaries"], summarized["metrics"]
+            elif self.summarizer is not None:
+                stage_start = time.perf_counter()
+                try:
+                    summaries, summary_metrics = summarizer.summarize_repository(
+                        self.summarizer, repo_name, repo_info.get("readme"), ccg, repo_root)
+                    repo_info["summaries"] = summaries
+                    metrics["summaries"] = summary_metrics
+                    if ckpt is not None:
+                        ckpt.save("summarizer", {"summaries": summaries, "metrics": summary_metrics},
+                                  round(time.perf_counter() - stage_start, 3))
+                    if verbose:
+                        print(f"  ✓ Summaries ({summary_metrics['backend']}): {summary_metrics['summarized']} generated, "
+                              f"{summary_metrics['cached']} cached, {summary_metrics['batches']} batches, "
+                              f"{summary_metrics['prompt_tokens'] + summary_metrics['completion_tokens']} tokens")
+                except Exception as e:
+                    if verbose:
+                        print(f"  ⚠ Summarization failed: {e}")
+                metrics["stages"]["summarizer"] = round(time.perf_counter() - stage_start, 3)
 
             # Step 3: Documentation Generation (DocGenie)
+            stage = stages.enter("doc_genie")
             if verbose:
                 print("[DocGenie] Generating documentation...")
-            docs_path = self._generate_docs(repo_name, repo_info, ccg, ccg_mermaid)
+            stage_start = time.perf_counter()
+            content = {}
+            outputs = self._generate_docs(repo_name, repo_info, ccg, ccg_mermaid, formats, content)
+            metrics["content"] = {"hash": content["content_hash"], "changed": len(content["changed"]),
+                                  "removed": len(content["removed"])}
+            docs_path = outputs.get("markdown") or next(iter(outputs.values()))
+            ccg_path = None
+            if ccg:
+                # Stored next to the docs for the query API (Py/ccg_query.py)
+                with tracing.span("save_ccg"):
+                    ccg_path = ccg_query.save_ccg(ccg, os.path.join(self.output_root, repo_name), repo_root)
+            metrics["stages"]["doc_genie"] = round(time.perf_counter() - stage_start, 3)
             if verbose:
-                print(f"  ✓ Documentation saved to {docs_path}")
+                for fmt, path in outputs.items():
+                    print(f"  ✓ Documentation ({fmt}) saved to {path}")
+                print(f"  ✓ Content hash {content['content_hash'][:12]}: {len(content['changed'])} documents changed, "
+                      f"{len(content['removed'])} removed")
+            if ckpt is not None:
+                ckpt.clear()  # the run is complete; the next one starts from a fresh clone
 
             return {
                 "success": True,
                 "repo_name": repo_name,
                 "root": repo_root,
                 "docs_path": docs_path,
+                "outputs": outputs,
+                "ccg_path": ccg_path,
+                "content_hash": content["content_hash"],
+                "changed": content["changed"],
+                "removed": content["removed"],
                 "repo_info": repo_info,
+                "metrics": metrics,
+                "preflight": estimate,
+                "profile": metrics.get("profile"),
             }
 
         except Exception as e:
             if verbose:
-                print(f"  ✗ Error: {e}")
+                print(f"  ✗ Error in {stage}: {e}")
+            result = {
+                "success": False,
+                "error": str(e),
+                "error_type": type(e).__name__,
+                "stage": stage,
+                "repo_url": repo_url,
+                # Rerunning the same request resumes after these stages
+                "completed_stages": ckpt.completed() if ckpt is not None else [],
+                "resumable": bool(ckpt is not None and ckpt.completed()),
+            }
+            if ckpt is not None and ckpt.completed():
+                result["checkpoint"] = ckpt.directory
+            if "profile" in metrics:
+                result["profile"] = metrics["profile"]
+            if isinstance(e, git_exec.GitError):
+                # Lets the API tell a hung remote (504) or a saturated git pool (503) from a bad URL
+                result["error_code"] = {git_exec.GitTimeout: "git_timeout", git_exec.GitBusy: "git_busy"}.get(
+                    type(e), "git_failed")
+            return result
+        finally:
+            stages.close()
+
+    def diff(self, repo_url: str, base: str, head: str = "HEAD", verbose: bool = True,
+             trace: Optional[bool] = None) -> dict:
+        """
+        Architecture changes between two refs (branches, tags or commits) of a repository.
+
+        The head ref is analyzed in full; for the base ref only the source files that differ
+        between the refs are checked out and parsed, every other file's parse is shared
+        (Py/ccg_diff.py keys parses by git blob id, so repeated diffs also reuse them). Both CCGs
+        are resolved and compared; the delta is written as ccg_delta.json with a rendered
+        architecture_changes.md under <output_root>/<repo>/diffs/<base>..<head>/ (short shas).
+
+        Returns:
+            dict: 'success', 'repo_name', 'base' / 'head' ({'ref', 'commit'}), 'summary' (delta
+                  counts), 'files' (changed paths by status), 'delta_path', 'report_path',
+                  'metrics' (stage seconds, files parsed and parses reused per ref), 'trace'
+                  (when this call exported one) or 'error', with 'error_code' 'bad_ref' for a
+                  ref that names no commit and the git codes of run() for clone failures.
+        """
+        if not (tracing.ENABLED if trace is None else trace) or tracing.active():
+            with tracing.span("diff", url=repo_url, base=base, head=head):
+                return self._diff(repo_url, base, head, verbose)
+        with tracing.start("diff", url=repo_url, base=base, head=head) as root:
+            result = self._diff(repo_url, base, head, verbose)
+            root.set(success=result["success"], error=result.get("error"), failed_stage=result.get("stage"))
+        result["trace"] = tracing.export(root.tracer, os.path.join(self.output_root, repo_clone.repo_name(repo_url)))
+        if verbose:
+            print(f"[Tracing] {result['trace']['spans']} spans written to {result['trace']['chrome']}")
+        return result
+
+    def _diff(self, repo_url: str, base: str, head: str, verbose: bool) -> dict:
+        metrics = {"stages": {}}
+        stages = tracing.StageSpans()
+        stage = stages.enter("clone")
+        cloned = None
+        tracked = []
+        try:
+            if verbose:
+                print(f"\n[Orchestrator] Comparing {base}..{head} of {repo_url}")
+            stage_start = time.perf_counter()
+            cloned = repo_clone.clone_refs(repo_url, [base, head])
+            repo_name, repo_root = cloned["name"], cloned["root"]
+            base_sha, head_sha = cloned["commits"][base], cloned["commits"][head]
+            metrics["stages"]["clone"] = round(time.perf_counter() - stage_start, 3)
+            if verbose:
+                print(f"  ✓ Cloned to {repo_root}: {base} = {base_sha[:12]}, {head} = {head_sha[:12]}")
+
+            # Changed files; only those of them that exist at the base are checked out for it
+            stage = stages.enter("changes")
+            stage_start = time.perf_counter()
+            changes = ccg_diff.changed_files(repo_root, base_sha, head_sha)
+            extensions = analyzers.supported_extensions()
+            head_files = self._collect_source_files(repo_clone.generate_file_tree(repo_root), repo_root, limit=None)
+            base_changed = sorted(rel for rel, status in changes.items()
+                                  if status != "added" and ccg_diff.is_source(rel, extensions))
+            base_dir = os.path.join(cloned["repo_dir"], "base", repo_name)
+            ccg_diff.checkout_paths(repo_root, base_dir, base_sha, base_changed)
+            local = lambda directory, rel: os.path.join(directory, *rel.split("/"))
+            changed_paths = {local(repo_root, rel) for rel in changes}
+            base_files = ([p for p in head_files if p not in changed_paths]
+                          + [local(base_dir, rel) for rel in base_changed])
+            head_blobs = ccg_diff.blob_ids(repo_root, head_sha)
+            base_blobs = ccg_diff.blob_ids(repo_root, base_sha)
+            blobs = {local(repo_root, rel): oid for rel, oid in head_blobs.items()}
+            blobs.update({local(base_dir, rel): base_blobs[rel] for rel in base_changed})
+            self.diff_cache.track(blobs)
+            tracked = list(blobs)
+            source_changed = sum(1 for rel in changes if ccg_diff.is_source(rel, extensions))
+            metrics["stages"]["changes"] = round(time.perf_counter() - stage_start, 3)
+            if verbose:
+                print(f"  ✓ {len(changes)} files changed, {source_changed} of them source files")
+
+            # Head in full, then the base: unchanged files are cache hits, changed ones their base version
+            stage = stages.enter("code_analyzer")
+            stage_start = time.perf_counter()
+            ccgs = {}
+            for side, files in (("head", head_files), ("base", base_files)):
+                ccg = parser_ccg.build_ccg_for_files(files, self.parse_budgets, cache=self.diff_cache,
+                                                     executor=self.executor) if files else None
+                reused = ccg["metrics"]["cache_hits"] if ccg else 0
+                if side == "base":
+                    ccg = ccg_diff.rebase_paths(ccg, base_dir, repo_root)
+                with tracing.span("resolve_calls", ref=side):
+                    ccgs[side] = call_resolver.resolve_calls(ccg, repo_root)
+                metrics[f"{side}_files"] = {"files": len(files), "reused": reused, "parsed": len(files) - reused}
+            metrics["stages"]["code_analyzer"] = round(time.perf_counter() - stage_start, 3)
+            if verbose:
+                print(f"  ✓ {head}: {metrics['head_files']['parsed']} files parsed, "
+                      f"{metrics['head_files']['reused']} reused; {base}: {metrics['base_files']['parsed']} parsed, "
+                      f"{metrics['base_files']['reused']} reused")
+
+            stage = stages.enter("compare")
+            stage_start = time.perf_counter()
+            delta = {
+                "repo_name": repo_name,
+                "url": repo_url,
+                "base": {"ref": base, "commit": base_sha},
+                "head": {"ref": head, "commit": head_sha},
+                "files": {status: sorted(rel for rel, s in changes.items() if s == status)
+                          for status in ("added", "deleted", "modified")},
+            }
+            delta["files"]["source"] = source_changed
+            delta.update(ccg_diff.compare(ccgs["base"], ccgs["head"], repo_root))
+            metrics["stages"]["compare"] = round(time.perf_counter() - stage_start, 3)
+
+            stage = stages.enter("render")
+            stage_start = time.perf_counter()
+            outputs = renderers.render_diff(
+                delta, os.path.join(self.output_root, repo_name, ccg_diff.DIFF_DIRNAME,
+                                    f"{base_sha[:12]}..{head_sha[:12]}"),
+                ccg_diff.REPORT_FILE, ccg_diff.DELTA_FILE, ccg_diff.MAX_LISTED)
+            metrics["stages"]["render"] = round(time.perf_counter() - stage_start, 3)
+            if verbose:
+                summary = delta["summary"]
+                print(f"  ✓ Classes +{summary['classes_added']} -{summary['classes_removed']}, call edges "
+                      f"+{summary['calls_added']} -{summary['calls_removed']}, import cycles "
+                      f"+{summary['import_cycles_added']} -{summary['import_cycles_removed']}")
+                print(f"  ✓ Architecture changes saved to {outputs['markdown']}")
+
             return {
+                "success": True,
+                "repo_name": repo_name,
+                "base": delta["base"],
+                "head": delta["head"],
+                "summary": delta["summary"],
+                "files": delta["files"],
+                "delta_path": outputs["json"],
+                "report_path": outputs["markdown"],
+                "metrics": metrics,
+            }
+
+        except Exception as e:
+            if verbose:
+                print(f"  ✗ Error in {stage}: {e}")
+            result = {
                 "success": False,
                 "error": str(e),
+                "error_type": type(e).__name__,
+                "stage": stage,
                 "repo_url": repo_url,
             }
+            if isinstance(e, git_exec.GitError):
+                result["error_code"] = {git_exec.GitTimeout: "git_timeout", git_exec.GitBusy: "git_busy"}.get(
+                    type(e), "git_failed")
+            elif isinstance(e, ValueError) and stage == "clone":
+                result["error_code"] = "bad_ref"
+            return result
+        finally:
+            stages.close()
+            self.diff_cache.forget(tracked)
+            if cloned is not None:
+                shutil.rmtree(cloned["repo_dir"], ignore_errors=True)
 
     def _collect_python_files(self, tree: dict, repo_root: str, limit: Optional[int] = 10) -> list:
         """
         Recursively collect Python file paths from the tree, limited to first `limit` files.
         If limit is None, collects ALL Python files.
         """
+        return self._collect_source_files(tree, repo_root, limit, extensions={".py"})
+
+    def _collect_source_files(self, tree: dict, repo_root: str, limit: Optional[int] = 10,
+                              extensions: Optional[set] = None) -> list:
+        """
+        Recursively collect file paths whose extension has a registered analyzer
+        (or is in `extensions`), limited to first `limit` files. If limit is None, collects ALL.
+        """
+        if extensions is None:
+            extensions = analyzers.supported_extensions()
         py_files = []
 
         def walk(node, depth=0):
@@ -107,7 +683,7 @@ class Orchestrator:
             if isinstance(node, dict):
                 # Handle file nodes
                 if node.get("type") == "file":
-                    if node.get("name", "").endswith(".py"):
+                    if os.path.splitext(node.get("name", ""))[1].lower() in extensions:
                         path = node.get("path", os.path.join(repo_root, node.get("name", "")))
                         py_files.append(path)
                 # Handle directory nodes or root
@@ -119,154 +695,271 @@ class Orchestrator:
         walk(tree)
         return py_files
 
-    def _generate_docs(self, repo_name: str, repo_info: dict, ccg: Optional[dict], ccg_mermaid: Optional[str]) -> str:
+    def _generate_docs(self, repo_name: str, repo_info: dict, ccg: Optional[dict], ccg_mermaid: Optional[str],
+                       formats: Optional[list] = None, report: Optional[dict] = None) -> dict:
         """
-        Generate comprehensive markdown documentation with CCG analysis.
-        Includes Overview, Installation, Architecture, API Reference, and Code Context Graph.
+        Render the documentation for one repository in each requested format
+        (markdown, html, json; default self.formats). Returns {format: path}; `report` receives
+        the content hashes and changed documents (see renderers.render).
         """
         output_dir = os.path.join(self.output_root, repo_name)
-        os.makedirs(output_dir, exist_ok=True)
-        docs_path = os.path.join(output_dir, "docs.md")
-
-        md_lines = []
-
-        # ─── Header ───
-        md_lines.append(f"# {repo_name} - Auto-Generated Documentation\n")
+        context = self._docs_context(repo_name, repo_info, ccg, ccg_mermaid)
+        return renderers.render(context, output_dir, formats or self.formats, report)
 
-        # ─── Overview Section ───
-        md_lines.append("## Overview\n")
-        readme_summary = repo_info.get("readme_summary", "No README available.")
-        md_lines.append(f"{readme_summary}\n")
-
-        # ─── Installation Section (NEW) ───
-        md_lines.append("## Installation\n")
+    def _docs_context(self, repo_name: str, repo_info: dict, ccg: Optional[dict], ccg_mermaid: Optional[str]) -> dict:
+        """
+        Everything DocGenie documents, independent of output format: Overview, Installation,
+        Repository Structure, Architecture, Dependencies, Import Graph, Code Metrics, API Reference,
+        Call Graph, Mermaid diagram, Metadata.
+        Sections that grow with the repository are zero-argument callables returning iterators,
+        so every renderer streams them instead of receiving materialized lists. Keys starting with
+        an underscore feed particular renderers (the complete per-file analysis behind sharded
+        output) and are not part of docs.json.
+        """
         repo_root = repo_info.get("root", ".")
-        req_path = os.path.join(repo_root, "requirements.txt")
-        if os.path.exists(req_path):
-            try:
-                with open(req_path, 'r') as f:
-                    reqs = f.read().strip().split('\n')[:5]  # First 5 requirements
-                md_lines.append("```bash\npip install -r requirements.txt\n```\n")
-                md_lines.append("**Key dependencies:**\n")
-                for req in reqs:
-                    if req.strip() and not req.startswith('#'):
-                        md_lines.append(f"- {req}\n")
-            except:
-                md_lines.append(f"```bash\npip install {repo_name.lower()}\n```\n")
-        else:
-            md_lines.append(f"```bash\npip install {repo_name.lower()}\n```\n")
-
-        # ─── File Structure Section ───
-        md_lines.append("## Repository Structure\n")
-        file_tree = repo_info.get("file_tree", {})
-        tree_str = self._format_file_tree(file_tree)
-        md_lines.append(f"```\n{tree_str}\n```\n")
-
-        # ─── Architecture Section (NEW - Uses CCG) ───
+
+        summaries = repo_info.get("summaries") or {}
+
+        # ─── Installation / Dependencies ───
+        deps = repo_info.get("dependencies")
+        if deps is None:
+            deps = dependencies.analyze(repo_root, ccg)
+        installation = {
+            "command": "\n".join(deps["install"]) or f"pip install {repo_name.lower()}",
+            "dependencies": [_requirement_line(dep) for dep in deps["declared"] if "main" in dep["groups"]],
+        }
+
+        context = {
+            "repo_name": repo_name,
+            "overview": summaries.get("readme") or repo_info.get("readme_summary", "No README available."),
+            "installation": installation,
+            "file_tree": lambda: self._iter_file_tree(repo_info.get("file_tree", {})),
+            "architecture": None,
+            "dependencies": deps if deps["manifests"] or any(deps["imports"].values()) else None,
+            "import_graph": None,
+            "code_metrics": None,
+            "api_reference": None,
+            "call_graph": None,
+            "resolution": None,
+            "mermaid": ccg_mermaid,
+            "_sources": None,
+        }
+
+        # ─── Architecture / API Reference / Call Graph (from the CCG) ───
         if ccg:
-            md_lines.append("## Architecture\n\n")
-            
-            # Extract classes (key components)
             classes = ccg.get("classes", [])
-            if classes:
-                md_lines.append("### Key Components\n")
-                for cls in classes[:10]:  # Top 10 classes
-                    parent_str = f" (extends {cls['parent']})" if cls.get('parent') else ""
-                    md_lines.append(f"- **{cls['name']}{parent_str}**: Core component\n")
-                md_lines.append("")
-
-            # Extract relationships
-            inheritance = ccg.get("inheritance", [])
-            if inheritance:
-                md_lines.append("### Class Hierarchy\n")
-                for rel in inheritance[:10]:
-                    md_lines.append(f"- `{rel['child']}` extends `{rel['parent']}`\n")
-                md_lines.append("")
-
-            # Extract imports (dependencies)
-            imports = ccg.get("imports", [])
-            if imports:
-                unique_imports = list(set([imp["module"] for imp in imports[:10]]))
-                if unique_imports and unique_imports[0] != repo_name.lower():
-                    md_lines.append("### Module Dependencies\n")
-                    for imp in unique_imports[:10]:
-                        md_lines.append(f"- `{imp}`\n")
-                    md_lines.append("")
-
-        # ─── API Reference Section (NEW - Uses CCG) ───
-        if ccg:
+            modules = ccg.get("modules", {})
+            class_summaries = summaries.get("classes", {})
+            tree = repo_info["hierarchy"] if "hierarchy" in repo_info else hierarchy.analyze(ccg)
+            context["architecture"] = {
+                "components": [{"name": cls["name"], "parent": cls.get("parent"), "bases": _bases(cls),
+                                "docstring": cls.get("docstring"),
+                                "summary": class_summaries.get(f"{modules.get(cls['file'])}.{cls.get('qualname', cls['name'])}")}
+                               for cls in classes[:10]],
+                "hierarchy": {k: v for k, v in tree.items() if k != "seconds"} if tree and tree["trees"] else None,
+            }
             functions = ccg.get("functions", [])
-            if functions:
-                md_lines.append("## API Reference\n\n")
-                md_lines.append("### Key Functions\n")
-                for func in functions[:15]:  # Top 15 functions
-                    md_lines.append(f"- `{func['name']}`\n")
-                md_lines.append("")
-
-        # ─── Function Calls (NEW - Uses CCG) ───
+            api_modules = self._api_modules(ccg, repo_root, summaries)
+            if functions or api_modules:
+                context["api_reference"] = {
+                    "key_functions": lambda: (_api_entry(func) for func in functions[:15]),  # Top 15 functions
+                    "modules": lambda: iter(api_modules),
+                }
+            graph = repo_info["import_graph"] if "import_graph" in repo_info else import_graph.analyze(ccg, repo_root)
+            if graph and graph["edges"]:
+                # Timings belong in metrics; docs are a pure function of the repository
+                context["import_graph"] = {k: v for k, v in graph.items() if k != "seconds"}
+            stats = repo_info["code_metrics"] if "code_metrics" in repo_info else code_metrics.analyze(ccg)
+            if stats:
+                context["code_metrics"] = {k: v for k, v in stats.items() if k != "seconds"}
+            context["_sources"] = lambda: self._iter_sources(ccg, repo_root)
+            if ccg.get("calls"):
+                context["call_graph"] = lambda: self._iter_call_graph(ccg)
+                context["resolution"] = ccg.get("resolution")
+
+        # ─── Metadata ───
+        metadata = {
+            "repo_name": repo_name,
+            # Where the docs came from, not where they were built: the clone lives in a temp directory
+            "source": repo_info.get("url"),
+            "commit": repo_info.get("commit"),
+            "stats": None,
+            "coverage": None,
+            "skipped": None,
+            "out_of_time": 0,
+        }
         if ccg:
-            calls = ccg.get("calls", [])
-            if calls:
-                # Group calls by caller
-                calls_by_caller = {}
-                for call in calls:
-                    caller = call["caller"]
-                    callee = call["callee"]
-                    if caller not in calls_by_caller:
-                        calls_by_caller[caller] = []
-                    calls_by_caller[caller].append(callee)
-                
-                if calls_by_caller:
-                    md_lines.append("## Call Graph (Main Interactions)\n\n")
-                    for caller, callees in list(calls_by_caller.items())[:8]:  # Top 8 functions
-                        unique_callees = list(set(callees))[:5]  # Top 5 unique calls
-                        md_lines.append(f"- **{caller}** calls: {', '.join(unique_callees)}\n")
-                    md_lines.append("")
-
-        # ─── Code Context Graph (Mermaid) ───
-        if ccg_mermaid:
-            md_lines.append("## Code Context Graph (Module Diagram)\n")
-            md_lines.append("```mermaid\n")
-            md_lines.append(ccg_mermaid)
-            md_lines.append("\n```\n")
-
-        # ─── Metadata Section ───
-        md_lines.append("## Metadata\n")
-        md_lines.append(f"- **Repository Name**: {repo_name}\n")
-        md_lines.append(f"- **Root Path**: {repo_info.get('root', 'N/A')}\n")
-        md_lines.append(f"- **Generated at**: {repo_info.get('repo_dir', 'N/A')}\n")
-        
-        # Add CCG stats
-        if ccg:
-            md_lines.append(f"- **Functions Analyzed**: {len(ccg.get('functions', []))}\n")
-            md_lines.append(f"- **Classes Analyzed**: {len(ccg.get('classes', []))}\n")
-            md_lines.append(f"- **Function Calls Tracked**: {len(ccg.get('calls', []))}\n")
-
-        # Write to file
-        with open(docs_path, "w", encoding="utf-8") as f:
-            f.write("\n".join(md_lines))
-
-        return docs_path
-
-    def _format_file_tree(self, tree: dict, prefix: str = "", max_depth: int = 3, current_depth: int = 0) -> str:
+            metadata["stats"] = {
+                "functions": len(ccg.get("functions", [])),
+                "classes": len(ccg.get("classes", [])),
+                "calls": len(ccg.get("calls", [])),
+            }
+            skipped = ccg.get("skipped", [])
+            out_of_time = sum(1 for entry in skipped if entry["reason"] == "repo_timeout")
+            plan = repo_info.get("analysis_plan")
+            if plan:
+                budget = ", ".join(f"{k}={v}" for k, v in plan["budget"].items() if v is not None)
+                metadata["coverage"] = {"analyzed": plan["planned"] - out_of_time, "total": plan["total"], "budget": budget}
+            if skipped:
+                root = repo_info.get("root", "")
+                metadata["skipped"] = lambda: (
+                    {"file": os.path.relpath(entry["path"], root) if root else entry["path"],
+                     "action": entry["action"], "reason": entry["reason"], "detail": entry.get("detail", "")}
+                    for entry in skipped if entry["reason"] != "repo_timeout"
+                )
+                metadata["out_of_time"] = out_of_time
+        context["metadata"] = metadata
+        return context
+
+    def _api_modules(self, ccg: dict, repo_root: str, summaries: Optional[dict] = None) -> list:
         """
-        Format a file tree dict as a string (simple tree view).
+        Per-module API pages from the CCG, ordered by module name:
+        [{"module", "file", "slug", "summary", "classes": [{..., "summary", "methods"}], "functions"}].
+        Private names (leading underscore, except __init__) and nested functions are left out,
+        as are modules with nothing public.
+        """
+        modules = ccg.get("modules", {})
+        summaries = summaries or {}
+        pages = {}
+
+        def page_for(path: str) -> dict:
+            page = pages.get(path)
+            if page is None:
+                rel = os.path.relpath(path, repo_root)
+                module = modules.get(path) or os.path.splitext(rel)[0].replace(os.sep, ".")
+                page = pages[path] = {"module": module, "file": rel, "summary": summaries.get("modules", {}).get(module),
+                                      "classes": [], "functions": [], "_classes": {}}
+            return page
+
+        for cls in ccg.get("classes", []):
+            qualname = cls.get("qualname", cls["name"])
+            if not all(_is_public(part) for part in qualname.split(".")):
+                continue
+            page = page_for(cls["file"])
+            entry = _api_entry(cls)
+            entry.update(qualname=qualname, parent=cls.get("parent"), bases=_bases(cls), kind=cls.get("kind"), methods=[],
+                         summary=summaries.get("classes", {}).get(f"{page['module']}.{qualname}"))
+            page["classes"].append(entry)
+            page["_classes"][qualname] = entry
+
+        for func in ccg.get("functions", []):
+            owner, _, name = func.get("qualname", func["name"]).rpartition(".")
+            if not _is_public(name):
+                continue
+            if not owner:
+                page_for(func["file"])["functions"].append(_api_entry(func))
+            elif func["file"] in pages and owner in pages[func["file"]]["_classes"]:
+                pages[func["file"]]["_classes"][owner]["methods"].append(_api_entry(func))
+
+        ordered = []
+        slugs = set()
+        for page in sorted(pages.values(), key=lambda p: (p["module"], p["file"])):
+            del page["_classes"]
+            slug = re.sub(r"[^\w.-]", "_", page["module"]) or "module"
+            while slug in slugs:
+                slug += "_"
+            slugs.add(slug)
+            page["slug"] = slug
+            ordered.append(page)
+        return ordered
+
+    def _iter_sources(self, ccg: dict, repo_root: str) -> Iterator[dict]:
+        """
+        Complete, untruncated analysis of every file, ordered by module (sharded output):
+        {"module", "file", "classes", "functions", "calls": [{"caller", "callees"}], "imports",
+        "inheritance", "skipped"}. Paths are repository-relative so unchanged files produce
+        identical records from one clone to the next.
+        """
+        modules = ccg.get("modules", {})
+        sources = {}
+
+        def source_for(path: str) -> dict:
+            source = sources.get(path)
+            if source is None:
+                rel = os.path.relpath(path, repo_root)
+                source = sources[path] = {
+                    "module": modules.get(path) or os.path.splitext(rel)[0].replace(os.sep, "."),
+                    "file": rel, "classes": [], "functions": [], "calls": {}, "imports": [],
+                    "inheritance": [], "skipped": [],
+                }
+            return source
+
+        for cls in ccg.get("classes", []):
+            entry = _api_entry(cls)
+            entry.update(qualname=cls.get("qualname", cls["name"]), parent=cls.get("parent"), bases=_bases(cls),
+                         kind=cls.get("kind"))
+            source_for(cls["file"])["classes"].append(entry)
+        for func in ccg.get("functions", []):
+            entry = _api_entry(func)
+            entry["qualname"] = func.get("qualname", func["name"])
+            source_for(func["file"])["functions"].append(entry)
+        for call in ccg.get("calls", []):
+            callee = call.get("target") if call.get("resolution") == "resolved" else call["callee"]
+            callers = source_for(call["file"])["calls"]
+            callers.setdefault(call.get("caller_qualname", call["caller"]), {})[callee] = None
+        for imp in ccg.get("imports", []):
+            source_for(imp["file"])["imports"].append(imp.get("path", imp["module"]))
+        for rel in ccg.get("inheritance", []):
+            if rel.get("file"):
+                source_for(rel["file"])["inheritance"].append({"child": rel["child"], "parent": rel["parent"]})
+        for entry in ccg.get("skipped", []):
+            source_for(entry["path"])["skipped"].append(
+                {"action": entry["action"], "reason": entry["reason"], "detail": entry.get("detail", "")})
+
+        for source in sorted(sources.values(), key=lambda s: (s["module"], s["file"])):
+            source["calls"] = [{"caller": caller, "callees": list(callees)} for caller, callees in source["calls"].items()]
+            source["imports"] = list(dict.fromkeys(source["imports"]))
+            yield source
+
+    def _iter_call_graph(self, ccg: dict, max_callers: int = 8, max_callees: int = 5) -> Iterator[dict]:
+        """
+        The first `max_callers` callers (qualified module.Class.method, so same-named functions in
+        different modules stay distinct) with up to `max_callees` unique callees each, resolved
+        targets where known. Scans calls once and stops as soon as every slot is full.
+        """
+        modules = ccg.get("modules", {})
+        calls_by_caller = {}
+        full = 0
+        for call in ccg.get("calls", []):
+            module = modules.get(call.get("file"))
+            caller = call.get("caller_qualname", call["caller"])
+            if module:
+                caller = f"{module}.{caller}"
+            callees = calls_by_caller.get(caller)
+            if callees is None:
+                if len(calls_by_caller) >= max_callers:
+                    continue
+                callees = calls_by_caller[caller] = {}
+            if len(callees) >= max_callees:
+                continue
+            callee = call.get("target") if call.get("resolution") == "resolved" else call["callee"]
+            callees[callee] = None
+            if len(callees) == max_callees:
+                full += 1
+                if full == max_callers:
+                    break
+        for caller, callees in calls_by_caller.items():
+            yield {"caller": caller, "callees": list(callees)}
+
+    def _iter_file_tree(self, tree: dict, prefix: str = "", max_depth: int = 3, current_depth: int = 0,
+                        max_children: int = 20) -> Iterator[str]:
+        """
+        Lines of a simple tree view of a file tree dict (depth and children per directory capped).
+        The root dict from repo_clone.generate_file_tree carries no "type"; it is a directory.
         """
-        if current_depth >= max_depth:
-            return ""
-
-        lines = []
-        name = tree.get("name", "root")
         if current_depth == 0:
-            lines.append(name + "/")
-        else:
-            lines.append(prefix + name + ("/" if tree.get("type") == "dir" else ""))
-
-        if tree.get("type") == "dir" and tree.get("children"):
-            children = tree["children"]
-            for i, child in enumerate(children[:20]):  # Limit displayed children
-                is_last = i == len(children) - 1
-                child_prefix = prefix + ("    " if is_last else "│   ")
-                lines.append(self._format_file_tree(child, child_prefix, max_depth, current_depth + 1))
-
-        return "\n".join(filter(None, lines))
+            yield tree.get("name", "root") + "/"
+        if current_depth + 1 >= max_depth:
+            return
+
+        children = tree.get("children") or []
+        shown = children[:max_children]
+        for i, child in enumerate(shown):
+            is_last = i == len(shown) - 1 and len(children) <= max_children
+            name = child["name"] + ("/" if child.get("type") == "dir" else "")
+            yield prefix + ("└── " if is_last else "├── ") + name
+            if child.get("type") == "dir":
+                yield from self._iter_file_tree(child, prefix + ("    " if is_last else "│   "),
+                                                max_depth, current_depth + 1, max_children)
+        if len(children) > max_children:
+            yield prefix + f"└── … {len(children) - max_children} more"
@@ -2,155 +2,915 @@
 """
 Code Context Graph (CCG) builder for analyzing Python codebases.
 Uses tree-sitter for AST parsing (if available), falls back to regex-based parsing.
+The regex extractor is language-agnostic (see LanguageSpec); other languages plug in via Py/analyzers.py.
 """
 
+import contextlib
+import heapq
+import mmap
 import os
 import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from itertools import repeat
 from pathlib import Path
-from typing import Optional, Dict, List
-
-try:
-    import networkx as nx
-    HAS_NETWORKX = True
-except ImportError:
-    HAS_NETWORKX = False
-    nx = None
-
-try:
-    from tree_sitter import Language, Parser
-    HAS_TREE_SITTER = True
-except ImportError:
-    HAS_TREE_SITTER = False
-
-# Try to initialize tree-sitter if available
+from typing import Optional, Dict, Iterator, List
+
+from Py import tracing
+
+# Optional heavy dependencies are probed lazily (on first attribute access) so that
+# importing the parser stays cheap for CLI runs, the Jac bridge and API cold starts.
 PARSER = None
-if HAS_TREE_SITTER:
-    try:
+_OPTIONAL = {}
+
+
+def _probe_optional() -> dict:
+    if not _OPTIONAL:
+        try:
+            import networkx as nx
+            _OPTIONAL.update(HAS_NETWORKX=True, nx=nx)
+        except ImportError:
+            _OPTIONAL.update(HAS_NETWORKX=False, nx=None)
+
         # Modern tree-sitter API: Language.build_library() or use pre-built languages
         # For now, we'll skip tree-sitter and use regex fallback to avoid complex binary compilation
-        HAS_TREE_SITTER = False
-    except Exception as e:
-        print(f"[Parser] Tree-sitter initialization failed: {e}")
-        HAS_TREE_SITTER = False
+        _OPTIONAL["HAS_TREE_SITTER"] = False
+    return _OPTIONAL
+
+
+def __getattr__(name: str):
+    # PEP 562: HAS_NETWORKX, nx and HAS_TREE_SITTER resolve on first use
+    if name in ("HAS_NETWORKX", "nx", "HAS_TREE_SITTER"):
+        return _probe_optional()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
+# Resource budgets for parsing. Any budget set to None is disabled.
+DEFAULT_BUDGETS = {
+    "max_file_bytes": 2 * 1024 * 1024,  # larger files are skipped
+    "max_lines": 20000,                 # longer files are sampled (first max_lines lines)
+    "max_line_length": 10000,           # files with longer lines (minified/generated) are skipped
+    "file_timeout": 5.0,                # seconds per file
+    "repo_timeout": 600.0,              # seconds for the whole repository
+}
 
-def parse_python_file_regex(path: str) -> dict:
+
+class BudgetExceeded(Exception):
+    """Raised when a file (or the whole run) exceeds one of the parse budgets."""
+
+    def __init__(self, reason: str, detail: str = ""):
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+        self.detail = detail
+
+
+def resolve_budgets(budgets: Optional[dict] = None) -> dict:
+    """Merge caller overrides onto DEFAULT_BUDGETS."""
+    merged = dict(DEFAULT_BUDGETS)
+    if budgets:
+        merged.update(budgets)
+    return merged
+
+
+def _check_deadline(deadline: Optional[float]) -> None:
+    if deadline is not None and time.monotonic() > deadline:
+        raise BudgetExceeded("file_timeout", "parse did not finish within the time budget")
+
+
+# ─── Extraction patterns ───
+# A LanguageSpec compiles each pattern twice from the same source: once for decoded text,
+# once for raw bytes (memory-mapped files). The bytes flavour only ever scans files whose
+# bytes mean the same under both (see _load_mmap), so both backends extract the same records.
+
+
+class LanguageSpec:
     """
-    Enhanced regex-based Python parser.
-    Extracts functions, classes, calls, inheritance, and imports.
+    Regex description of a language for the generic extractor.
+
+    Pattern sources write `{ident}` for an identifier and use named groups:
+    `name` (definitions, classes, globals, calls), `parent` (base list), `kind`
+    (optional class flavour, e.g. Jac walker/node), `receiver` (Go-style method owner),
+    `qualifier` (dotted prefix of a call, e.g. `self` or `os.path`), `module` (imports)
+    and `is_async` (async definitions).
+    When `next_def` is None, a function body ends at the next definition found.
+    `import_entries(groups)` turns one import match into import records; the default
+    records just the `module` group.
+
+    API documentation is read in the same pass: `sig_tail` matches from a definition's closing
+    parenthesis to the start of its body (optional `returns` group), `docstring` is a string
+    literal matched where the body starts (with `class_tail` ending a class header), otherwise
+    a doc comment directly above the definition is used (`/** */` blocks or `line_comment` runs).
+    Lines starting with `decorator` above a definition are recorded as its decorators.
     """
-    try:
-        code = Path(path).read_text(encoding="utf-8", errors="ignore")
-    except Exception as e:
-        print(f"[Parser] Could not read {path}: {e}")
-        return {"functions": [], "classes": [], "calls": [], "imports": [], "inheritance": []}
 
-    result = {"functions": [], "classes": [], "calls": [], "imports": [], "inheritance": []}
+    def __init__(self, name: str, defs: list, classes: list, calls: str, imports: list,
+                 next_def: Optional[str] = None, globals_: Optional[list] = None,
+                 parent: str = r"(?P<name>{ident}(?:\.{ident})*)", ident: str = r"\w+",
+                 ident_bytes: Optional[str] = None, skip_calls=(), ignore_parents=(),
+                 import_entries=None, sig_tail: Optional[str] = None, docstring: Optional[str] = None,
+                 class_tail: Optional[str] = None, line_comment: Optional[str] = "//",
+                 decorator: Optional[str] = None):
+        self.name = name
+        self.skip_calls = frozenset(skip_calls)
+        self.ignore_parents = frozenset(ignore_parents)
+        self.import_entries = import_entries or (lambda groups: [{"module": groups["module"]}])
+        self.line_comment = line_comment
+        self.decorator = decorator
+        sources = {
+            "defs": defs,
+            "classes": classes,
+            "globals": globals_ or [],
+            "imports": imports,
+            "parent": [parent],
+            "call": [calls],
+            "next_def": [next_def] if next_def else [],
+            "newline": [r"\n"],
+            "indent": [r"[ \t]*"],
+            "paren": [r"[()]"],
+            "lparen": [r"\("],
+            "sig_open": [r"[ \t]*(?:\*[ \t]*)?(?:{ident}[ \t]*)?(?:<[^>\n]*>[ \t]*)?\("],
+            "sig_tail": [sig_tail] if sig_tail else [],
+            "docstring": [docstring] if docstring else [],
+            "class_tail": [class_tail] if class_tail else [],
+        }
+        self._sources = sources
+        self._idents = {"text": ident, "bytes": ident_bytes or ident}
+        self._compiled = {}
+
+    def _compile(self, flavour: str) -> dict:
+        ident = self._idents[flavour]
+        to_source = str if flavour == "text" else (lambda src: src.encode("ascii"))
+        return {
+            key: [re.compile(to_source(src.replace("{ident}", ident)), re.MULTILINE) for src in srcs]
+            for key, srcs in self._sources.items()
+        }
+
+    def patterns(self, buf) -> dict:
+        """Compiled patterns matching the buffer type; compiled on first use per flavour."""
+        flavour = "text" if isinstance(buf, str) else "bytes"
+        compiled = self._compiled.get(flavour)
+        if compiled is None:
+            compiled = self._compiled[flavour] = self._compile(flavour)
+        return compiled
+
+
+def _split_import_names(names: str) -> list:
+    """Split an import name list ('a as b, c', possibly parenthesized) into [[name, alias_or_None], ...]."""
+    pairs = []
+    for line in names.strip().strip("()").splitlines():
+        for item in line.split("#", 1)[0].replace("\\", "").split(","):
+            parts = item.split()
+            if not parts:
+                continue
+            pairs.append([parts[0], parts[2] if len(parts) == 3 and parts[1] == "as" else None])
+    return pairs
+
+
+def _python_import_entries(groups: dict) -> list:
+    """
+    `from X import a as b` -> one record with names; `import a.b as c, d` -> one record per module.
+    "module" stays the top-level name (relative imports keep their leading dots), "path" is the
+    full dotted path.
+    """
+    path = groups.get("module")
+    if path is not None:
+        top = path if path.startswith(".") else path.split(".")[0]
+        return [{"module": top, "path": path, "names": _split_import_names(groups["names"])}]
+    return [{"module": name.split(".")[0], "path": name, "alias": alias}
+            for name, alias in _split_import_names(groups["names"])]
+
+
+# First statement of a body when it is a string literal (triple- or single-quoted, optional prefix)
+_PY_DOCSTRING = (r'\s*[rRuU]{0,2}(?:"""(?P<d1>(?s:.*?))"""|' r"'''(?P<d2>(?s:.*?))'''|"
+                 r'"(?P<d3>[^"\\\n]*)"|' r"'(?P<d4>[^'\\\n]*)')")
+
+PYTHON_SPEC = LanguageSpec(
+    "python",
+    defs=[r"^\s*(?P<is_async>async\s+)?def\s+(?P<name>{ident})\s*\("],
+    classes=[r"^\s*class\s+(?P<name>{ident})\s*(?:\((?P<parent>[^)]*)\))?"],
+    calls=r"(?:(?P<qualifier>{ident}(?:\.{ident})*)\.)?(?P<name>{ident})\s*\(",
+    imports=[r"^[ \t]*from[ \t]+(?P<module>\.+(?:{ident}(?:\.{ident})*)?|{ident}(?:\.{ident})*)[ \t]+import[ \t]+"
+             r"(?P<names>\([^)]*\)|[^\n#;]+)",
+             r"^[ \t]*import[ \t]+(?P<names>{ident}(?:\.{ident})*(?:[ \t]+as[ \t]+{ident})?"
+             r"(?:[ \t]*,[ \t]*{ident}(?:\.{ident})*(?:[ \t]+as[ \t]+{ident})?)*)"],
+    next_def=r"\n\s*(?:async\s+)?(def|class)\s+{ident}",
+    skip_calls=['if', 'elif', 'for', 'while', 'with', 'try', 'except', 'return', 'yield',
+                'await', 'raise', 'assert', 'del', 'not', 'and', 'or', 'in', 'is', 'lambda',
+                'print', 'len', 'range', 'str', 'int', 'dict',
+                'list', 'set', 'tuple', 'open', 'isinstance', 'hasattr'],
+    ignore_parents=['object', 'ABC'],
+    import_entries=_python_import_entries,
+    sig_tail=r"\s*(?:->\s*(?P<returns>[^:\n]+?))?\s*:",
+    docstring=_PY_DOCSTRING,
+    class_tail=r"[^:\n]*:",
+    line_comment="#",
+    decorator="@",
+)
+
+
+def _decode_name(raw) -> str:
+    return raw if isinstance(raw, str) else raw.decode("utf-8", errors="ignore")
+
+
+def _split_bases(text: str) -> list:
+    """Top-level comma-separated entries of a base list; brackets and parentheses nest."""
+    parts = []
+    depth = start = 0
+    for i, ch in enumerate(text):
+        if ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _bases(parent_str: str, spec: LanguageSpec) -> list:
+    """
+    Every base named in a class header's base list, as written (dotted, e.g. typing.NamedTuple).
+    Keyword arguments (metaclass=...), star-unpacking and call expressions are not bases;
+    generic parameters are dropped (Generic[T] -> Generic).
+    """
+    pattern = spec.patterns("")["parent"][0]
+    if spec.line_comment and spec.line_comment in parent_str:
+        parent_str = "\n".join(line.split(spec.line_comment, 1)[0] for line in parent_str.splitlines())
+    bases = []
+    for part in _split_bases(parent_str):
+        part = part.strip()
+        match = pattern.match(part)
+        if not match or part[match.end():].lstrip().startswith(("=", "(")):
+            continue
+        name = match.group("name")
+        if name not in bases:
+            bases.append(name)
+    return bases
+
+
+def _newline_offsets(buf, pats: dict, end: int) -> array:
+    """Offsets of every newline in buf[:end]; line numbers then come from bisect, not slicing."""
+    return array("q", (m.start() for m in pats["newline"][0].finditer(buf, 0, end)))
+
+
+def _scan(patterns: list, buf, end: int):
+    """Matches of several patterns merged in offset order, de-duplicated on the name/module position."""
+    iters = [p.finditer(buf, 0, end) for p in patterns]
+    merged = iters[0] if len(iters) == 1 else heapq.merge(*iters, key=lambda m: m.start())
+    last = -1
+    for match in merged:
+        key = match.start(match.re.groupindex.get("name") or match.re.groupindex.get("module") or 0)
+        if key == last:
+            continue
+        last = key
+        yield match
+
+
+# API documentation limits: long signatures are cut off, docstrings keep their first part
+MAX_SIGNATURE_SCAN = 4000   # chars searched for a parameter list's closing parenthesis
+MAX_SIGNATURE_CHARS = 400
+MAX_DOCSTRING_CHARS = 1000
+MAX_DOC_COMMENT_LINES = 60
+
+
+# Whitespace and trailing commas inside multi-line parameter lists: "(\n    a,\n)" -> "(a)"
+_SIG_PADDING = re.compile(r"(?<=\()\s+|\s*,?\s*(?=\)$)")
+
+
+def _compact(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def _clean_doc(text: str) -> str:
+    """Dedent a docstring/comment body (like inspect.cleandoc) and cap its length."""
+    lines = text.expandtabs().split("\n")
+    indent = min((len(line) - len(line.lstrip()) for line in lines[1:] if line.strip()), default=0)
+    doc = "\n".join([lines[0].strip()] + [line[indent:].rstrip() for line in lines[1:]]).strip()
+    return doc if len(doc) <= MAX_DOCSTRING_CHARS else doc[:MAX_DOCSTRING_CHARS - 1] + "…"
+
+
+def _signature(buf, pats: dict, match, end: int) -> Optional[tuple]:
+    """
+    (params, returns, header_end) for the definition `match`: the balanced parameter list
+    after its name, the return annotation if the language's sig_tail finds one, and the
+    offset where the body starts. None when the definition has no parameter list.
+    """
+    name_end = match.end("name")
+    found = pats["lparen"][0].search(buf, name_end, match.end()) if match.end() > name_end else None
+    if found is None:
+        found = pats["sig_open"][0].match(buf, max(name_end, match.end()), end)
+        if found is None:
+            return None
+    open_ = found.end() - 1
+    depth = 0
+    close = None
+    for paren in pats["paren"][0].finditer(buf, open_, min(end, open_ + MAX_SIGNATURE_SCAN)):
+        depth += 1 if paren.group() in ("(", b"(") else -1
+        if depth == 0:
+            close = paren.start()
+            break
+    if close is None:
+        return None
+    params = _compact(_SIG_PADDING.sub("", _decode_name(buf[open_:close + 1])), MAX_SIGNATURE_CHARS)
+    returns = None
+    header_end = close + 1
+    if pats["sig_tail"]:
+        tail = pats["sig_tail"][0].match(buf, close + 1, end)
+        if tail:
+            header_end = tail.end()
+            if tail.group("returns"):
+                returns = _compact(_decode_name(tail.group("returns")), MAX_SIGNATURE_CHARS)
+    return params, returns, header_end
+
+
+def _docstring(buf, pats: dict, start: int, end: int) -> Optional[str]:
+    found = pats["docstring"][0].match(buf, start, end)
+    if found is None:
+        return None
+    raw = next(g for g in found.groups() if g is not None)
+    return _clean_doc(_decode_name(raw)) or None
+
+
+def _leading_docs(buf, spec: LanguageSpec, newlines: array, line_index: int, comments: bool = True) -> tuple:
+    """
+    Decorators and (when `comments`) the doc comment directly above the line `line_index` (0-based).
+    Only whole lines are read, a few per definition, so the cost does not grow with the file.
+    """
+    def line(i: int) -> str:
+        start = newlines[i - 1] + 1 if i else 0
+        stop = newlines[i] if i < len(newlines) else len(buf)
+        return _decode_name(buf[start:stop]).strip()
+
+    decorators = []
+    i = line_index - 1
+    if spec.decorator:
+        while i >= 0:
+            text = line(i)
+            if not text.startswith(spec.decorator):
+                break
+            decorators.append(_compact(text[len(spec.decorator):], MAX_SIGNATURE_CHARS))
+            i -= 1
+        decorators.reverse()
+
+    doc = None
+    if comments and i >= 0:
+        text = line(i)
+        comment = []
+        if text.endswith("*/"):
+            # /** ... */ block (JSDoc, Go/TS block comments)
+            for j in range(i, max(-1, i - MAX_DOC_COMMENT_LINES), -1):
+                text = line(j)
+                comment.append(text)
+                if text.startswith("/*"):
+                    break
+            else:
+                comment = []
+            comment.reverse()
+            comment = [c.lstrip("/*").rstrip("*/").strip() if k in (0, len(comment) - 1) else c.lstrip("*").strip()
+                       for k, c in enumerate(comment)]
+        elif spec.line_comment and text.startswith(spec.line_comment):
+            for j in range(i, max(-1, i - MAX_DOC_COMMENT_LINES), -1):
+                text = line(j)
+                if not text.startswith(spec.line_comment):
+                    break
+                comment.append(text[len(spec.line_comment):].strip())
+            comment.reverse()
+        doc = _clean_doc("\n".join(comment)) if comment else None
+    return decorators, doc or None
+
+
+def _describe(buf, pats: dict, spec: LanguageSpec, match, entry: dict, newlines: array, end: int,
+              is_function: bool) -> None:
+    """Add signature, returns, async, decorators and docstring to a definition entry (only keys that apply)."""
+    header_end = match.end()
+    if is_function:
+        sig = _signature(buf, pats, match, end)
+        if sig:
+            entry["signature"], returns, header_end = sig
+            if returns:
+                entry["returns"] = returns
+        if "is_async" in match.re.groupindex and match.group("is_async"):
+            entry["async"] = True
+    elif pats["class_tail"]:
+        tail = pats["class_tail"][0].match(buf, header_end, end)
+        header_end = tail.end() if tail else None
+    # Docstring languages ignore comments above a definition (usually unrelated code comments)
+    decorators, doc = _leading_docs(buf, spec, newlines, bisect_left(newlines, match.start("name")),
+                                    comments=not pats["docstring"])
+    if pats["docstring"] and header_end is not None:
+        doc = _docstring(buf, pats, header_end, end)
+    if decorators:
+        entry["decorators"] = decorators
+    if doc:
+        entry["docstring"] = doc
+
+
+def _extract(buf, spec: LanguageSpec, end: int, result: dict, deadline: Optional[float]) -> None:
+    """
+    Run the spec's extraction regexes over `buf` (str, bytes or mmap) up to offset `end`,
+    filling `result` in place. Works purely on offsets: no per-function or per-match copies.
+    """
+    pats = spec.patterns(buf)
+    newlines = _newline_offsets(buf, pats, end)
+
+    def line_of(offset: int) -> int:
+        return bisect_left(newlines, offset) + 1
+
+    def indent_of(offset: int) -> int:
+        i = bisect_left(newlines, offset)
+        line_start = newlines[i - 1] + 1 if i else 0
+        return pats["indent"][0].match(buf, line_start).end() - line_start
 
     # ─── Extract function definitions ───
-    func_matches = {}
-    for match in re.finditer(r"^\s*def\s+(\w+)\s*\(", code, re.MULTILINE):
-        func_name = match.group(1)
-        func_matches[func_name] = match
-        result["functions"].append({"name": func_name, "line": code[:match.start()].count("\n") + 1})
+    func_matches = []
+    for match in _scan(pats["defs"], buf, end):
+        _check_deadline(deadline)
+        entry = {"name": _decode_name(match.group("name")), "line": line_of(match.start("name"))}
+        if "receiver" in match.re.groupindex and match.group("receiver"):
+            entry["receiver"] = _decode_name(match.group("receiver"))
+        _describe(buf, pats, spec, match, entry, newlines, end, is_function=True)
+        func_matches.append((match, entry))
+        result["functions"].append(entry)
 
     # ─── Extract class definitions with inheritance ───
-    for match in re.finditer(r"^\s*class\s+(\w+)\s*(?:\(([^)]*)\))?", code, re.MULTILINE):
-        class_name = match.group(1)
-        parent_str = match.group(2)
-        
-        # Extract parent class (handle multiple inheritance, but take first)
-        parent = None
-        if parent_str:
-            # Extract first parent class name
-            parent_match = re.search(r"(\w+)", parent_str)
-            if parent_match:
-                parent = parent_match.group(1)
-        
-        result["classes"].append({
+    class_matches = []
+    for match in _scan(pats["classes"], buf, end):
+        _check_deadline(deadline)
+        class_name = _decode_name(match.group("name"))
+        parent_str = match.group("parent") if "parent" in match.re.groupindex else None
+        bases = _bases(_decode_name(parent_str), spec) if parent_str else []
+
+        # "parent" is the first base, kept for consumers that predate multiple bases
+        entry = {
             "name": class_name,
-            "parent": parent,
-            "line": code[:match.start()].count("\n") + 1
-        })
-        
-        # Track inheritance relationship
-        if parent and parent not in ['object', 'ABC']:
-            result["inheritance"].append({
-                "child": class_name,
-                "parent": parent
-            })
+            "parent": bases[0] if bases else None,
+            "line": line_of(match.start("name"))
+        }
+        if bases:
+            entry["bases"] = bases
+        if "kind" in match.re.groupindex:
+            entry["kind"] = _decode_name(match.group("kind"))
+        _describe(buf, pats, spec, match, entry, newlines, end, is_function=False)
+        class_matches.append((match, entry))
+        result["classes"].append(entry)
+
+        # Track inheritance relationships, one per base
+        for parent in bases:
+            if parent not in spec.ignore_parents:
+                result["inheritance"].append({
+                    "child": class_name,
+                    "parent": parent
+                })
+
+    # ─── Qualified names from indentation nesting (Class.method, outer.inner) ───
+    scopes = []
+    for match, entry in sorted(func_matches + class_matches, key=lambda pair: pair[0].start("name")):
+        indent = indent_of(match.start("name"))
+        while scopes and scopes[-1][0] >= indent:
+            scopes.pop()
+        if entry.get("receiver"):
+            entry["qualname"] = f"{entry.pop('receiver')}.{entry['name']}"
+        else:
+            entry["qualname"] = ".".join([name for _, name in scopes] + [entry["name"]])
+        scopes.append((indent, entry["name"]))
 
     # ─── Extract function calls within functions ───
-    for func_name, func_match in func_matches.items():
+    boundaries = None
+    if not pats["next_def"]:
+        boundaries = sorted(m.start() for m, _ in func_matches + class_matches)
+    has_qualifier = "qualifier" in pats["call"][0].groupindex
+    for func_match, func in func_matches:
+        _check_deadline(deadline)
         func_start = func_match.end()
         # Find next function or class definition
-        next_def = re.search(r"\n\s*(def|class)\s+\w+", code[func_start:])
-        if next_def:
-            func_end = func_start + next_def.start()
+        if boundaries is None:
+            next_def = pats["next_def"][0].search(buf, func_start, end)
+            func_end = next_def.start() if next_def else end
         else:
-            func_end = len(code)
-        func_body = code[func_start:func_end]
-        
-        # Find all function calls: name()
-        for call_match in re.finditer(r"(\w+)\s*\(", func_body):
-            called_func = call_match.group(1)
-            # Filter out Python keywords and builtins
-            if called_func not in ['if', 'for', 'while', 'with', 'try', 'except', 
-                                   'print', 'len', 'range', 'str', 'int', 'dict', 
-                                   'list', 'set', 'tuple', 'open', 'isinstance', 'hasattr']:
+            i = bisect_left(boundaries, func_start)
+            func_end = boundaries[i] if i < len(boundaries) else end
+
+        # Find all function calls: name() / qualifier.name()
+        for call_match in pats["call"][0].finditer(buf, func_start, func_end):
+            _check_deadline(deadline)
+            called_func = _decode_name(call_match.group("name"))
+            # Filter out keywords and builtins
+            if called_func not in spec.skip_calls:
+                qualifier = call_match.group("qualifier") if has_qualifier else None
                 result["calls"].append({
-                    "caller": func_name,
+                    "caller": func["name"],
                     "callee": called_func,
-                    "line": code[:func_start + call_match.start()].count("\n") + 1
+                    "line": line_of(call_match.start("name")),
+                    "caller_qualname": func["qualname"],
+                    "qualifier": _decode_name(qualifier) if qualifier else None,
                 })
 
     # ─── Extract import statements ───
-    # Match: import X, from X import Y
-    for match in re.finditer(r"^(?:from\s+(\w+)|import\s+(\w+))", code, re.MULTILINE):
-        module = match.group(1) or match.group(2)
-        result["imports"].append({
-            "module": module,
-            "line": code[:match.start()].count("\n") + 1
-        })
+    for match in _scan(pats["imports"], buf, end):
+        _check_deadline(deadline)
+        groups = {k: _decode_name(v) for k, v in match.groupdict().items() if v is not None}
+        line = line_of(match.start())
+        for entry in spec.import_entries(groups):
+            entry["line"] = line
+            result["imports"].append(entry)
+
+    # ─── Extract module-level globals (languages that declare them) ───
+    if pats["globals"]:
+        for match in _scan(pats["globals"], buf, end):
+            _check_deadline(deadline)
+            result["globals"].append({"name": _decode_name(match.group("name")), "line": line_of(match.start("name"))})
+
+
+# Keys every analyzer result (and the aggregated CCG) carries
+CCG_KEYS = ("functions", "classes", "calls", "imports", "inheritance", "globals")
+
+
+def _empty_result() -> dict:
+    return {key: [] for key in CCG_KEYS}
+
+
+def _file_deadline(budgets: dict) -> Optional[float]:
+    timeout = budgets.get("file_timeout")
+    deadline = budgets.get("deadline")
+    if timeout is not None:
+        file_deadline = time.monotonic() + timeout
+        deadline = file_deadline if deadline is None else min(deadline, file_deadline)
+    return deadline
+
 
+def _sample_end(buf, pats: dict, budgets: dict) -> tuple:
+    """
+    Enforce line-length and line-count budgets on an in-memory or mapped buffer.
+    Returns (end_offset, sampled_note); raises BudgetExceeded for files that must be skipped.
+    """
+    size = len(buf)
+    max_line_length = budgets.get("max_line_length")
+    if max_line_length is not None and size > max_line_length:
+        source = r"[^\n]{%d}" % (max_line_length + 1)
+        long_line = re.compile(source if isinstance(buf, str) else source.encode("ascii"))
+        if long_line.search(buf):
+            raise BudgetExceeded("max_line_length", f"a line exceeds {max_line_length} characters")
+
+    max_lines = budgets.get("max_lines")
+    if max_lines is not None:
+        newline = "\n" if isinstance(buf, str) else b"\n"
+        cut = -1
+        for _ in range(max_lines):
+            cut = buf.find(newline, cut + 1)
+            if cut == -1:
+                return size, None
+        if cut < size - 1:
+            total = max_lines + sum(1 for _ in pats["newline"][0].finditer(buf, cut + 1)) + 1
+            return cut, f"first {max_lines} of {total} lines"
+    return size, None
+
+
+def _check_file_size(size: int, budgets: dict) -> None:
+    max_bytes = budgets.get("max_file_bytes")
+    if max_bytes is not None and size > max_bytes:
+        raise BudgetExceeded("max_file_bytes", f"{size} bytes > {max_bytes}")
+
+
+def _parse_buffer(path: str, budgets: dict, load, spec: LanguageSpec) -> dict:
+    """
+    Shared driver for both backends: `load(path)` returns a context manager yielding the buffer.
+    Over-budget files come back empty with a "skipped" note; truncated files carry a "sampled" note.
+    """
+    result = _empty_result()
+    try:
+        _check_file_size(os.path.getsize(path), budgets)
+        with load(path) as buf:
+            end, sampled = _sample_end(buf, spec.patterns(buf), budgets)
+            _extract(buf, spec, end, result, _file_deadline(budgets))
+    except BudgetExceeded as e:
+        result = _empty_result()
+        result["skipped"] = {"reason": e.reason, "detail": e.detail}
+        return result
+    except OSError as e:
+        print(f"[Parser] Could not read {path}: {e}")
+        result["skipped"] = {"reason": "read_error", "detail": str(e)}
+        return result
+    if sampled:
+        result["sampled"] = {"reason": "max_lines", "detail": sampled}
     return result
 
 
-def parse_python_file(path: str) -> dict:
+@contextlib.contextmanager
+def _load_text(path: str):
+    yield Path(path).read_text(encoding="utf-8", errors="ignore")
+
+
+# Bytes that bytes regexes read differently from decoded text: non-ASCII (str \w and \s are
+# Unicode-aware; a multi-byte character is one character), carriage returns (text mode
+# translates newlines) and the ASCII separators str \s matches
+_TEXT_ONLY_BYTES = re.compile(rb"[\r\x1c-\x1f\x80-\xff]")
+
+
+@contextlib.contextmanager
+def _load_mmap(path: str):
+    """
+    Map the file read-only. A file containing _TEXT_ONLY_BYTES is decoded like _load_text
+    instead, so the backend never changes what is extracted; most source files are plain
+    ASCII and are scanned in place.
+    """
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            yield b""  # mmap cannot map empty files
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if _TEXT_ONLY_BYTES.search(mm) is None:
+                yield mm
+                return
+    with _load_text(path) as text:
+        yield text
+
+
+def parse_python_file_regex(path: str, budgets: Optional[dict] = None) -> dict:
+    """
+    Enhanced regex-based Python parser.
+    Extracts functions, classes, calls, inheritance, and imports.
+
+    Budgets (see DEFAULT_BUDGETS) are enforced: over-budget files come back empty with a
+    "skipped" note, oversized-but-parseable files are truncated with a "sampled" note.
+    """
+    return _parse_buffer(path, resolve_budgets(budgets), _load_text, PYTHON_SPEC)
+
+
+def parse_python_file_mmap(path: str, budgets: Optional[dict] = None) -> dict:
+    """
+    Zero-copy variant of parse_python_file_regex: scans a read-only memory map with bytes
+    regexes instead of decoding the file. Only matched names are decoded; function bodies,
+    line numbers and sampling limits are all offsets into the map. Same output (files the
+    bytes patterns would read differently are decoded, see _load_mmap).
+    """
+    return _parse_buffer(path, resolve_budgets(budgets), _load_mmap, PYTHON_SPEC)
+
+
+# Parser backend used by parse_python_file / parse_source_file: "mmap" (default) or "text"
+PARSER_BACKEND = os.environ.get("CG_PARSER_BACKEND", "mmap")
+
+
+def parse_source_file(path: str, spec: LanguageSpec, budgets: Optional[dict] = None) -> dict:
+    """Parse any file described by a LanguageSpec with the configured backend."""
+    load = _load_text if PARSER_BACKEND == "text" else _load_mmap
+    return _parse_buffer(path, resolve_budgets(budgets), load, spec)
+
+
+def parse_python_file(path: str, budgets: Optional[dict] = None) -> dict:
     """Parse Python file and extract functions/classes."""
-    return parse_python_file_regex(path)
+    return parse_source_file(path, PYTHON_SPEC, budgets)
+
+
+# Parallel analysis: worker processes (CG_PARSE_WORKERS) kick in above PARALLEL_MIN_FILES files
+DEFAULT_WORKERS = int(os.environ.get("CG_PARSE_WORKERS", os.cpu_count() or 1))
+PARALLEL_MIN_FILES = 64
 
 
-def build_ccg_for_files(file_paths: List[str]) -> Optional[dict]:
+def _analyze_chunk(paths: List[str], budgets: dict) -> list:
     """
-    Build a Code Context Graph from Python files.
-    Returns a dictionary with functions, classes, calls, imports, and inheritance data.
+    Worker entry point: analyze a chunk of files with the registered language analyzers.
+    Returns (path, language, parsed, seconds, size) tuples in input order.
     """
-    result = {
-        "functions": [],
-        "classes": [],
-        "calls": [],
-        "imports": [],
-        "inheritance": []
-    }
-    
-    for p in file_paths:
+    from Py import analyzers
+
+    out = []
+    deadline = budgets.get("deadline")
+    for p in paths:
+        language = analyzers.language_for(p)
+        if deadline is not None and time.monotonic() > deadline:
+            note = {"reason": "repo_timeout", "detail": f"repository budget of {budgets['repo_timeout']}s exhausted"}
+            out.append((p, language, {"skipped": note}, 0.0, 0))
+            continue
+        start = time.perf_counter()
         try:
-            parsed = parse_python_file(p)
-            if not parsed:
-                continue
-            
-            # Aggregate all data
-            result["functions"].extend(parsed.get("functions", []))
-            result["classes"].extend(parsed.get("classes", []))
-            result["calls"].extend(parsed.get("calls", []))
-            result["imports"].extend(parsed.get("imports", []))
-            result["inheritance"].extend(parsed.get("inheritance", []))
+            size = os.path.getsize(p)
+            parsed = analyzers.analyze_file(p, budgets)
         except Exception as e:
-            # Silently skip files with parsing errors
-            continue
+            size = 0
+            parsed = {"skipped": {"reason": "error", "detail": str(e)}}
+        note = parsed.get("skipped")
+        if note and note["reason"] == "file_timeout" and deadline is not None and time.monotonic() > deadline:
+            parsed["skipped"] = {"reason": "repo_timeout",
+                                 "detail": f"repository budget of {budgets['repo_timeout']}s exhausted"}
+        seconds = time.perf_counter() - start
+        tracing.add_span("parse_file", seconds, path=p, language=language, bytes=size,
+                         skipped=note["reason"] if note else None)
+        out.append((p, language, parsed, seconds, size))
+    return out
+
+
+def _analyze_chunk_traced(paths: List[str], budgets: dict, handle: Optional[dict]) -> tuple:
+    """Worker entry point while tracing: (results, spans recorded under the caller's span `handle`)."""
+    with tracing.join(handle, "parse_chunk", files=len(paths)) as chunk:
+        out = _analyze_chunk(paths, budgets)
+    return out, chunk.tracer.spans
+
+
+def _map_chunks(pool, chunks: list, budgets: dict) -> Iterator[list]:
+    """pool.map over the chunks; while tracing, workers' spans are adopted into the current trace."""
+    handle = tracing.context()
+    if handle is None:
+        yield from pool.map(_analyze_chunk, chunks, repeat(budgets))
+        return
+    for out, spans in pool.map(_analyze_chunk_traced, chunks, repeat(budgets), repeat(handle)):
+        tracing.adopt(spans)
+        yield out
+
+
+def _run_chunks(chunks: list, budgets: dict, workers: int, executor=None) -> Iterator[list]:
+    """
+    Yield analyzed chunks in order as each one finishes, in a process pool when it pays off (or
+    in `executor` if given). Closing the iterator early cancels the chunks not yet started.
+    """
+    if executor is not None and len(chunks) > 1:
+        yield from _map_chunks(executor, chunks, budgets)
+        return
+    done = 0
+    if workers > 1 and len(chunks) > 1:
+        # Imported here: concurrent.futures.process pulls in multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            pool = ProcessPoolExecutor(max_workers=min(workers, len(chunks)))
+            try:
+                for batch in _map_chunks(pool, chunks, budgets):
+                    yield batch
+                    done += 1
+            finally:
+                # An interrupted build does not wait for chunks nobody will read
+                pool.shutdown(wait=done == len(chunks), cancel_futures=True)
+            return
+        except (OSError, BrokenProcessPool) as e:
+            # Chunks already yielded stay done; the rest are analyzed here
+            print(f"[Parser] Process pool unavailable ({e}); analyzing serially")
+    for chunk in chunks[done:]:
+        yield _analyze_chunk(chunk, budgets)
+
+
+class ParseCache:
+    """
+    Per-file analyzer results kept across builds by long-lived processes (see Py/bridge_server.py).
+    Entries are keyed by path and only reused while the file's (mtime_ns, size) stamp and the
+    parse budgets match; skipped files are never cached. Least recently used entries are evicted
+    beyond `max_entries`. Cached records are shared between builds: treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def stamp(path: str) -> Optional[tuple]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _budget_key(budgets: dict) -> tuple:
+        return tuple(sorted((k, v) for k, v in budgets.items() if k != "deadline"))
+
+    def get(self, path: str, stamp: Optional[tuple], budgets: dict) -> Optional[tuple]:
+        """(language, parsed, size) for an unchanged file, else None."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or stamp is None or entry[0] != (stamp, self._budget_key(budgets)):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, path: str, stamp: Optional[tuple], budgets: dict, language: Optional[str],
+            parsed: dict, size: int) -> None:
+        if stamp is None or parsed.get("skipped"):
+            return
+        with self._lock:
+            self._entries[path] = ((stamp, self._budget_key(budgets)), (language, parsed, size))
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def flush(self) -> None:
+        """Make every put so far durable (a no-op in memory; see checkpoint.CheckpointParseCache)."""
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def build_ccg_for_files(file_paths: List[str], budgets: Optional[dict] = None,
+                        workers: Optional[int] = None, cache: Optional[ParseCache] = None,
+                        executor=None, profiler=None) -> Optional[dict]:
+    """
+    Build a Code Context Graph from source files in any registered language (see Py/analyzers.py).
+    Returns a dictionary with functions, classes, calls, imports, inheritance and globals data,
+    plus a "skipped" report of files that were skipped or sampled because of budgets or errors
+    and "metrics" with per-language throughput.
+
+    Long-lived callers can pass a ParseCache (unchanged files are not re-parsed) and a warm
+    process-pool `executor` that is reused instead of starting a new pool per build. A
+    profiling.Profiler records every file's parse time (and, in its cProfile / sampling modes,
+    profiles the parse loop, which then runs in this process).
+    """
+    budgets = resolve_budgets(budgets)
+    result = _empty_result()
+    result["skipped"] = []
+    languages = {}
+    wall_start = time.perf_counter()
+
+    repo_timeout = budgets.get("repo_timeout")
+    if repo_timeout is not None:
+        budgets["deadline"] = time.monotonic() + repo_timeout
+
+    stamps = {}
+    cached = {}
+    pending = file_paths
+    if cache is not None:
+        for p in file_paths:
+            stamps[p] = cache.stamp(p)
+            hit = cache.get(p, stamps[p], budgets)
+            if hit is not None:
+                cached[p] = hit
+        pending = [p for p in file_paths if p not in cached]
+
+    if workers is None:
+        workers = DEFAULT_WORKERS
+    if len(pending) < PARALLEL_MIN_FILES or (profiler is not None and profiler.in_process):
+        workers = 1
+    chunk_size = max(1, min(64, len(pending) // (workers * 4) or 1))
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    batches = []
+    fresh = {}
+    with tracing.span("parse", files=len(pending), cached=len(cached), workers=workers, chunks=len(chunks)):
+        with profiler.parse() if profiler is not None else contextlib.nullcontext():
+            try:
+                for batch in _run_chunks(chunks, budgets, workers, executor if workers > 1 else None):
+                    if cache is None:
+                        batches.append(batch)
+                        continue
+                    # Cached as each chunk completes, so a build interrupted mid-parse keeps its work
+                    for entry in batch:
+                        fresh[entry[0]] = entry
+                        cache.put(entry[0], stamps.get(entry[0]), budgets, entry[1], entry[2], entry[4])
+            finally:
+                if cache is not None:
+                    cache.flush()
+
+    if cache is not None:
+        # Re-interleave cache hits with freshly parsed files so output order follows file_paths
+        batches = [[fresh[p] if p in fresh else (p, *cached[p][:2], None, cached[p][2])
+                    for p in file_paths]]
+
+    aggregate_start = time.perf_counter()
+    for batch in batches:
+        for p, language, parsed, seconds, size in batch:
+            if profiler is not None:
+                profiler.record_file(p, language, seconds, size, parsed)
+            # Cache hits (seconds None) and files never started before the deadline say nothing
+            # about parser throughput
+            not_started = parsed.get("skipped", {}).get("reason") == "repo_timeout" and not seconds
+            if seconds is not None and not not_started:
+                stats = languages.setdefault(language or "unknown", {"files": 0, "bytes": 0, "seconds": 0.0})
+                stats["files"] += 1
+                stats["bytes"] += size
+                stats["seconds"] += seconds
+
+            if parsed.get("skipped"):
+                result["skipped"].append({"path": p, "action": "skipped", **parsed["skipped"]})
+                continue
+            if parsed.get("sampled"):
+                result["skipped"].append({"path": p, "action": "sampled", **parsed["sampled"]})
+
+            # Aggregate all data, tagging every record with its source file
+            for key in CCG_KEYS:
+                records = parsed.get(key, [])
+                for record in records:
+                    record["file"] = p
+                result[key].extend(records)
+
+    for stats in languages.values():
+        seconds = stats["seconds"] or 1e-9
+        stats["seconds"] = round(stats["seconds"], 4)
+        stats["files_per_s"] = round(stats["files"] / seconds, 1)
+        stats["kib_per_s"] = round(stats["bytes"] / 1024 / seconds, 1)
+    tracing.add_span("aggregate", time.perf_counter() - aggregate_start, files=len(file_paths))
+    result["metrics"] = {
+        "languages": languages,
+        "workers": workers,
+        "cache_hits": len(cached),
+        "wall_seconds": round(time.perf_counter() - wall_start, 4),
+    }
 
-    return result if (result["functions"] or result["classes"]) else None
+    return result if (result["functions"] or result["classes"] or result["skipped"]) else None
 
 
 def ccg_to_mermaid(ccg_dict: Optional[dict], max_nodes: int = 30) -> Optional[str]:
@@ -177,7 +937,9 @@ def ccg_to_mermaid(ccg_dict: Optional[dict], max_nodes: int = 30) -> Optional[st
             child = rel.get("child", "")
             parent = rel.get("parent", "")
             if child and parent:
-                lines.append(f'  {child} -->|extends| {parent}')
+                node = re.sub(r"\W", "_", parent)  # dotted bases (typing.NamedTuple) are not valid ids
+                lines.append(f'  {child} -->|extends| {node}' if node == parent
+                             else f'  {child} -->|extends| {node}["{parent}"]')
 
         # Add some function calls
         calls_by_caller = {}
@@ -191,7 +953,7 @@ def ccg_to_mermaid(ccg_dict: Optional[dict], max_nodes: int = 30) -> Optional[st
 
         # Add top callers
         for caller, callees in list(calls_by_caller.items())[:5]:
-            unique_callees = list(set(callees))[:3]
+            unique_callees = list(dict.fromkeys(callees))[:3]  # first three distinct, in call order
             for callee in unique_callees:
                 lines.append(f'  {caller} -->|calls| {callee}')
 
@@ -0,0 +1,171 @@
+# Py/planner.py - Priority-driven analysis planner
+# Ranks source files by estimated importance so a time/file budget is spent on the files that matter most
+
+import math
+import os
+import re
+import time
+from collections import Counter
+from typing import Optional
+
+from Py.call_resolver import module_name, resolve_relative
+
+# Files that usually hold the program's entry point or public surface
+ENTRY_POINT_NAMES = frozenset([
+    "main.py", "__main__.py", "app.py", "cli.py", "manage.py", "server.py", "wsgi.py", "asgi.py",
+    "main.go", "index.js", "index.ts", "main.js", "main.ts", "app.js", "app.ts", "main.jac",
+])
+# Directories whose files rarely belong in architecture docs
+LOW_PRIORITY_DIRS = frozenset([
+    "test", "tests", "testing", "example", "examples", "docs", "doc", "benchmarks", "bench",
+    "scripts", "vendor", "third_party", "migrations", "fixtures",
+])
+
+WEIGHTS = {
+    "entry_point": 8.0,
+    "package_init": 3.0,
+    "fan_in": 2.0,       # per log2(1 + importers)
+    "size": 0.5,         # per log2(1 + KiB)
+    "readme": 3.0,
+    "low_priority_dir": -6.0,
+    "depth": -0.25,      # per directory level below the root
+}
+
+# Import lines are read from the head of each file only: cheap, and imports live there anyway
+HEAD_BYTES = 8192
+_PY_IMPORT = re.compile(r"^[ \t]*(?:from[ \t]+(\.*[\w.]*)[ \t]+import[ \t]+([^\n]+)|import[ \t]+([^\n]+))", re.M)
+_JS_IMPORT = re.compile(r"""(?:from|require\(|import)\s*['"](\.{1,2}/[^'"\n]+)['"]""")
+_JS_EXTENSIONS = (".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs", ".mts", ".cts")
+
+
+def _read_head(path: str) -> str:
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read(HEAD_BYTES)
+    except OSError:
+        return ""
+
+
+def _python_targets(head: str, module: str, is_package: bool) -> list:
+    """Dotted modules a Python file imports (candidates; unknown ones are ignored by the caller)."""
+    targets = []
+    for match in _PY_IMPORT.finditer(head):
+        if match.group(3):
+            for part in match.group(3).split(","):
+                targets.append(part.split(" as ")[0].strip())
+            continue
+        base = resolve_relative(match.group(1), module, is_package)
+        targets.append(base)
+        # `from pkg import sub` may import a submodule
+        for name in match.group(2).strip("()\\ ").split(","):
+            name = name.split(" as ")[0].strip()
+            if name and name != "*":
+                targets.append(f"{base}.{name}" if base else name)
+    return targets
+
+
+def _js_targets(head: str, path: str) -> list:
+    """Repo paths (without extension) a JS/TS file imports relatively."""
+    base = os.path.dirname(path)
+    return [os.path.normpath(os.path.join(base, spec)) for spec in _JS_IMPORT.findall(head)]
+
+
+def import_fan_in(source_files: list, repo_root: str) -> Counter:
+    """Number of repository files importing each file (from a head-of-file scan)."""
+    by_module = {}
+    by_stem = {}
+    for p in source_files:
+        if p.endswith(".py"):
+            by_module[module_name(p, repo_root)] = p
+        elif p.endswith(_JS_EXTENSIONS):
+            stem = os.path.splitext(p)[0]
+            by_stem[stem] = p
+            if os.path.basename(stem) == "index":
+                by_stem.setdefault(os.path.dirname(stem), p)
+
+    fan_in = Counter()
+    for p in source_files:
+        head = _read_head(p)
+        if p.endswith(".py"):
+            module = module_name(p, repo_root)
+            is_package = os.path.basename(p) == "__init__.py"
+            targets = {by_module.get(t) for t in _python_targets(head, module, is_package)}
+        elif p.endswith(_JS_EXTENSIONS):
+            targets = {by_stem.get(os.path.splitext(t)[0]) or by_stem.get(t) for t in _js_targets(head, p)}
+        else:
+            continue
+        for target in targets:
+            if target and target != p:
+                fan_in[target] += 1
+    return fan_in
+
+
+def _readme_words(readme: Optional[str]) -> set:
+    return set(re.findall(r"[A-Za-z_][\w]*", readme.lower())) if readme else set()
+
+
+def rank_files(source_files: list, repo_root: str, readme: Optional[str] = None) -> list:
+    """
+    Score every file and return [{"path", "score", "reasons"}] from most to least important.
+    Ties keep the input order, so the ranking is stable.
+    """
+    fan_in = import_fan_in(source_files, repo_root)
+    readme_words = _readme_words(readme)
+
+    ranked = []
+    for index, p in enumerate(source_files):
+        rel = os.path.relpath(p, repo_root).replace("\\", "/")
+        parts = rel.split("/")
+        name = parts[-1]
+        stem = os.path.splitext(name)[0]
+        score = 0.0
+        reasons = []
+
+        if name in ENTRY_POINT_NAMES and len(parts) <= 2:  # repo root or top-level package only
+            score += WEIGHTS["entry_point"]
+            reasons.append("entry point")
+        if stem == "__init__" and len(parts) > 1:
+            score += WEIGHTS["package_init"]
+            reasons.append("package __init__")
+        if fan_in[p]:
+            score += WEIGHTS["fan_in"] * math.log2(1 + fan_in[p])
+            reasons.append(f"imported by {fan_in[p]}")
+        try:
+            size = os.path.getsize(p)
+        except OSError:
+            size = 0
+        score += WEIGHTS["size"] * math.log2(1 + size / 1024)
+        mentioned = stem if stem != "__init__" else (parts[-2] if len(parts) > 1 else "")
+        if mentioned and mentioned.lower() in readme_words:
+            score += WEIGHTS["readme"]
+            reasons.append("mentioned in README")
+        if any(part.lower() in LOW_PRIORITY_DIRS for part in parts[:-1]) or stem.startswith("test_"):
+            score += WEIGHTS["low_priority_dir"]
+            reasons.append("tests/examples/docs")
+        score += WEIGHTS["depth"] * (len(parts) - 1)
+
+        ranked.append((-score, index, {"path": p, "score": round(score, 2), "reasons": reasons}))
+
+    ranked.sort(key=lambda item: (item[0], item[1]))
+    return [entry for _, _, entry in ranked]
+
+
+def plan_analysis(source_files: list, repo_root: str, readme: Optional[str] = None,
+                  max_files: Optional[int] = None, seconds: Optional[float] = None) -> dict:
+    """
+    Order files for analysis and apply the file budget. The time budget is not enforced here:
+    the returned "deadline" (monotonic clock, planning time included) is handed to the parser
+    as its repository budget, so files are analyzed in priority order until it runs out.
+
+    Returns {"files", "ranked", "total", "deadline", "planning_seconds"}.
+    """
+    start = time.monotonic()
+    ranked = rank_files(source_files, repo_root, readme)
+    selected = ranked if max_files is None else ranked[:max_files]
+    return {
+        "files": [entry["path"] for entry in selected],
+        "ranked": ranked,
+        "total": len(source_files),
+        "deadline": start + seconds if seconds is not None else None,
+        "planning_seconds": round(time.monotonic() - start, 4),
+    }
@@ -0,0 +1,219 @@
+# Py/preflight.py - Repository size pre-flight estimator
+# Estimates files, bytes and analysis time before the clone, and picks a processing strategy
+
+import os
+import shutil
+import tempfile
+import time
+from typing import Optional
+
+from Py import analyzers, git_exec
+from Py.repo_clone import IGNORE_DIRS
+
+TIMEOUT = float(os.environ.get("CG_PREFLIGHT_TIMEOUT", "60"))
+# Blobs fetched to measure sizes on a remote (source files first); beyond this sizes are extrapolated
+SAMPLE_BLOBS = int(os.environ.get("CG_PREFLIGHT_SAMPLE", "200"))
+# Source files above which one document gets unwieldy and the sharded format is added
+SHARD_FILES = int(os.environ.get("CG_PREFLIGHT_SHARD_FILES", "2000"))
+# Analysis cost model (single core, clone excluded), calibrated on the CodeAnalyzer + DocGenie stages
+SECONDS_PER_FILE = float(os.environ.get("CG_PREFLIGHT_FILE_S", "0.003"))
+BYTES_PER_SECOND = float(os.environ.get("CG_PREFLIGHT_BYTES_PER_S", str(1.5 * 1024 ** 2)))
+
+STRATEGIES = ("full", "sampled", "sharded", "rejected")
+
+
+def _local_path(url: str) -> Optional[str]:
+    """Filesystem path behind a file:// URL or plain directory, else None (remote)."""
+    path = url[len("file://"):] if url.startswith("file://") else url
+    return path if os.path.isdir(path) else None
+
+
+def _ignored(path: str) -> bool:
+    return any(part in IGNORE_DIRS for part in path.split("/")[:-1])
+
+
+def _new_estimate(method: str) -> dict:
+    return {"method": method, "exact": True, "files": 0, "bytes": 0, "source_files": 0, "source_bytes": 0,
+            "python_files": 0, "python_bytes": 0, "languages": {}, "sampled_blobs": 0}
+
+
+def _count(estimate: dict, path: str, size: int) -> None:
+    estimate["files"] += 1
+    estimate["bytes"] += size
+    language = analyzers.language_for(path)
+    if language is None:
+        return
+    estimate["source_files"] += 1
+    estimate["source_bytes"] += size
+    estimate["languages"][language] = estimate["languages"].get(language, 0) + 1
+    if path.endswith(".py"):
+        estimate["python_files"] += 1
+        estimate["python_bytes"] += size
+
+
+def _ls_tree(output: str) -> list:
+    """(mode, type, oid, size or None, path) per entry of `git ls-tree -r -z [-l]`."""
+    entries = []
+    for record in output.split("\0"):
+        if not record:
+            continue
+        meta, path = record.split("\t", 1)
+        fields = meta.split()
+        size = int(fields[3]) if len(fields) > 3 and fields[3] != "-" else None
+        entries.append((fields[0], fields[1], fields[2], size, path))
+    return entries
+
+
+def scan_directory(root: str) -> dict:
+    """Exact counts from directory stats (a local checkout that is not a git repository)."""
+    estimate = _new_estimate("directory-scan")
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in IGNORE_DIRS]
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                size = os.lstat(path).st_size
+            except OSError:
+                continue
+            _count(estimate, os.path.relpath(path, root).replace(os.sep, "/"), size)
+    return estimate
+
+
+def scan_local_repo(root: str, timeout: float = TIMEOUT) -> dict:
+    """Exact counts from `git ls-tree -r -l HEAD` of a local repository: what a clone would check out."""
+    estimate = _new_estimate("ls-tree")
+    output = git_exec.run_git(["ls-tree", "-r", "-l", "-z", "HEAD"], cwd=root, op="preflight", timeout=timeout)
+    for mode, kind, oid, size, path in _ls_tree(output):
+        if kind == "blob" and not _ignored(path):
+            _count(estimate, path, size or 0)
+    return estimate
+
+
+def _size_group(path: str) -> str:
+    return "python" if path.endswith(".py") else "source" if analyzers.language_for(path) else "other"
+
+
+def _sample(blobs: list, limit: int) -> list:
+    """
+    Blobs whose sizes get measured: source files first, then others, each in object-id order
+    (hash order is effectively random, so the sample is unbiased and the same on every run).
+    """
+    oids = {}
+    for oid, path in blobs:
+        oids[oid] = oids.get(oid) or analyzers.language_for(path) is not None
+    source = sorted(oid for oid, is_source in oids.items() if is_source)
+    other = sorted(oid for oid, is_source in oids.items() if not is_source)
+    source_quota = min(len(source), max(limit - min(len(other), limit // 4), 0))
+    return source[:source_quota] + other[:limit - source_quota]
+
+
+def scan_remote(url: str, timeout: float = TIMEOUT, sample: int = SAMPLE_BLOBS) -> dict:
+    """
+    Blobless, tree-only clone (commit and trees of HEAD, no file contents) for the exact file
+    list, plus one fetch of a sample of blobs for sizes. Python, other source and remaining
+    files are extrapolated from their own sampled mean; exact when every blob was sampled.
+    """
+    workdir = tempfile.mkdtemp(prefix="codegen_preflight_")
+    target = os.path.join(workdir, "repo")
+    try:
+        git_exec.run_git(["clone", "--filter=blob:none", "--no-checkout", "--depth", "1", "--single-branch",
+                          "--quiet", url, target], op="preflight", timeout=timeout,
+                         cleanup=lambda: shutil.rmtree(target, ignore_errors=True))
+        entries = _ls_tree(git_exec.run_git(["ls-tree", "-r", "-z", "HEAD"], cwd=target, op="preflight",
+                                            timeout=timeout))
+        blobs = [(oid, path) for mode, kind, oid, size, path in entries if kind == "blob" and not _ignored(path)]
+        oids = _sample(blobs, sample)
+        sizes = {}
+        if oids:
+            # Explicitly wanted objects are sent despite the blob filter; noop negotiation skips the commit walk
+            git_exec.run_git(["-c", "fetch.negotiationAlgorithm=noop", "fetch", "--quiet", "--no-tags",
+                              "--no-write-fetch-head", "--recurse-submodules=no", "--filter=blob:none",
+                              "origin"] + oids, cwd=target, op="preflight", timeout=timeout)
+            output = git_exec.run_git(["cat-file", "--batch-check=%(objectname) %(objectsize)"], cwd=target,
+                                      op="preflight", timeout=timeout, input="\n".join(oids) + "\n")
+            for line in output.splitlines():
+                oid, size = line.split()
+                sizes[oid] = int(size)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    estimate = _new_estimate("blobless-clone")
+    estimate["sampled_blobs"] = len(sizes)
+    measured = {}
+    for oid, path in blobs:
+        if oid in sizes:
+            group = _size_group(path)
+            total, count = measured.get(group, (0, 0))
+            measured[group] = (total + sizes[oid], count + 1)
+    overall = sum(t for t, _ in measured.values()) / max(1, sum(c for _, c in measured.values()))
+    for oid, path in blobs:
+        if oid in sizes:
+            _count(estimate, path, sizes[oid])
+            continue
+        estimate["exact"] = False
+        group = _size_group(path)
+        total, count = measured.get(group, (overall, 1))
+        _count(estimate, path, int(total / count))
+    return estimate
+
+
+def expected_seconds(estimate: dict) -> float:
+    """Single-core analysis + rendering time for the estimated source volume (clone excluded)."""
+    return round(estimate["source_files"] * SECONDS_PER_FILE + estimate["source_bytes"] / BYTES_PER_SECOND, 2)
+
+
+def choose_strategy(estimate: dict, size_budget: Optional[dict] = None,
+                    analysis_budget: Optional[dict] = None) -> tuple:
+    """
+    (strategy, reason, coverage) for an estimate:
+      rejected - over the size budget (nothing is cloned)
+      sampled  - the analysis budget (file count or seconds) cannot cover every source file;
+                 the planner analyzes the most important ones, `coverage` is the expected fraction
+      sharded  - more than SHARD_FILES source files; per-module documents are rendered as well
+      full     - everything is analyzed and documented in one document
+    """
+    size_budget = size_budget or {}
+    max_files, max_bytes = size_budget.get("max_files"), size_budget.get("max_bytes")
+    if max_files is not None and estimate["files"] > max_files:
+        return "rejected", f"Repository has about {estimate['files']} files (budget {max_files})", 0.0
+    if max_bytes is not None and estimate["bytes"] > max_bytes:
+        return "rejected", f"Repository is about {estimate['bytes']} bytes (budget {max_bytes})", 0.0
+
+    analysis_budget = analysis_budget or {}
+    coverage = 1.0
+    if analysis_budget.get("max_files") is not None and estimate["source_files"]:
+        coverage = min(coverage, analysis_budget["max_files"] / estimate["source_files"])
+    if analysis_budget.get("seconds") is not None and estimate["expected_seconds"]:
+        coverage = min(coverage, analysis_budget["seconds"] / estimate["expected_seconds"])
+    if coverage < 1.0:
+        return "sampled", (f"Analysis budget covers about {coverage:.0%} of {estimate['source_files']} source files "
+                           f"(~{estimate['expected_seconds']}s for all)"), round(coverage, 3)
+    if estimate["source_files"] > SHARD_FILES:
+        return "sharded", f"{estimate['source_files']} source files (over {SHARD_FILES}); rendering per-module shards", 1.0
+    return "full", f"{estimate['source_files']} source files, ~{estimate['expected_seconds']}s of analysis", 1.0
+
+
+def estimate(url: str, size_budget: Optional[dict] = None, analysis_budget: Optional[dict] = None,
+             timeout: float = TIMEOUT) -> dict:
+    """
+    Estimate a repository before cloning it: local directories via `git ls-tree` (or directory
+    stats when they are not repositories), remote URLs via a blobless clone. Returns
+    {"url", "method", "exact", "files", "bytes", "source_files", "source_bytes", "python_files",
+    "python_bytes", "languages", "sampled_blobs", "expected_seconds", "strategy", "reason",
+    "coverage", "seconds"}. Raises git_exec.GitError when the repository cannot be read.
+    """
+    start = time.perf_counter()
+    local = _local_path(url)
+    if local is None:
+        result = scan_remote(url, timeout)
+    elif os.path.exists(os.path.join(local, ".git")) or os.path.isfile(os.path.join(local, "HEAD")):
+        try:
+            result = scan_local_repo(local, timeout)
+        except git_exec.GitError:  # e.g. no commits yet
+            result = scan_directory(local)
+    else:
+        result = scan_directory(local)
+    result["expected_seconds"] = expected_seconds(result)
+    result["strategy"], result["reason"], result["coverage"] = choose_strategy(result, size_budget, analysis_budget)
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return {"url": url, **result}
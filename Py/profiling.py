@@ -0,0 +1,200 @@
+# Py/profiling.py - Opt-in profiling of the CodeAnalyzer parse loop
+# Records every parsed file's duration (top-N slowest, errors, skips) and optionally runs cProfile
+# or a stack-sampling profiler around the parse; saved as profile.json next to docs.md
+
+import collections
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+# "files" (per-file durations), "cprofile" or "sample" (plus a profiler); unset = off
+MODE = os.environ.get("CG_PROFILE", "") or None
+MODES = ("files", "cprofile", "sample")
+TOP = int(os.environ.get("CG_PROFILE_TOP", "20"))
+SAMPLE_INTERVAL = float(os.environ.get("CG_PROFILE_INTERVAL", "0.005"))  # seconds between stack samples
+REPORT_FILE = "profile.json"
+PSTATS_FILE = "profile.pstats"   # cProfile: load with pstats / snakeviz
+FOLDED_FILE = "profile.folded"   # sampling: collapsed stacks for flamegraph.pl / speedscope
+
+
+def resolve_mode(profile) -> Optional[str]:
+    """run(profile=...) value -> mode: True means "files", False/None/"" off; ValueError on an unknown mode."""
+    if profile is True:
+        return "files"
+    if not profile:
+        return None
+    if profile not in MODES:
+        raise ValueError(f"Unknown profile mode '{profile}' (available: {', '.join(MODES)})")
+    return profile
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class _Sampler:
+    """Samples one thread's Python stack every `interval` seconds from a background thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="cg-profile-sampler", daemon=True)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class Profiler:
+    """
+    Collects a profile of one build_ccg_for_files call (see parser_ccg). Per-file durations come
+    from the parse results, so they cover worker processes; the cProfile and sampling modes
+    profile this process and therefore make the parse run serially in it.
+    """
+
+    def __init__(self, mode: str = "files", top: int = TOP, interval: float = SAMPLE_INTERVAL):
+        self.mode = resolve_mode(mode)
+        self.top = top
+        self.interval = interval
+        self.files = []  # (seconds, path, language, bytes, skipped reason, detail)
+        self.cached = 0
+        self.parse_seconds = 0.0
+        self._cprofile = None
+        self._sampler = None
+
+    @property
+    def in_process(self) -> bool:
+        return self.mode in ("cprofile", "sample")
+
+    @contextlib.contextmanager
+    def parse(self):
+        """Wraps the parse loop: times it and runs the mode's profiler."""
+        start = time.perf_counter()
+        if self.mode == "cprofile":
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        elif self.mode == "sample":
+            self._sampler = _Sampler(threading.get_ident(), self.interval)
+            self._sampler.start()
+        try:
+            yield self
+        finally:
+            if self._cprofile is not None:
+                self._cprofile.disable()
+            if self._sampler is not None:
+                self._sampler.stop()
+            self.parse_seconds += time.perf_counter() - start
+
+    def record_file(self, path: str, language: Optional[str], seconds: Optional[float], size: int,
+                    parsed: dict) -> None:
+        if seconds is None:
+            self.cached += 1
+            return
+        note = parsed.get("skipped") or parsed.get("sampled") or {}
+        self.files.append((seconds, path, language, size, note.get("reason"), note.get("detail")))
+
+    def _slowest(self) -> list:
+        slowest = []
+        for seconds, path, language, size, reason, detail in sorted(self.files, key=lambda f: -f[0])[:self.top]:
+            entry = {"path": path, "language": language, "bytes": size, "seconds": round(seconds, 4),
+                     "kib_per_s": round(size / 1024 / seconds, 1) if seconds else None}
+            if reason:
+                entry["note"] = reason
+            slowest.append(entry)
+        return slowest
+
+    def _cprofile_top(self) -> list:
+        import pstats
+        stats = pstats.Stats(self._cprofile)
+        rows = sorted(stats.stats.items(), key=lambda item: -item[1][3])[:self.top]  # by cumulative time
+        return [{"function": f"{func} ({os.path.basename(file)}:{line})", "calls": nc,
+                 "tottime": round(tt, 4), "cumtime": round(ct, 4)}
+                for (file, line, func), (cc, nc, tt, ct, callers) in rows]
+
+    def _sample_top(self) -> tuple:
+        """
+        (innermost lines, functions on the stack) by sample count. A sample is taken when the parse
+        thread yields the GIL, so time inside a long regex call lands on the line right after it;
+        the inclusive per-function counts do not depend on that.
+        """
+        leaves = collections.Counter()
+        functions = collections.Counter()
+        for stack, count in self._sampler.stacks.items():
+            frames = stack.split(";")
+            leaves[frames[-1]] += count
+            for function in {frame.rsplit(":", 1)[0] + ")" for frame in frames}:
+                functions[function] += count
+        total = self._sampler.samples or 1
+        return ([{"frame": frame, "samples": count, "share": round(count / total, 3)}
+                 for frame, count in leaves.most_common(self.top)],
+                [{"function": function, "samples": count, "share": round(count / total, 3)}
+                 for function, count in functions.most_common(self.top)])
+
+    def report(self) -> dict:
+        durations = sorted(f[0] for f in self.files)
+        skipped = collections.Counter(f[4] for f in self.files if f[4])
+        report = {
+            "mode": self.mode,
+            "files": len(self.files),
+            "cached": self.cached,
+            "parse_seconds": round(self.parse_seconds, 4),
+            "file_seconds": round(sum(durations), 4),
+            "p50_seconds": round(durations[len(durations) // 2], 4) if durations else 0.0,
+            "p95_seconds": round(durations[int(len(durations) * 0.95)], 4) if durations else 0.0,
+            "slowest": self._slowest(),
+            "notes": dict(sorted(skipped.items())),
+            "errors": [{"path": f[1], "detail": f[5]} for f in self.files if f[4] == "error"],
+        }
+        if self._cprofile is not None:
+            report["cprofile"] = {"top": self._cprofile_top()}
+        if self._sampler is not None:
+            top, inclusive = self._sample_top()
+            report["sampling"] = {"interval": self.interval, "samples": self._sampler.samples,
+                                  "top": top, "inclusive": inclusive}
+        return report
+
+    def save(self, directory: str) -> dict:
+        """
+        Write profile.json (plus profile.pstats / profile.folded) into `directory`; returns a
+        summary for the run result: {"mode", "path", "files", "parse_seconds", "slowest" (top 5),
+        "errors"}.
+        """
+        os.makedirs(directory, exist_ok=True)
+        report = self.report()
+        path = os.path.join(directory, REPORT_FILE)
+        if self._cprofile is not None:
+            report["cprofile"]["path"] = os.path.join(directory, PSTATS_FILE)
+            self._cprofile.dump_stats(report["cprofile"]["path"])
+        if self._sampler is not None:
+            report["sampling"]["path"] = os.path.join(directory, FOLDED_FILE)
+            with open(report["sampling"]["path"], "w", encoding="utf-8") as f:
+                for stack, count in sorted(self._sampler.stacks.items()):
+                    f.write(f"{stack} {count}\n")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        return {"mode": self.mode, "path": path, "files": report["files"], "parse_seconds": report["parse_seconds"],
+                "slowest": [{"path": e["path"], "seconds": e["seconds"]} for e in report["slowest"][:5]],
+                "errors": len(report["errors"])}
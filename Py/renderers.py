@@ -0,0 +1,481 @@
+# Py/renderers.py - DocGenie output formats (markdown, static HTML site, JSON)
+# Templates under Py/templates are compiled once per process and reused for every run;
+# output is deterministic and only files whose content changed are rewritten
+
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, Iterable, Optional
+
+from Py import tracing
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+DEFAULT_FORMATS = ("markdown",)
+
+# Sharded output: one document per module (or per package with CG_SHARD_BY=package)
+SHARD_BY = os.environ.get("CG_SHARD_BY", "module")
+SHARD_DIRNAME = "shards"
+SHARD_MANIFEST = "manifest.json"
+SHARD_MANIFEST_VERSION = 1
+RENDER_WORKERS = int(os.environ.get("CG_RENDER_WORKERS", os.cpu_count() or 1))
+PARALLEL_MIN_SHARDS = 500  # a shard renders in about a millisecond; smaller runs don't amortize a pool
+
+# Content manifest: per-section and per-document hashes of everything rendered for a repository
+CONTENT_MANIFEST = "content.json"
+CONTENT_MANIFEST_VERSION = 1
+
+_env = None
+_env_lock = threading.Lock()
+
+
+def get_environment():
+    """
+    Process-wide Jinja2 environment. auto_reload is off and the cache unbounded, so each
+    template is read and compiled on first use only and shared by every later render.
+    jinja2 is imported here rather than at module load to keep entry-point startup cheap.
+    """
+    global _env
+    if _env is None:
+        with _env_lock:
+            if _env is None:
+                import jinja2
+                _env = jinja2.Environment(
+                    loader=jinja2.FileSystemLoader(TEMPLATE_DIR),
+                    autoescape=jinja2.select_autoescape(["html"]),
+                    trim_blocks=True,
+                    lstrip_blocks=True,
+                    keep_trailing_newline=True,
+                    auto_reload=False,
+                    cache_size=-1,
+                )
+                _env.filters["summary"] = summary
+                _env.filters["brief"] = brief
+    return _env
+
+
+def brief(signature: Optional[str], limit: int = 80) -> str:
+    """Parameter list for overview pages; long ones are elided (module pages show them in full)."""
+    if not signature:
+        return ""
+    return signature if len(signature) <= limit else "(…)"
+
+
+def summary(docstring: Optional[str]) -> str:
+    """First paragraph of a docstring on one line (template filter)."""
+    if not docstring:
+        return ""
+    return " ".join(docstring.strip().split("\n\n", 1)[0].split())
+
+
+def _file_digest(path: str) -> Optional[str]:
+    """sha256 of a file's bytes, or None if it does not exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+class _DocumentWriter:
+    """
+    Text sink for one output document. Writes stream into `<path>.tmp` while being hashed; on a
+    clean exit the file replaces `path` only when its hash differs, so an unchanged document keeps
+    its bytes and mtime and a failed render never leaves a half-written one behind.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.changed = False
+        self._tmp = path + ".tmp"
+        self._hash = hashlib.sha256()
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self._tmp, "wb")
+        return self
+
+    def write(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self._hash.update(data)
+        self._file.write(data)
+
+    def writelines(self, chunks: Iterable[str]) -> None:
+        for chunk in chunks:
+            self.write(chunk)
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._file.close()
+        if exc_type is None and _file_digest(self.path) != self._hash.hexdigest():
+            os.replace(self._tmp, self.path)
+            self.changed = True
+        else:
+            os.remove(self._tmp)
+        return False
+
+
+class _Digest:
+    """Text sink that only hashes (sections are hashed by streaming them, never materialized)."""
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+
+    def write(self, text: str) -> None:
+        self._hash.update(text.encode("utf-8"))
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def _stream_template(name: str, context: dict, path: str) -> str:
+    # generate() yields output chunk by chunk, so large sections never exist as one string
+    template = get_environment().get_template(name)
+    with _DocumentWriter(path) as f:
+        f.writelines(template.generate(**context))
+    return path
+
+
+def _render_api_pages(context: dict, template: str, api_dir: str, extension: str) -> None:
+    """One page per module under api_dir; pages of removed modules are deleted."""
+    api = context.get("api_reference")
+    pages = set()
+    if api:
+        os.makedirs(api_dir, exist_ok=True)
+        for module in api["modules"]():
+            pages.add(module["slug"] + extension)
+            _stream_template(template, {"repo_name": context["repo_name"], "module": module},
+                             os.path.join(api_dir, module["slug"] + extension))
+    if os.path.isdir(api_dir):
+        for name in os.listdir(api_dir):
+            if name not in pages:
+                os.remove(os.path.join(api_dir, name))
+        if not pages:
+            os.rmdir(api_dir)
+
+
+def render_markdown(context: dict, output_dir: str) -> str:
+    """docs.md plus api/<module>.md pages."""
+    _render_api_pages(context, "api_module.md.j2", os.path.join(output_dir, "api"), ".md")
+    return _stream_template("docs.md.j2", context, os.path.join(output_dir, "docs.md"))
+
+
+def render_html(context: dict, output_dir: str) -> str:
+    """Static site: site/index.html, site/api/<module>.html and the stylesheet."""
+    site_dir = os.path.join(output_dir, "site")
+    os.makedirs(site_dir, exist_ok=True)
+    with open(os.path.join(TEMPLATE_DIR, "style.css"), "r", encoding="utf-8") as src, \
+            _DocumentWriter(os.path.join(site_dir, "style.css")) as dst:
+        dst.write(src.read())
+    _render_api_pages(context, "api_module.html.j2", os.path.join(site_dir, "api"), ".html")
+    return _stream_template("docs.html.j2", context, os.path.join(site_dir, "index.html"))
+
+
+def _write_json(value, out) -> None:
+    """json.dump that streams iterators/generators (and section factories) as arrays."""
+    if callable(value):
+        value = value()
+    if isinstance(value, dict):
+        out.write("{")
+        for i, (key, item) in enumerate(value.items()):
+            if i:
+                out.write(",")
+            out.write(json.dumps(str(key)) + ":")
+            _write_json(item, out)
+        out.write("}")
+    elif isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        out.write(json.dumps(value))
+    else:
+        out.write("[")
+        for i, item in enumerate(value):
+            if i:
+                out.write(",")
+            _write_json(item, out)
+        out.write("]")
+
+
+def render_json(context: dict, output_dir: str) -> str:
+    path = os.path.join(output_dir, "docs.json")
+    with _DocumentWriter(path) as f:
+        # Underscore keys are renderer inputs (e.g. the sharded sources), not documentation
+        _write_json({k: v for k, v in context.items() if not k.startswith("_")}, f)
+        f.write("\n")
+    return path
+
+
+# ─── Sharded output ───
+
+def _shard_key(source: dict, shard_by: str) -> str:
+    if shard_by == "package":
+        package = os.path.dirname(source["file"]).replace(os.sep, ".")
+        return package or "(root)"
+    return source["module"]
+
+
+def _shard_slug(key: str) -> str:
+    return "".join(c if c.isalnum() or c in "._-" else "_" for c in key) or "shard"
+
+
+def _template_fingerprint() -> str:
+    """Changes whenever the shard template does, so a template edit re-renders every shard."""
+    with open(os.path.join(TEMPLATE_DIR, "shard.md.j2"), "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def _render_shard_batch(batch: list, shard_dir: str, repo_name: str) -> list:
+    """Worker entry point: render (slug, shard) pairs; the environment is built once per process."""
+    for slug, shard in batch:
+        _stream_template("shard.md.j2", {"repo_name": repo_name, "shard": shard},
+                         os.path.join(shard_dir, slug + ".md"))
+    return [slug for slug, _ in batch]
+
+
+def _render_shards(pending: list, shard_dir: str, repo_name: str, workers: int) -> None:
+    """Render changed shards, in a process pool when there are enough of them."""
+    if workers > 1 and len(pending) >= PARALLEL_MIN_SHARDS:
+        # Imported here: concurrent.futures.process pulls in multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+        from itertools import repeat
+        size = max(1, min(32, len(pending) // (workers * 4) or 1))
+        batches = [pending[i:i + size] for i in range(0, len(pending), size)]
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(batches))) as pool:
+                list(pool.map(_render_shard_batch, batches, repeat(shard_dir), repeat(repo_name)))
+            return
+        except (OSError, BrokenProcessPool) as e:
+            print(f"[DocGenie] Process pool unavailable ({e}); rendering shards serially")
+    _render_shard_batch(pending, shard_dir, repo_name)
+
+
+def render_sharded(context: dict, output_dir: str, shard_by: Optional[str] = None,
+                   workers: Optional[int] = None) -> str:
+    """
+    Complete documentation split into one markdown document per module (or package):
+    shards/<shard>.md, shards/index.md and shards/manifest.json. Nothing is truncated.
+
+    The manifest records a hash of each shard's analysis (and of the template); a shard is only
+    re-rendered when its hash changes or its file is missing, and shards of removed modules are
+    deleted. Returns the index path.
+    """
+    shard_by = shard_by or SHARD_BY
+    shard_dir = os.path.join(output_dir, SHARD_DIRNAME)
+    os.makedirs(shard_dir, exist_ok=True)
+    manifest_path = os.path.join(shard_dir, SHARD_MANIFEST)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+    fingerprint = _template_fingerprint()
+    old_entries = previous.get("shards", {})
+    # Another layout or template invalidates every shard (old files are still cleaned up below)
+    reusable = previous.get("version") == SHARD_MANIFEST_VERSION and previous.get("shard_by") == shard_by \
+        and previous.get("template") == fingerprint
+
+    shards = {}
+    for source in (context.get("_sources") or list)():
+        key = _shard_key(source, shard_by)
+        shards.setdefault(key, {"key": key, "sources": []})["sources"].append(source)
+
+    entries = {}
+    pending = []
+    slugs = set()
+    for key in sorted(shards):
+        shard = shards[key]
+        slug = _shard_slug(key)
+        while slug in slugs:
+            slug += "_"
+        slugs.add(slug)
+        digest = hashlib.sha1(json.dumps(shard, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        sources = shard["sources"]
+        entries[key] = {
+            "path": slug + ".md",
+            "hash": digest,
+            "files": len(sources),
+            "classes": sum(len(s["classes"]) for s in sources),
+            "functions": sum(len(s["functions"]) for s in sources),
+        }
+        old = old_entries.get(key) if reusable else None
+        if not old or old["hash"] != digest or old["path"] != entries[key]["path"] \
+                or not os.path.exists(os.path.join(shard_dir, entries[key]["path"])):
+            pending.append((slug, shard))
+
+    _render_shards(pending, shard_dir, context["repo_name"], RENDER_WORKERS if workers is None else workers)
+
+    current = {entry["path"] for entry in entries.values()}
+    for key, old in old_entries.items():
+        if old["path"] not in current:
+            try:
+                os.remove(os.path.join(shard_dir, old["path"]))
+            except FileNotFoundError:
+                pass
+
+    index_path = _stream_template("shard_index.md.j2", {"repo_name": context["repo_name"], "shard_by": shard_by,
+                                                        "shards": entries}, os.path.join(shard_dir, "index.md"))
+    manifest = {
+        "version": SHARD_MANIFEST_VERSION,
+        "repo": context["repo_name"],
+        "shard_by": shard_by,
+        "template": fingerprint,
+        "rendered": len(pending),
+        "reused": len(entries) - len(pending),
+        "shards": entries,
+    }
+    tmp = manifest_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, manifest_path)
+    return index_path
+
+
+# ─── Diff reports ───
+
+def render_diff(delta: dict, output_dir: str, report_name: str = "architecture_changes.md",
+                delta_name: str = "ccg_delta.json", max_listed: int = 25) -> dict:
+    """
+    Write a CCG delta (Py/ccg_diff.py) as JSON and its "Architecture changes" markdown report
+    (templates/diff.md.j2, at most `max_listed` rows per list). Returns {"markdown", "json"} paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    delta_path = os.path.join(output_dir, delta_name)
+    with tracing.span("render", format="diff"):
+        with _DocumentWriter(delta_path) as f:
+            f.write(json.dumps(delta, indent=1))
+            f.write("\n")
+        report_path = _stream_template("diff.md.j2", {"delta": delta, "max_listed": max_listed},
+                                       os.path.join(output_dir, report_name))
+    return {"markdown": report_path, "json": delta_path}
+
+
+# format ->(renderer(context, output_dir) -> path)
+RENDERERS = {
+    "markdown": render_markdown,
+    "html": render_html,
+    "json": render_json,
+    "sharded": render_sharded,
+}
+# format -> files and directories (relative to output_dir) it produces; others produce just the returned path
+FORMAT_PATHS = {
+    "markdown": ("docs.md", "api"),
+    "html": ("site",),
+    "json": ("docs.json",),
+    "sharded": (SHARD_DIRNAME,),
+}
+
+
+def register_renderer(name: str, render: Callable, paths: Optional[Iterable] = None) -> None:
+    """Add an output format; `paths` lists what it writes under output_dir (default: the returned path)."""
+    RENDERERS[name] = render
+    if paths is not None:
+        FORMAT_PATHS[name] = tuple(paths)
+
+
+# ─── Content hashing ───
+
+def section_hashes(context: dict) -> dict:
+    """
+    sha256 of each documentation section's canonical JSON (docs.json encoding), independent of
+    output format: a section's hash changes exactly when its content does.
+    """
+    hashes = {}
+    for key, value in context.items():
+        if key.startswith("_") or key == "repo_name":
+            continue
+        sink = _Digest()
+        _write_json(value, sink)
+        hashes[key] = sink.hexdigest()
+    return hashes
+
+
+def _combined_hash(hashes: dict) -> str:
+    digest = hashlib.sha256()
+    for key in sorted(hashes):
+        digest.update(f"{key}\0{hashes[key]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _document_hashes(output_dir: str, outputs: dict) -> dict:
+    """{relative path: sha256} of every file the rendered formats produced (cache manifests excluded)."""
+    documents = {}
+    for fmt, path in outputs.items():
+        for rel in FORMAT_PATHS.get(fmt, (os.path.relpath(path, output_dir),)):
+            top = os.path.join(output_dir, rel)
+            if os.path.isfile(top):
+                documents[rel.replace(os.sep, "/")] = _file_digest(top)
+                continue
+            for dirpath, dirnames, filenames in os.walk(top):
+                dirnames.sort()
+                for name in sorted(filenames):
+                    if name.endswith(".tmp") or (name == SHARD_MANIFEST and dirpath == top and fmt == "sharded"):
+                        continue
+                    full = os.path.join(dirpath, name)
+                    documents[os.path.relpath(full, output_dir).replace(os.sep, "/")] = _file_digest(full)
+    return dict(sorted(documents.items()))
+
+
+def validate_formats(formats: Optional[Iterable]) -> tuple:
+    """Normalized tuple of formats (default markdown); ValueError on an unknown one."""
+    formats = tuple(dict.fromkeys(formats or DEFAULT_FORMATS))
+    unknown = [f for f in formats if f not in RENDERERS]
+    if unknown:
+        raise ValueError(f"Unknown output format(s): {', '.join(unknown)} (available: {', '.join(RENDERERS)})")
+    return formats
+
+
+def render(context: dict, output_dir: str, formats: Optional[Iterable] = None,
+           report: Optional[dict] = None) -> dict:
+    """
+    Render `context` in every requested format. Sections that can be large are passed as
+    zero-argument callables returning iterators, so each format streams its own pass over them.
+
+    Output is a pure function of the context: documents whose bytes would not change are not
+    rewritten. content.json records the hash of every section and document and the combined
+    content hash (also shown in the Metadata section). If `report` is given it receives
+    {"content_hash", "sections", "changed", "removed"}, the document paths a publisher has to
+    upload or delete since the previous render. Returns {format: path}.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    sections = section_hashes(context)
+    content_hash = _combined_hash(sections)
+    if isinstance(context.get("metadata"), dict):
+        context = dict(context, metadata=dict(context["metadata"], content_hash=content_hash))
+    outputs = {}
+    for fmt in validate_formats(formats):
+        with tracing.span("render", format=fmt):
+            outputs[fmt] = RENDERERS[fmt](context, output_dir)
+
+    manifest_path = os.path.join(output_dir, CONTENT_MANIFEST)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            previous = json.load(f).get("documents", {})
+    except (OSError, ValueError):
+        previous = {}
+    documents = _document_hashes(output_dir, outputs)
+    # Documents of formats not rendered this time stay on disk, so they stay listed
+    roots = {path.rstrip("/") for path in documents} | {
+        rel for fmt in outputs for rel in FORMAT_PATHS.get(fmt, ())}
+    for rel, digest in previous.items():
+        if not any(rel == root or rel.startswith(root + "/") for root in roots) \
+                and os.path.exists(os.path.join(output_dir, rel)):
+            documents[rel] = digest
+    documents = dict(sorted(documents.items()))
+    manifest = {
+        "version": CONTENT_MANIFEST_VERSION,
+        "repo": context.get("repo_name"),
+        "content_hash": content_hash,
+        "sections": sections,
+        "documents": documents,
+    }
+    with _DocumentWriter(manifest_path) as f:
+        f.write(json.dumps(manifest, indent=1, sort_keys=True) + "\n")
+    if report is not None:
+        report.update({
+            "content_hash": content_hash,
+            "sections": sections,
+            "changed": [rel for rel, digest in documents.items() if previous.get(rel) != digest],
+            "removed": sorted(rel for rel in previous if rel not in documents),
+        })
+    return outputs
@@ -2,29 +2,46 @@
 import os
 import tempfile
 import shutil
-import subprocess
 from pathlib import Path
 import logging
 
+from Py import git_exec, tracing
+
 logging.basicConfig(level=logging.INFO)
 
-def clone_repo(git_url: str, dest_root: str = None) -> dict:
+# Directories generate_file_tree (and so every later stage) never descends into
+IGNORE_DIRS = frozenset([".git", "node_modules", "venv", "__pycache__"])
+
+def repo_name(git_url: str) -> str:
+    """Repository name a URL clones into (and the docs are written under)."""
+    return git_url.rstrip("/").split("/")[-1].replace(".git","")
+
+
+def clone_repo(git_url: str, dest_root: str = None, timeout: float = None, cancel=None) -> dict:
     """
     Clone a public git repo into a temporary directory and return metadata.
+    The clone runs through the shared git pool (Py/git_exec.py): bounded concurrency, `timeout`
+    seconds (default CG_GIT_TIMEOUT), retries on network errors, and killed when `cancel` is set.
+    Raises git_exec.GitError with git's stderr on failure.
     Returns:
       {
         "repo_dir": "/tmp/abc",
         "name": "repo-name",
         "root": "/tmp/abc/repo-name",
+        "url": git_url,
+        "commit": "<sha of the cloned HEAD>",
         "readme": "text..." or None
       }
     """
     if dest_root is None:
         dest_root = tempfile.mkdtemp(prefix="codegen_")
-    repo_name = git_url.rstrip("/").split("/")[-1].replace(".git","")
-    target = os.path.join(dest_root, repo_name)
+    name = repo_name(git_url)
+    target = os.path.join(dest_root, name)
     try:
-        subprocess.check_call(["git", "clone", "--depth", "1", git_url, target])
+        with tracing.span("clone", url=git_url, target=target):
+            git_exec.run_git(["clone", "--depth", "1", "--quiet", git_url, target], op="clone", timeout=timeout,
+                             cancel=cancel, cleanup=lambda: shutil.rmtree(target, ignore_errors=True))
+        commit = git_exec.run_git(["rev-parse", "HEAD"], cwd=target, op="rev-parse", timeout=30).strip()
     except Exception as e:
         shutil.rmtree(dest_root, ignore_errors=True)
         raise
@@ -38,7 +55,52 @@ def clone_repo(git_url: str, dest_root: str = None) -> dict:
                 readme_text = fh.read()
             break
 
-    return {"repo_dir": dest_root, "name": repo_name, "root": target, "readme": readme_text}
+    return {"repo_dir": dest_root, "name": name, "root": target, "url": git_url, "commit": commit,
+            "readme": readme_text}
+
+
+def _resolve_ref(target: str, ref: str) -> str:
+    """Commit sha a branch, tag or commit names (remote branches included); ValueError otherwise."""
+    if not ref or ref.startswith("-"):
+        raise ValueError(f"Invalid ref '{ref}'")
+    for candidate in (ref, f"origin/{ref}"):
+        try:
+            return git_exec.run_git(["rev-parse", "--verify", "--quiet", f"{candidate}^{{commit}}"],
+                                    cwd=target, op="rev-parse", timeout=30).strip()
+        except git_exec.GitError as e:
+            if e.returncode is None:
+                raise
+    raise ValueError(f"Unknown ref '{ref}'")
+
+
+def clone_refs(git_url: str, refs: list, dest_root: str = None, timeout: float = None, cancel=None) -> dict:
+    """
+    Clone a repo with its full history to compare refs (branches, tags or commits). The clone is
+    blobless where the server supports it: file contents are only fetched for what is checked
+    out. The last ref is checked out (detached); `git worktree add` gives the others a directory.
+    Raises git_exec.GitError like clone_repo, ValueError for a ref that names no commit.
+    Returns clone_repo's keys (without "readme"), "commit" being the checked out one, plus
+      "commits": {ref: sha} in the order given
+    """
+    if dest_root is None:
+        dest_root = tempfile.mkdtemp(prefix="codegen_")
+    name = repo_name(git_url)
+    target = os.path.join(dest_root, name)
+    try:
+        with tracing.span("clone", url=git_url, target=target, refs=len(refs)):
+            git_exec.run_git(["clone", "--no-checkout", "--filter=blob:none", "--quiet", git_url, target],
+                             op="clone", timeout=timeout, cancel=cancel,
+                             cleanup=lambda: shutil.rmtree(target, ignore_errors=True))
+        commits = {ref: _resolve_ref(target, ref) for ref in refs}
+        commit = commits[refs[-1]]
+        with tracing.span("checkout", commit=commit):
+            git_exec.run_git(["checkout", "--quiet", "--detach", commit], cwd=target, op="checkout",
+                             timeout=timeout, cancel=cancel)
+    except Exception:
+        shutil.rmtree(dest_root, ignore_errors=True)
+        raise
+    return {"repo_dir": dest_root, "name": name, "root": target, "url": git_url, "commit": commit,
+            "commits": commits}
 
 
 def generate_file_tree(root_path: str, ignore_dirs=None) -> dict:
@@ -46,7 +108,7 @@ def generate_file_tree(root_path: str, ignore_dirs=None) -> dict:
     Return structured dict representing file tree.
     """
     if ignore_dirs is None:
-        ignore_dirs = {".git","node_modules","venv","__pycache__"}
+        ignore_dirs = IGNORE_DIRS
     root = Path(root_path)
     def walk(p):
         items=[]
@@ -58,7 +120,8 @@ def generate_file_tree(root_path: str, ignore_dirs=None) -> dict:
             else:
                 items.append({"type":"file","name":child.name,"path":str(child)})
         return items
-    return {"name": root.name, "path": str(root), "children": walk(root)}
+    with tracing.span("tree_walk", root=str(root)):
+        return {"name": root.name, "path": str(root), "children": walk(root)}
 
 def summarize_readme(repo_path):
     import os
@@ -70,3 +133,27 @@ def summarize_readme(repo_path):
     # crude summary: first few lines
     summary = "\n".join(content.splitlines()[:5])
     return summary
+
+def tree_stats(tree: dict) -> dict:
+    """
+    Count files and bytes in a file tree produced by generate_file_tree.
+    Returns {"files", "bytes", "py_files", "py_bytes"}.
+    """
+    stats = {"files": 0, "bytes": 0, "py_files": 0, "py_bytes": 0}
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        for child in node.get("children", []):
+            if child.get("type") == "dir":
+                stack.append(child)
+                continue
+            try:
+                size = os.path.getsize(child["path"])
+            except OSError:
+                size = 0
+            stats["files"] += 1
+            stats["bytes"] += size
+            if child["name"].endswith(".py"):
+                stats["py_files"] += 1
+                stats["py_bytes"] += size
+    return stats
@@ -0,0 +1,268 @@
+# Py/search_index.py - Persistent full-text + fuzzy symbol search across documented repositories
+# One index segment per repository under <output_root>/.search; re-documenting a repo replaces only its segment
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from Py.ccg_query import paginate, DEFAULT_LIMIT
+
+SEARCH_DIRNAME = ".search"
+SEGMENT_VERSION = 1
+
+# Field weights: a hit on the symbol's own name matters most, README prose least
+FIELD_WEIGHTS = {"name": 3.0, "symbol": 1.5, "path": 1.0, "text": 0.5}
+FUZZY_MIN_SIMILARITY = 0.45  # Dice coefficient over name trigrams
+FUZZY_WEIGHT = 2.0
+MAX_TEXT_CHARS = 300         # snippet stored per document
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens; identifiers are also split on snake_case and camelCase boundaries."""
+    tokens = []
+    for word in _WORD.findall(text):
+        lower = word.lower()
+        tokens.append(lower)
+        parts = _CAMEL.findall(word)
+        if len(parts) > 1:
+            tokens.extend(p.lower() for p in parts)
+    for word in re.findall(r"\w+", text):
+        if "_" in word.strip("_"):
+            tokens.append(word.strip("_").lower())
+    return tokens
+
+
+def trigrams(name: str) -> set:
+    padded = f"  {name.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ─── Documents ───
+
+def build_documents(ccg: Optional[dict], repo_root: str, readme: Optional[str] = None) -> list:
+    """
+    Searchable documents for one repository:
+    [kind, symbol, name, file, line, text] for every function, class, source file and README paragraph.
+    Functions/classes contribute their docstring as text when the analyzer extracted one.
+    """
+    docs = []
+    modules = (ccg or {}).get("modules", {})
+    files = []
+    for kind, key in (("function", "functions"), ("class", "classes")):
+        for record in (ccg or {}).get(key, []):
+            path = record["file"]
+            module = modules.get(path) or os.path.splitext(os.path.basename(path))[0]
+            rel = os.path.relpath(path, repo_root)
+            symbol = f"{module}.{record.get('qualname', record['name'])}"
+            text = (record.get("docstring") or "")[:MAX_TEXT_CHARS]
+            docs.append([kind, symbol, record["name"], rel, record.get("line"), text])
+    if ccg:
+        files = sorted({os.path.relpath(r["file"], repo_root)
+                        for key in ("functions", "classes", "imports") for r in ccg.get(key, [])})
+    for rel in files:
+        docs.append(["file", rel, os.path.basename(rel), rel, 1, ""])
+
+    if readme:
+        line = 1
+        for paragraph in re.split(r"\n\s*\n", readme):
+            text = paragraph.strip()
+            if text:
+                docs.append(["readme", "README", "README", "README.md", line, text[:MAX_TEXT_CHARS]])
+            line += paragraph.count("\n") + 2
+    return docs
+
+
+def _build_postings(docs: list) -> tuple:
+    """Inverted index token -> [[doc_id, weight]] (best field per doc) and name trigram -> [doc_id]."""
+    postings = {}
+    grams = {}
+    for doc_id, (kind, symbol, name, rel, _line, text) in enumerate(docs):
+        weights = {}
+        for field, value in (("name", name), ("symbol", symbol), ("path", rel), ("text", text)):
+            if not value or (field == "symbol" and kind in ("file", "readme")):
+                continue
+            w = FIELD_WEIGHTS[field]
+            for token in tokenize(value):
+                if weights.get(token, 0) < w:
+                    weights[token] = w
+        for token, w in weights.items():
+            postings.setdefault(token, []).append([doc_id, w])
+        if kind != "readme":
+            for gram in trigrams(name):
+                grams.setdefault(gram, []).append(doc_id)
+    return postings, grams
+
+
+class Segment:
+    """Index for one repository; loaded from / saved to <search_dir>/<repo>.json."""
+
+    def __init__(self, repo: str, docs: list, postings: dict, grams: dict, built_at: float):
+        self.repo = repo
+        self.docs = docs
+        self.postings = postings
+        self.grams = grams
+        self.built_at = built_at
+        self._name_grams = {}  # doc_id -> trigram count of its name (fuzzy scoring)
+
+    @classmethod
+    def build(cls, repo: str, docs: list) -> "Segment":
+        postings, grams = _build_postings(docs)
+        return cls(repo, docs, postings, grams, time.time())
+
+    @classmethod
+    def load(cls, path: str) -> "Segment":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != SEGMENT_VERSION:
+            return cls.build(data["repo"], data["docs"])
+        return cls(data["repo"], data["docs"], data["postings"], data["grams"], data["built_at"])
+
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": SEGMENT_VERSION, "repo": self.repo, "built_at": self.built_at,
+                       "docs": self.docs, "postings": self.postings, "grams": self.grams},
+                      f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def score(self, tokens: list, fuzzy_names: list, kinds: Optional[set]) -> Counter:
+        """doc_id -> score for this segment (idf is per segment)."""
+        scores = Counter()
+        n = max(1, len(self.docs))
+        for token in tokens:
+            entries = self.postings.get(token)
+            if not entries:
+                continue
+            idf = 1.0 + math.log(n / len(entries))
+            for doc_id, w in entries:
+                scores[doc_id] += w * idf
+        for name in fuzzy_names:
+            query_grams = trigrams(name)
+            overlap = Counter()
+            for gram in query_grams:
+                for doc_id in self.grams.get(gram, ()):
+                    overlap[doc_id] += 1
+            for doc_id, shared in overlap.items():
+                size = self._name_grams.get(doc_id)
+                if size is None:
+                    size = self._name_grams[doc_id] = len(trigrams(self.docs[doc_id][2]))
+                dice = 2.0 * shared / (len(query_grams) + size)
+                if dice >= FUZZY_MIN_SIMILARITY:
+                    scores[doc_id] += FUZZY_WEIGHT * dice
+        if kinds:
+            for doc_id in [d for d in scores if self.docs[d][0] not in kinds]:
+                del scores[doc_id]
+        return scores
+
+
+class SearchIndex:
+    """
+    All repository segments under one directory. Segments are (re)loaded lazily when their
+    file changes, so an index updated by the pipeline is picked up by a running API server.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._segments = {}  # repo -> (mtime_ns, Segment)
+        self._lock = threading.Lock()
+
+    def _path(self, repo: str) -> str:
+        return os.path.join(self.directory, f"{repo}.json")
+
+    def update(self, repo: str, docs: list) -> Segment:
+        """Replace `repo`'s segment; other repositories' segments are untouched."""
+        os.makedirs(self.directory, exist_ok=True)
+        segment = Segment.build(repo, docs)
+        path = self._path(repo)
+        segment.save(path)
+        with self._lock:
+            self._segments[repo] = (os.stat(path).st_mtime_ns, segment)
+        return segment
+
+    def remove(self, repo: str) -> None:
+        with self._lock:
+            self._segments.pop(repo, None)
+        try:
+            os.remove(self._path(repo))
+        except FileNotFoundError:
+            pass
+
+    def segments(self) -> list:
+        """Current segments, reloading any whose file changed on disk."""
+        try:
+            names = sorted(f[:-5] for f in os.listdir(self.directory) if f.endswith(".json"))
+        except FileNotFoundError:
+            names = []
+        loaded = []
+        with self._lock:
+            for repo in list(self._segments):
+                if repo not in names:
+                    del self._segments[repo]
+            for repo in names:
+                path = self._path(repo)
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                cached = self._segments.get(repo)
+                if cached is None or cached[0] != mtime:
+                    cached = (mtime, Segment.load(path))
+                    self._segments[repo] = cached
+                loaded.append(cached[1])
+        return loaded
+
+    def search(self, query: str, repo: Optional[str] = None, kinds: Optional[set] = None,
+               offset: int = 0, limit: int = DEFAULT_LIMIT, fuzzy: bool = True) -> dict:
+        """
+        Ranked results across repositories: exact token hits (weighted by field and idf) plus,
+        when `fuzzy`, name similarity over trigrams (typos, partial names).
+        Paginated items: {repo, kind, symbol, file, line, score, snippet}.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        fuzzy_names = [w for w in re.findall(r"\w+", query) if len(w) >= 3] if fuzzy else []
+        results = []
+        for segment in self.segments():
+            if repo and segment.repo != repo:
+                continue
+            for doc_id, score in segment.score(tokens, fuzzy_names, kinds).items():
+                results.append((score, segment, doc_id))
+        results.sort(key=lambda r: (-r[0], r[1].repo, r[2]))
+        page = paginate(results, offset, limit)
+        items = []
+        for score, segment, doc_id in page["items"]:
+            kind, symbol, _name, rel, line, text = segment.docs[doc_id]
+            items.append({"repo": segment.repo, "kind": kind, "symbol": symbol, "file": rel,
+                          "line": line, "score": round(score, 3), "snippet": text})
+        page["items"] = items
+        return page
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(output_root: str) -> SearchIndex:
+    """Shared SearchIndex for `<output_root>/.search`."""
+    directory = os.path.join(output_root, SEARCH_DIRNAME)
+    with _indexes_lock:
+        index = _indexes.get(directory)
+        if index is None:
+            index = _indexes[directory] = SearchIndex(directory)
+        return index
+
+
+def index_repo(output_root: str, repo_name: str, ccg: Optional[dict], repo_root: str,
+               readme: Optional[str] = None) -> dict:
+    """Rebuild `repo_name`'s segment from its CCG and README; returns {"documents", "seconds"}."""
+    start = time.perf_counter()
+    docs = build_documents(ccg, repo_root, readme)
+    get_index(output_root).update(repo_name, docs)
+    return {"documents": len(docs), "seconds": round(time.perf_counter() - start, 4)}
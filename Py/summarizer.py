@@ -0,0 +1,358 @@
+# Py/summarizer.py - Summarization stage for READMEs, modules and classes
+# Pluggable backends (deterministic local stub, OpenAI-compatible completion server), batched requests,
+# a concurrency cap and a persistent response cache keyed by content hash
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable, Optional
+
+BACKEND = os.environ.get("CG_SUMMARY_BACKEND", "none")  # none | stub | openai
+BATCH_SIZE = int(os.environ.get("CG_SUMMARY_BATCH", "8"))
+CONCURRENCY = int(os.environ.get("CG_SUMMARY_CONCURRENCY", "4"))
+MAX_TOKENS = int(os.environ.get("CG_SUMMARY_MAX_TOKENS", "120"))
+CACHE_DIRNAME = ".summaries"
+PROMPT_VERSION = 1  # bump when the prompts change so cached responses are not reused
+
+MAX_README_CHARS = 6000
+MAX_MEMBERS = 40  # names listed per module/class prompt
+
+PROMPTS = {
+    "readme": "Summarize what this software project does in two or three sentences.\n\n"
+              "README of {name}:\n{text}\n\nSummary:",
+    "module": "Summarize the purpose of the Python module `{name}` in one sentence.\n\n{text}\n\nSummary:",
+    "class": "Summarize the responsibility of the class `{name}` in one sentence.\n\n{text}\n\nSummary:",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) for backends that report no usage."""
+    return (len(text) + 3) // 4
+
+
+# ─── Backends ───
+# A backend takes a batch of requests {"kind", "name", "text", "facts", "prompt"} and returns one
+# {"text", "prompt_tokens", "completion_tokens"} per request, in order.
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+(?=[A-Z`\"'(\[])")
+
+
+def _first_sentences(text: str, count: int = 1, max_words: int = 60) -> str:
+    sentences = _SENTENCE.split(" ".join(text.split()))
+    words = " ".join(sentences[:count]).split()
+    return " ".join(words[:max_words]) + ("…" if len(words) > max_words else "")
+
+
+def _readme_prose(text: str) -> str:
+    """First prose paragraph of a README (not a heading, badge, HTML, table, list or code block)."""
+    text = re.sub(r"^\s*```.*?^\s*```[^\n]*$", "", text, flags=re.M | re.S)
+    paragraphs = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        prose = [line.strip() for line in paragraph.splitlines()
+                 if line.strip() and not line.strip().startswith(("#", "[!", "![", "<", "|", "---", "==="))]
+        if prose and not prose[0].startswith(("-", "*", ">", "+")):
+            paragraphs.append(" ".join(prose))
+    # Prefer a real sentence over a one-line tagline
+    return next((p for p in paragraphs if len(p) > 40), paragraphs[0] if paragraphs else "")
+
+
+def _count(n: int, noun: str) -> str:
+    return f"{n} {noun}" if n == 1 else f"{n} {noun}es" if noun.endswith("s") else f"{n} {noun}s"
+
+
+def stub_backend(batch: list) -> list:
+    """
+    Deterministic, offline summaries: first prose sentences of a README or docstring, otherwise
+    a sentence built from the item's facts. The same input always yields the same output.
+    CG_SUMMARY_STUB_LATENCY (seconds per batch) simulates a model server for benchmarking.
+    """
+    latency = float(os.environ.get("CG_SUMMARY_STUB_LATENCY", "0"))
+    if latency > 0:
+        time.sleep(latency)
+    results = []
+    for request in batch:
+        facts = request.get("facts") or {}
+        if request["kind"] == "readme":
+            text = _first_sentences(_readme_prose(request["text"]), 2)
+        else:
+            text = _first_sentences(facts["docstring"]) if facts.get("docstring") else ""
+        if not text:
+            members = facts.get("members") or []
+            described = f"`{request['name']}` " + (facts.get("describe") or "has no documented purpose")
+            text = described + (f": {', '.join(members[:5])}" + (", …" if len(members) > 5 else "") if members else "") + "."
+        results.append({"text": text, "prompt_tokens": estimate_tokens(request["prompt"]),
+                        "completion_tokens": estimate_tokens(text)})
+    return results
+
+
+def openai_backend(batch: list) -> list:
+    """
+    OpenAI-compatible /v1/completions server (llama.cpp, vLLM, Ollama, ...): the whole batch
+    goes out as one request with a list of prompts. Configure with CG_SUMMARY_URL,
+    CG_SUMMARY_MODEL and CG_SUMMARY_TIMEOUT.
+    """
+    import urllib.request
+
+    url = os.environ.get("CG_SUMMARY_URL", "http://localhost:8080/v1/completions")
+    body = {"model": os.environ.get("CG_SUMMARY_MODEL", "local"), "prompt": [r["prompt"] for r in batch],
+            "max_tokens": MAX_TOKENS, "temperature": 0}
+    request = urllib.request.Request(url, json.dumps(body).encode("utf-8"), {"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=float(os.environ.get("CG_SUMMARY_TIMEOUT", "120"))) as response:
+        data = json.loads(response.read().decode("utf-8"))
+    choices = sorted(data.get("choices", []), key=lambda c: c.get("index", 0))
+    if len(choices) != len(batch):
+        raise ValueError(f"expected {len(batch)} completions, got {len(choices)}")
+    usage = data.get("usage") or {}
+    prompt_share = usage.get("prompt_tokens", 0) // len(batch)
+    results = []
+    for request, choice in zip(batch, choices):
+        text = " ".join(choice.get("text", "").split())
+        results.append({"text": text, "prompt_tokens": prompt_share or estimate_tokens(request["prompt"]),
+                        "completion_tokens": estimate_tokens(text)})
+    if usage.get("completion_tokens"):
+        results[0]["completion_tokens"] += usage["completion_tokens"] - sum(r["completion_tokens"] for r in results)
+    return results
+
+
+# name -> (backend(batch) -> results, cache id: responses are reused only for the same backend/model)
+BACKENDS = {
+    "stub": (stub_backend, lambda: "stub"),
+    "openai": (openai_backend, lambda: "openai:" + os.environ.get("CG_SUMMARY_MODEL", "local")),
+}
+
+
+def register_backend(name: str, backend: Callable, cache_id: Optional[Callable] = None) -> None:
+    BACKENDS[name] = (backend, cache_id or (lambda: name))
+
+
+# ─── Cache ───
+
+class SummaryCache:
+    """
+    Responses by content hash (prompt version, backend, prompt), one JSON file per backend under
+    <output_root>/.summaries. Loaded on first use; save() writes it back only when it changed.
+    """
+
+    def __init__(self, directory: Optional[str], backend: str):
+        name = re.sub(r"[^\w.-]", "_", backend)
+        self.path = os.path.join(directory, f"{name}.json") if directory else None
+        self._entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (TypeError, OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._load().get(key)
+
+    def put(self, key: str, text: str) -> None:
+        with self._lock:
+            self._load()[key] = text
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty or not self.path:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, separators=(",", ":"), sort_keys=True)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+
+# ─── Summarizer ───
+
+class Summarizer:
+    """
+    Summarizes items {"key", "kind", "name", "text", "facts"}: identical prompts are sent once,
+    cached responses are reused, and the rest go to the backend in batches of `batch_size` with at
+    most `concurrency` batches in flight. A failed batch leaves its items unsummarized.
+    """
+
+    def __init__(self, backend: Optional[str] = None, cache_dir: Optional[str] = None,
+                 batch_size: Optional[int] = None, concurrency: Optional[int] = None):
+        self.backend_name = backend or BACKEND
+        if self.backend_name not in BACKENDS:
+            raise ValueError(f"Unknown summary backend: {self.backend_name} (available: {', '.join(BACKENDS)})")
+        self.backend, cache_id = BACKENDS[self.backend_name]
+        self.cache_id = cache_id()
+        self.cache = SummaryCache(cache_dir, self.cache_id)
+        self.batch_size = max(1, batch_size or BATCH_SIZE)
+        self.concurrency = max(1, concurrency or CONCURRENCY)
+
+    def _key(self, prompt: str) -> str:
+        return hashlib.sha256(f"{PROMPT_VERSION}\0{self.cache_id}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def summarize(self, items: list) -> tuple:
+        """Returns ({item key: summary}, metrics)."""
+        start = time.perf_counter()
+        metrics = {"backend": self.backend_name, "items": len(items), "unique": 0, "cached": 0, "summarized": 0,
+                   "failed": 0, "batches": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        pending = {}  # cache key -> request (identical prompts share one request)
+        keys_for = {}
+        summaries = {}
+        for item in items:
+            prompt = PROMPTS[item["kind"]].format(name=item["name"], text=item["text"])
+            key = self._key(prompt)
+            item_keys = keys_for.setdefault(key, [])
+            item_keys.append(item["key"])
+            if len(item_keys) > 1:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                metrics["cached"] += 1
+                summaries[item["key"]] = cached
+                continue
+            pending[key] = dict(item, prompt=prompt)
+        metrics["unique"] = len(keys_for)
+
+        batches = []
+        requests = list(pending.items())
+        for i in range(0, len(requests), self.batch_size):
+            batches.append(requests[i:i + self.batch_size])
+        latencies = []
+
+        def run(batch):
+            batch_start = time.perf_counter()
+            try:
+                results = self.backend([request for _, request in batch])
+            except Exception as e:
+                print(f"[Summarizer] ⚠ Batch of {len(batch)} failed ({self.backend_name}): {e}")
+                return batch, None, time.perf_counter() - batch_start
+            return batch, results, time.perf_counter() - batch_start
+
+        if len(batches) > 1 and self.concurrency > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as pool:
+                outcomes = list(pool.map(run, batches))
+        else:
+            outcomes = [run(batch) for batch in batches]
+
+        for batch, results, seconds in outcomes:
+            latencies.append(seconds)
+            if results is None:
+                metrics["failed"] += len(batch)
+                continue
+            for (key, request), result in zip(batch, results):
+                if not result["text"]:
+                    metrics["failed"] += 1
+                    continue
+                self.cache.put(key, result["text"])
+                summaries[request["key"]] = result["text"]
+                metrics["summarized"] += 1
+                metrics["prompt_tokens"] += result["prompt_tokens"]
+                metrics["completion_tokens"] += result["completion_tokens"]
+        self.cache.save()
+
+        # Items that shared a prompt get the same summary
+        for key, item_keys in keys_for.items():
+            known = next((summaries[k] for k in item_keys if k in summaries), None)
+            if known is not None:
+                for k in item_keys:
+                    summaries[k] = known
+
+        latencies.sort()
+        metrics["batches"] = len(batches)
+        metrics["latency_s"] = {
+            "total": round(sum(latencies), 4),
+            "mean": round(sum(latencies) / len(latencies), 4) if latencies else 0.0,
+            "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 4) if latencies else 0.0,
+        }
+        metrics["seconds"] = round(time.perf_counter() - start, 4)
+        return summaries, metrics
+
+
+# ─── Repository items ───
+
+def repository_items(repo_name: str, readme: Optional[str], ccg: Optional[dict], repo_root: str) -> list:
+    """
+    What gets summarized: the README, every module and every public class of the CCG. Prompts
+    contain the docstrings and member names only, so unchanged code yields unchanged prompts.
+    """
+    from Py.call_resolver import module_name
+
+    items = []
+    if readme and readme.strip():
+        items.append({"key": "readme", "kind": "readme", "name": repo_name, "text": readme[:MAX_README_CHARS],
+                      "facts": {}})
+    if not ccg:
+        return items
+    known = ccg.get("modules", {})
+    modules = {}
+
+    def module_for(path):
+        entry = modules.get(path)
+        if entry is None:
+            entry = modules[path] = {"module": known.get(path) or module_name(path, repo_root),
+                                     "classes": [], "functions": []}
+        return entry
+
+    for cls in ccg.get("classes", []):
+        qualname = cls.get("qualname", cls["name"])
+        module_for(cls["file"])["classes"].append((qualname, cls))
+    for func in ccg.get("functions", []):
+        qualname = func.get("qualname", func["name"])
+        if "." not in qualname:
+            module_for(func["file"])["functions"].append(func)
+
+    methods = {}
+    for func in ccg.get("functions", []):
+        owner, _, name = func.get("qualname", func["name"]).rpartition(".")
+        if owner:
+            methods.setdefault((func["file"], owner), []).append(name)
+
+    for path in sorted(modules, key=lambda p: modules[p]["module"]):
+        entry = modules[path]
+        module = entry["module"]
+        classes = [q for q, _ in entry["classes"] if "." not in q and not q.startswith("_")]
+        functions = [f["name"] for f in entry["functions"] if not f["name"].startswith("_")]
+        lines = [f"Classes: {', '.join(classes[:MAX_MEMBERS])}" if classes else "",
+                 f"Functions: {', '.join(functions[:MAX_MEMBERS])}" if functions else ""]
+        describe = " and ".join(part for part in (_count(len(classes), "class") if classes else "",
+                                                  _count(len(functions), "function") if functions else "") if part)
+        items.append({"key": f"module:{module}", "kind": "module", "name": module,
+                      "text": "\n".join(line for line in lines if line),
+                      "facts": {"describe": f"defines {describe}" if describe else None,
+                                "members": classes + functions}})
+        for qualname, cls in entry["classes"]:
+            if any(part.startswith("_") for part in qualname.split(".")):
+                continue
+            names = methods.get((path, qualname), [])
+            bases = cls.get("bases") or ([cls["parent"]] if cls.get("parent") else [])
+            lines = [f"Extends: {', '.join(bases)}" if bases else "",
+                     f"Docstring: {cls['docstring']}" if cls.get("docstring") else "",
+                     f"Methods: {', '.join(names[:MAX_MEMBERS])}" if names else ""]
+            items.append({"key": f"class:{module}.{qualname}", "kind": "class", "name": qualname,
+                          "text": "\n".join(line for line in lines if line),
+                          "facts": {"docstring": cls.get("docstring"),
+                                    "describe": ("extends " + ", ".join(f"`{base}`" for base in bases) if bases else "is a class")
+                                    + (f" with {_count(len(names), 'method')}" if names else ""),
+                                    "members": names}})
+    return items
+
+
+def summarize_repository(summarizer: "Summarizer", repo_name: str, readme: Optional[str], ccg: Optional[dict],
+                         repo_root: str) -> tuple:
+    """({"readme": str | None, "modules": {module: str}, "classes": {"module.Class": str}}, metrics)."""
+    summaries, metrics = summarizer.summarize(repository_items(repo_name, readme, ccg, repo_root))
+    result = {"readme": summaries.get("readme"), "modules": {}, "classes": {}}
+    for key, text in summaries.items():
+        kind, _, name = key.partition(":")
+        if kind == "module":
+            result["modules"][name] = text
+        elif kind == "class":
+            result["classes"][name] = text
+    return result, metrics
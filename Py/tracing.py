@@ -0,0 +1,234 @@
+# Py/tracing.py - Span-based tracing of pipeline runs
+# Spans nest through a context variable (threads started with a copied context included); parse
+# workers record their own spans under the caller's and hand them back with their results.
+# Traces export to Chrome trace-event JSON (chrome://tracing, Perfetto) and OTLP/JSON files.
+
+import contextvars
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+ENABLED = os.environ.get("CG_TRACE", "0") not in ("0", "false", "no", "")
+CHROME_FILE = "trace.json"
+OTLP_FILE = "trace.otlp.json"
+SERVICE_NAME = os.environ.get("CG_TRACE_SERVICE", "codebase-genius")
+
+# (Tracer, id of the span new spans are children of) while a trace is being recorded
+_active = contextvars.ContextVar("cg_trace", default=None)
+
+
+class Tracer:
+    """Finished spans of one trace, from any thread or (adopted) worker process."""
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, record: dict) -> None:
+        with self._lock:
+            self.spans.append(record)
+
+
+class Span:
+    """An open span; ends (and is added to its tracer) when the `with` block exits or on end()."""
+
+    __slots__ = ("tracer", "record", "_token")
+
+    def __init__(self, tracer: Tracer, parent_id: Optional[str], name: str, attributes: dict):
+        self.tracer = tracer
+        self.record = {"name": name, "span_id": os.urandom(8).hex(), "parent_id": parent_id,
+                       "start_ns": time.time_ns(), "end_ns": None, "pid": os.getpid(),
+                       "tid": threading.get_native_id(), "attributes": attributes}
+        self._token = None
+
+    def set(self, **attributes) -> None:
+        self.record["attributes"].update(attributes)
+
+    def __enter__(self) -> "Span":
+        self._token = _active.set((self.tracer, self.record["span_id"]))
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.record["error"] = f"{exc_type.__name__}: {exc}"
+        self.end()
+
+    def end(self) -> None:
+        if self.record["end_ns"] is not None:
+            return
+        self.record["end_ns"] = time.time_ns()
+        if self._token is not None:
+            _active.reset(self._token)
+            self._token = None
+        self.tracer.add(self.record)
+
+
+class _NoSpan:
+    """Stand-in when nothing is being traced: costs one context variable lookup."""
+
+    __slots__ = ()
+
+    def set(self, **attributes) -> None:
+        pass
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def active() -> bool:
+    return _active.get() is not None
+
+
+def current() -> Optional[Tracer]:
+    state = _active.get()
+    return state[0] if state else None
+
+
+def span(name: str, **attributes):
+    """`with span("parse", files=n):` - a child of the current span, or a no-op outside a trace."""
+    state = _active.get()
+    if state is None:
+        return _NO_SPAN
+    return Span(state[0], state[1], name, attributes)
+
+
+def add_span(name: str, seconds: float, **attributes) -> None:
+    """Record an interval that has just ended and lasted `seconds` (measured by the caller)."""
+    state = _active.get()
+    if state is None:
+        return
+    end = time.time_ns()
+    state[0].add({"name": name, "span_id": os.urandom(8).hex(), "parent_id": state[1],
+                  "start_ns": end - int(seconds * 1e9), "end_ns": end, "pid": os.getpid(),
+                  "tid": threading.get_native_id(), "attributes": attributes})
+
+
+def start(name: str, tracer: Optional[Tracer] = None, parent_id: Optional[str] = None, **attributes) -> Span:
+    """Root span of a new trace (or of `tracer`'s); use as a context manager."""
+    return Span(tracer or Tracer(), parent_id, name, attributes)
+
+
+class StageSpans:
+    """Sequential spans (pipeline stages): entering a stage ends the previous one."""
+
+    def __init__(self):
+        self._span = None
+
+    def enter(self, name: str, **attributes) -> str:
+        self.close()
+        self._span = span(name, **attributes).__enter__()
+        return name
+
+    def close(self) -> None:
+        if self._span is not None:
+            self._span.end()
+            self._span = None
+
+
+# ─── Worker processes ───
+
+def context() -> Optional[dict]:
+    """Picklable handle on the current span for work submitted to another process."""
+    state = _active.get()
+    return {"trace_id": state[0].trace_id, "parent_id": state[1]} if state else None
+
+
+def join(handle: Optional[dict], name: str, **attributes):
+    """
+    In a worker: a span under `handle` (see context()), recorded into a local tracer whose
+    `spans` the worker returns to the caller for adopt(). A no-op span without a handle.
+    """
+    if handle is None:
+        return _NO_SPAN
+    return Span(Tracer(handle["trace_id"]), handle["parent_id"], name, attributes)
+
+
+def adopt(spans: list) -> None:
+    """Add spans recorded by a worker process to the current trace."""
+    tracer = current()
+    if tracer is not None:
+        with tracer._lock:
+            tracer.spans.extend(spans)
+
+
+# ─── Export ───
+
+def chrome_trace(tracer: Tracer) -> dict:
+    """Chrome trace-event JSON: one complete ("X") event per span, processes and threads named."""
+    spans = sorted(tracer.spans, key=lambda s: s["start_ns"])
+    origin = spans[0]["pid"] if spans else os.getpid()
+    events = []
+    for pid in dict.fromkeys(s["pid"] for s in spans):
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                       "args": {"name": "pipeline" if pid == origin else f"worker {pid}"}})
+    for s in spans:
+        args = dict(s["attributes"], span_id=s["span_id"])
+        if s.get("error"):
+            args["error"] = s["error"]
+        events.append({"name": s["name"], "cat": "pipeline" if s["pid"] == origin else "worker", "ph": "X",
+                       "ts": s["start_ns"] / 1000, "dur": (s["end_ns"] - s["start_ns"]) / 1000,
+                       "pid": s["pid"], "tid": s["tid"], "args": args})
+    return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"trace_id": tracer.trace_id}}
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict) -> list:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def otlp_json(tracer: Tracer, service: str = SERVICE_NAME) -> dict:
+    """OTLP/JSON ExportTraceServiceRequest (what the collector's file exporter writes), one resource per process."""
+    by_pid = {}
+    for s in sorted(tracer.spans, key=lambda s: s["start_ns"]):
+        span_json = {
+            "traceId": tracer.trace_id,
+            "spanId": s["span_id"],
+            "name": s["name"],
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(s["start_ns"]),
+            "endTimeUnixNano": str(s["end_ns"]),
+            "attributes": _otlp_attributes(dict(s["attributes"], **{"thread.id": s["tid"]})),
+            "status": {"code": 2, "message": s["error"]} if s.get("error") else {"code": 1},
+        }
+        if s["parent_id"]:
+            span_json["parentSpanId"] = s["parent_id"]
+        by_pid.setdefault(s["pid"], []).append(span_json)
+    return {"resourceSpans": [{
+        "resource": {"attributes": _otlp_attributes({"service.name": service, "process.pid": pid})},
+        "scopeSpans": [{"scope": {"name": "Py.tracing"}, "spans": spans}],
+    } for pid, spans in by_pid.items()]}
+
+
+def export(tracer: Tracer, directory: str) -> dict:
+    """
+    Write trace.json (Chrome) and trace.otlp.json (OTLP/JSON, one line) into `directory`.
+    Returns {"trace_id", "spans", "chrome", "otlp"}.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {"chrome": os.path.join(directory, CHROME_FILE), "otlp": os.path.join(directory, OTLP_FILE)}
+    with open(paths["chrome"], "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(tracer), f, separators=(",", ":"))
+    with open(paths["otlp"], "w", encoding="utf-8") as f:
+        f.write(json.dumps(otlp_json(tracer), separators=(",", ":")) + "\n")
+    return {"trace_id": tracer.trace_id, "spans": len(tracer.spans), **paths}
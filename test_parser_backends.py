@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Check that the two parser backends (CG_PARSER_BACKEND=text / mmap) extract the same CCG records.
+
+Runs both on a few files written to exercise the differences between bytes and text regexes
+(non-ASCII punctuation next to calls, non-ASCII identifiers, CRLF line endings), on this
+repository's own sources and on any directories given on the command line:
+
+    python test_parser_backends.py [dir ...]
+"""
+
+import os
+import sys
+import tempfile
+
+# Add workspace to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Py import analyzers, parser_ccg
+
+SAMPLES = {
+    "dash.py": "def degree():\n    \"\"\"See pages 3747–3752(1) and f—g(2).\"\"\"\n    return été(1) + x·y(2)\n",
+    "names.py": "class Café(Baseé):\n    def méthode(self):\n        return π(self)\n",
+    "crlf.py": "import os\r\nclass A(B):\r\n    def f(self):\r\n        return g(1)\r\n",
+    "sep.py": "def f():\n    return g\x1c(1)\n",
+    "app.js": "const café = () => résumé(1);\nclass W extends Viéw {\n  m() { return n–o(2); }\n}\n",
+}
+
+
+def _source_files(roots: list) -> list:
+    files = []
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in ("__pycache__", ".git", "node_modules")]
+            files.extend(os.path.join(dirpath, name) for name in sorted(filenames) if analyzers.language_for(name))
+    return files
+
+
+def compare_backends(files: list) -> list:
+    """Paths whose analyzer output differs between the text and mmap backends."""
+    saved = parser_ccg.PARSER_BACKEND
+    differ = []
+    try:
+        for path in files:
+            results = {}
+            for backend in ("text", "mmap"):
+                parser_ccg.PARSER_BACKEND = backend
+                results[backend] = analyzers.analyze_file(path, None)
+            if results["text"] != results["mmap"]:
+                differ.append(path)
+    finally:
+        parser_ccg.PARSER_BACKEND = saved
+    return differ
+
+
+def test_backends_agree(roots: list = ()):
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, text in SAMPLES.items():
+            with open(os.path.join(tmp, name), "w", encoding="utf-8", newline="") as f:
+                f.write(text)
+        files = _source_files([tmp, os.path.join(here, "Py"), os.path.join(here, "tools"), *roots])
+        differ = compare_backends(files)
+        print(f"{len(files)} files, {len(differ)} with different results")
+        for path in differ:
+            print(f"  ✗ {path}")
+        assert not differ
+
+
+if __name__ == "__main__":
+    try:
+        test_backends_agree(sys.argv[1:])
+    except AssertionError:
+        sys.exit(1)
+    print("✓ Both backends agree")
@@ -1,16 +1,20 @@
 # tools/api_server.py - FastAPI HTTP endpoint for Codebase Genius
 # Exposes the orchestrator as a REST API
 
+import contextlib
 import os
 import sys
-from fastapi import FastAPI, HTTPException
+import time
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 
 # Add parent directory to path so we can import Py modules
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from Py.orchestrator import Orchestrator
+from Py.admission import AdmissionController, AdmissionError, RateLimiter, RepoTooLarge
+from Py import renderers, git_exec, tracing, profiling
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -19,8 +23,52 @@ app = FastAPI(
     version="0.1.0",
 )
 
-# Initialize orchestrator
-orchestrator = Orchestrator(output_root="./outputs")
+# Orchestrator is created on first use so /health answers without importing the pipeline
+_orchestrator = None
+
+
+def get_orchestrator():
+    global _orchestrator
+    if _orchestrator is None:
+        from Py.orchestrator import Orchestrator
+        _orchestrator = Orchestrator(output_root="./outputs")
+    return _orchestrator
+
+# Admission control (tunable via environment)
+admission = AdmissionController(
+    max_concurrent=int(os.environ.get("CG_MAX_CONCURRENT", "2")),
+    max_queue=int(os.environ.get("CG_MAX_QUEUE", "8")),
+    queue_timeout=float(os.environ.get("CG_QUEUE_TIMEOUT", "60")),
+)
+rate_limiter = RateLimiter(
+    rate=float(os.environ.get("CG_RATE_PER_SEC", "0.2")),
+    burst=float(os.environ.get("CG_RATE_BURST", "5")),
+)
+size_budget = {
+    "max_files": int(os.environ.get("CG_MAX_FILES", "50000")),
+    "max_bytes": int(os.environ.get("CG_MAX_BYTES", str(2 * 1024 ** 3))),
+}
+# Default analysis time budget (seconds) when a request does not set one; unset = analyze everything
+DEFAULT_ANALYSIS_SECONDS = float(os.environ["CG_ANALYSIS_SECONDS"]) if os.environ.get("CG_ANALYSIS_SECONDS") else None
+# Peer addresses (e.g. a reverse proxy) whose X-Client-Id header names the real caller
+TRUSTED_PROXIES = frozenset(h.strip() for h in os.environ.get("CG_TRUSTED_PROXIES", "").split(",") if h.strip())
+
+
+def _client_id(http_request: Request) -> str:
+    """
+    Identify the caller for rate limiting: the peer address. The X-Client-Id header is only
+    honoured from a peer listed in CG_TRUSTED_PROXIES; anyone else could rotate it at will.
+    """
+    host = http_request.client.host if http_request.client else "unknown"
+    if host in TRUSTED_PROXIES:
+        return http_request.headers.get("x-client-id") or host
+    return host
+
+
+def _admission_error(e: AdmissionError) -> HTTPException:
+    retry_after = e.retry_after_header()
+    headers = {"Retry-After": retry_after} if retry_after else None
+    return HTTPException(status_code=e.status_code, detail=str(e), headers=headers)
 
 
 # Request/Response Models
@@ -28,6 +76,11 @@ class GenerateRequest(BaseModel):
     """Request to generate documentation for a repository"""
     url: str
     verbose: Optional[bool] = True
+    max_files: Optional[int] = None      # analyze at most this many files, most important first
+    time_budget: Optional[float] = None  # seconds for analysis; docs are best-effort within it
+    formats: Optional[List[str]] = None  # "markdown" (default), "html", "json", "sharded"
+    trace: Optional[bool] = None         # export a trace of this request (default CG_TRACE)
+    profile: Optional[str] = None        # profile the parse: "files", "cprofile" or "sample" (default CG_PROFILE)
 
 
 class GenerateResponse(BaseModel):
@@ -35,43 +88,141 @@ class GenerateResponse(BaseModel):
     success: bool
     repo_name: Optional[str] = None
     docs_path: Optional[str] = None
+    outputs: Optional[Dict[str, str]] = None
+    content_hash: Optional[str] = None
+    changed: Optional[List[str]] = None
+    removed: Optional[List[str]] = None
+    preflight: Optional[dict] = None
+    trace: Optional[dict] = None
+    profile: Optional[dict] = None
+    error: Optional[str] = None
+
+
+class DiffRequest(BaseModel):
+    """Request to document the architecture changes between two refs of a repository"""
+    url: str
+    base: str                            # branch, tag or commit the changes are measured from
+    head: Optional[str] = "HEAD"         # default: the default branch
+    verbose: Optional[bool] = True
+    trace: Optional[bool] = None         # export a trace of this request (default CG_TRACE)
+
+
+class DiffResponse(BaseModel):
+    """Response from a diff: CCG delta counts and the paths of the delta and its report"""
+    success: bool
+    repo_name: Optional[str] = None
+    base: Optional[Dict[str, str]] = None
+    head: Optional[Dict[str, str]] = None
+    summary: Optional[Dict[str, int]] = None
+    files: Optional[dict] = None
+    delta_path: Optional[str] = None
+    report_path: Optional[str] = None
+    trace: Optional[dict] = None
     error: Optional[str] = None
 
 
+class PreflightRequest(BaseModel):
+    """Request to estimate a repository without generating documentation"""
+    url: str
+    max_files: Optional[int] = None      # analysis budget the estimate's strategy is planned for
+    time_budget: Optional[float] = None
+
+
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "Codebase Genius API"}
+    return {"status": "healthy", "service": "Codebase Genius API", "admission": admission.stats(),
+            "git": git_exec.get_pool().stats()}
 
 
 @app.post("/generate", response_model=GenerateResponse)
-async def generate_docs(request: GenerateRequest) -> GenerateResponse:
+async def generate_docs(request: GenerateRequest, http_request: Request) -> GenerateResponse:
     """
     Generate documentation for a GitHub repository.
 
     Request Body:
         - url: GitHub repository URL (e.g., "https://github.com/openai/gym")
         - verbose: Enable verbose logging (default: true)
+        - max_files / time_budget: Optional analysis budget; files are ranked by importance and
+          analyzed in that order until the budget runs out
+        - formats: Output formats to render: "markdown" (default), "html" (static site), "json",
+          "sharded" (one complete document per module, see Py/renderers.py)
+        - trace: Record spans of the request (admission wait, clone, tree walk, every parsed file
+          including those in worker processes, rendering) and export them (see Py/tracing.py)
+        - profile: Profile the CodeAnalyzer's parse (see Py/profiling.py); unknown modes fail with 400
 
     Returns:
         - success: Whether generation succeeded
         - repo_name: Name of the repository
-        - docs_path: Path to generated docs.md file
+        - docs_path: Path to generated docs.md file (first rendered format if markdown was not requested)
+        - outputs: Path of every rendered format
+        - content_hash: Hash of the documentation content (unchanged repo -> same hash)
+        - changed / removed: Output files that differ from (or disappeared since) the previous run
+        - preflight: Size estimate and processing strategy chosen before cloning (see /preflight)
+        - trace: Trace id, span count and the paths of outputs/<repo>/trace.json (Chrome
+          trace events: chrome://tracing or ui.perfetto.dev) and trace.otlp.json (OTLP/JSON)
+        - profile: Profile summary (report path, slowest files) when profiling
         - error: Error message (if success=false)
+
+    Admission:
+        - 429 + Retry-After: per-client rate limit exceeded
+        - 503 + Retry-After: concurrency limit reached and queue full (or queue wait timed out)
+        - 413: repository exceeds the file-count / byte-size budget (estimated before cloning)
+        - 400: unknown output format, or the clone failed (git's stderr in the detail)
+        - 504: the clone timed out (CG_GIT_TIMEOUT); 503: no git process slot freed up in time
     """
     try:
-        result = orchestrator.run(request.url, verbose=request.verbose)
+        formats = renderers.validate_formats(request.formats)
+        profiling.resolve_mode(request.profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        rate_limiter.check(_client_id(http_request))
+        seconds = request.time_budget if request.time_budget is not None else DEFAULT_ANALYSIS_SECONDS
+        analysis_budget = None
+        if request.max_files is not None or seconds is not None:
+            analysis_budget = {"max_files": request.max_files, "seconds": seconds}
+        traced = request.trace if request.trace is not None else tracing.ENABLED
+        with tracing.start("POST /generate", url=request.url) if traced else contextlib.nullcontext() as root:
+            queued = time.perf_counter()
+            async with admission.slot():
+                tracing.add_span("admission_wait", time.perf_counter() - queued)
+                # Run the blocking pipeline off the event loop so queued requests and /health stay responsive;
+                # the worker thread runs in a copy of this context, so the pipeline's spans join the request's
+                result = await run_in_threadpool(get_orchestrator().run, request.url, request.verbose,
+                                                 size_budget, analysis_budget, formats, profile=request.profile)
+            if root is not None:
+                root.set(success=result.get("success"), error=result.get("error"))
+        if root is not None:
+            from Py.repo_clone import repo_name
+            result["trace"] = tracing.export(root.tracer, os.path.join(get_orchestrator().output_root,
+                                                                       repo_name(request.url)))
+        if result.get("error_code") == "repo_too_large":
+            raise _admission_error(RepoTooLarge(result.get("error", "Repository too large")))
+        if result.get("error_code") == "git_timeout":
+            raise HTTPException(status_code=504, detail=result.get("error"))
+        if result.get("error_code") == "git_busy":
+            raise HTTPException(status_code=503, detail=result.get("error"), headers={"Retry-After": "30"})
         if result.get("success"):
             return GenerateResponse(
                 success=True,
                 repo_name=result.get("repo_name"),
                 docs_path=result.get("docs_path"),
+                outputs=result.get("outputs"),
+                content_hash=result.get("content_hash"),
+                changed=result.get("changed"),
+                removed=result.get("removed"),
+                preflight=result.get("preflight"),
+                trace=result.get("trace"),
+                profile=result.get("profile"),
             )
         else:
             raise HTTPException(
                 status_code=400,
                 detail=result.get("error", "Unknown error"),
             )
+    except AdmissionError as e:
+        raise _admission_error(e)
     except HTTPException:
         raise
     except Exception as e:
@@ -81,6 +232,160 @@ async def generate_docs(request: GenerateRequest) -> GenerateResponse:
         )
 
 
+@app.post("/diff", response_model=DiffResponse)
+async def diff_refs(request: DiffRequest, http_request: Request) -> DiffResponse:
+    """
+    Architecture changes between two refs of a repository (see Orchestrator.diff): the head is
+    analyzed in full, the base only where files differ (parses are shared by git blob id, also
+    across requests). Writes ccg_delta.json and architecture_changes.md under
+    outputs/<repo>/diffs/<base>..<head>/.
+
+    Returns:
+        - base / head: Each ref and the commit it resolved to
+        - summary: Modules, classes, functions, call edges, import edges and import cycles
+          added / removed (classes and functions also changed)
+        - files: Changed paths by status (added, deleted, modified)
+        - delta_path / report_path: The structured CCG delta and the rendered report
+
+    Admitted and rate limited like /generate (429, 503); 400 for a ref that names no commit or a
+    failed clone; 504 / 503 when git times out or is saturated.
+    """
+    try:
+        rate_limiter.check(_client_id(http_request))
+        traced = request.trace if request.trace is not None else tracing.ENABLED
+        with tracing.start("POST /diff", url=request.url) if traced else contextlib.nullcontext() as root:
+            queued = time.perf_counter()
+            async with admission.slot():
+                tracing.add_span("admission_wait", time.perf_counter() - queued)
+                result = await run_in_threadpool(get_orchestrator().diff, request.url, request.base,
+                                                 request.head or "HEAD", request.verbose)
+            if root is not None:
+                root.set(success=result.get("success"), error=result.get("error"))
+        if root is not None:
+            from Py.repo_clone import repo_name
+            result["trace"] = tracing.export(root.tracer, os.path.join(get_orchestrator().output_root,
+                                                                       repo_name(request.url)))
+        if result.get("error_code") == "git_timeout":
+            raise HTTPException(status_code=504, detail=result.get("error"))
+        if result.get("error_code") == "git_busy":
+            raise HTTPException(status_code=503, detail=result.get("error"), headers={"Retry-After": "30"})
+        if not result.get("success"):
+            raise HTTPException(status_code=400, detail=result.get("error", "Unknown error"))
+        return DiffResponse(
+            success=True,
+            repo_name=result.get("repo_name"),
+            base=result.get("base"),
+            head=result.get("head"),
+            summary=result.get("summary"),
+            files=result.get("files"),
+            delta_path=result.get("delta_path"),
+            report_path=result.get("report_path"),
+            trace=result.get("trace"),
+        )
+    except AdmissionError as e:
+        raise _admission_error(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}",
+        )
+
+
+@app.post("/preflight")
+async def preflight_estimate(request: PreflightRequest, http_request: Request) -> dict:
+    """
+    Estimate a repository before committing to /generate: file count, bytes, source and Python
+    volume, expected analysis seconds and the strategy /generate would take (full, sampled,
+    sharded or rejected) under the server's size budget and the given analysis budget.
+    Remote repositories are read through a blobless clone (trees plus a sample of blobs).
+
+    Rate limited like /generate (429); 504 / 503 / 400 when git times out, is saturated or fails.
+    """
+    from Py import preflight
+    try:
+        rate_limiter.check(_client_id(http_request))
+    except AdmissionError as e:
+        raise _admission_error(e)
+    seconds = request.time_budget if request.time_budget is not None else DEFAULT_ANALYSIS_SECONDS
+    analysis_budget = {"max_files": request.max_files, "seconds": seconds}
+    try:
+        return await run_in_threadpool(preflight.estimate, request.url, size_budget, analysis_budget)
+    except git_exec.GitTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except git_exec.GitBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    except git_exec.GitError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ─── CCG query API (graphs stored by /generate as outputs/<repo>/ccg.json) ───
+
+QUERY_KINDS = {
+    "definition": "definition",
+    "callers": "callers_of",
+    "callees": "callees_of",
+    "subclasses": "subclasses_of",
+    "importers": "importers_of",
+}
+
+
+def _query_index(repo_name: str):
+    # Imported lazily with the rest of the pipeline; indexes are cached per stored graph
+    from Py import ccg_query
+    try:
+        return ccg_query.index_for_repo(get_orchestrator().output_root, repo_name)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"No Code Context Graph stored for '{repo_name}'; run /generate first")
+
+
+@app.get("/query/{repo_name}/neighborhood")
+def query_neighborhood(repo_name: str, symbol: str, k: int = 1, direction: str = "both",
+                       offset: int = 0, limit: int = 50):
+    """
+    Symbols within k call hops of `symbol` (direction: out = callees, in = callers, both).
+    Paginated: {items: [{symbol, distance}], total, offset, limit, next_offset, truncated}.
+    """
+    index = _query_index(repo_name)
+    try:
+        return index.neighborhood(symbol, k, direction, offset, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/query/{repo_name}/{kind}")
+def query_ccg(repo_name: str, kind: str, symbol: str, offset: int = 0, limit: int = 50):
+    """
+    Query the stored Code Context Graph of a generated repository.
+
+    kind: definition | callers | callees | subclasses | importers
+    symbol: qualified name (pkg.mod.Class.method), bare name, or dotted module for importers
+
+    Paginated: {items, total, offset, limit, next_offset}; next_offset is null on the last page.
+    """
+    method = QUERY_KINDS.get(kind)
+    if method is None:
+        raise HTTPException(status_code=404, detail=f"Unknown query '{kind}'; expected one of {sorted(QUERY_KINDS)} or neighborhood")
+    return getattr(_query_index(repo_name), method)(symbol, offset, limit)
+
+
+@app.get("/search")
+def search(q: str, repo: Optional[str] = None, kind: Optional[str] = None, fuzzy: bool = True,
+           offset: int = 0, limit: int = 50):
+    """
+    Search symbols, file paths and README text across every documented repository.
+
+    q: words or identifiers (snake_case / camelCase are split; typos match by trigram similarity)
+    repo: restrict to one repository; kind: comma-separated function,class,file,readme
+
+    Paginated: {items: [{repo, kind, symbol, file, line, score, snippet}], total, offset, limit, next_offset}.
+    """
+    from Py import search_index
+    kinds = {k.strip() for k in kind.split(",") if k.strip()} if kind else None
+    return search_index.get_index(get_orchestrator().output_root).search(q, repo, kinds, offset, limit, fuzzy)
+
+
 @app.get("/docs-openapi")
 async def docs_redirect():
     """Redirect to OpenAPI docs"""
@@ -94,6 +399,9 @@ if __name__ == "__main__":
     print("  📚 OpenAPI Docs: http://localhost:8000/docs")
     print("  📘 ReDoc Docs: http://localhost:8000/redoc")
     print("  ❤️  Health: http://localhost:8000/health")
-    print("  🔧 POST /generate to start documentation generation\n")
+    print("  🔧 POST /generate to start documentation generation")
+    print("  📏 POST /preflight to estimate a repository's size and processing strategy")
+    print("  🔍 GET /search?q=... across all documented repositories")
+    print("  🔎 GET /query/<repo>/{definition,callers,callees,subclasses,importers,neighborhood}?symbol=...\n")
 
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Time the class hierarchy engine (Py/hierarchy.py) on a synthetic CCG.
+
+Usage:
+    python tools/bench_hierarchy.py [--classes N] [--modules N]
+
+Defaults model a very large repository: 50,000 classes in 2,000 modules. Most classes extend
+an earlier class (so trees run deep), one in eight adds a second repository base, and the
+rest extend one of a few external bases. Reports build, report (analyze), and the time to
+query ancestors, descendants and the MRO of every class.
+"""
+
+import os
+import random
+import sys
+import time
+
+proj_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if proj_root not in sys.path:
+    sys.path.insert(0, proj_root)
+from Py import hierarchy
+
+
+def _arg(name: str, default: int) -> int:
+    return int(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+
+def synthetic_ccg(classes: int, modules: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    files = [f"/repo/pkg{m % 50}/mod{m}.py" for m in range(modules)]
+    module_of = {path: f"pkg{m % 50}.mod{m}" for m, path in enumerate(files)}
+    records = []
+    for i in range(classes):
+        path = files[i % modules]
+        if i and rng.random() < 0.8:
+            # Recent classes are extended more often: long chains plus wide trees
+            j = max(0, i - 1 - int(rng.paretovariate(1.1)) % i)
+            bases = [f"C{j}"]
+            targets = [f"{module_of[files[j % modules]]}.C{j}"]
+            if rng.random() < 0.125:
+                k = rng.randrange(i)
+                if k != j:
+                    bases.append(f"C{k}")
+                    targets.append(f"{module_of[files[k % modules]]}.C{k}")
+        else:
+            base = rng.choice(["Exception", "typing.NamedTuple", "enum.Enum", "abc.ABC"])
+            bases, targets = [base], [base]
+        records.append({"name": f"C{i}", "qualname": f"C{i}", "file": path, "line": 1,
+                        "parent": bases[0], "bases": bases, "base_targets": targets})
+    return {"classes": records, "modules": module_of, "root": "/repo"}
+
+
+def main():
+    classes, modules = _arg("--classes", 50_000), _arg("--modules", 2_000)
+    print(f"Building synthetic CCG: {classes} classes in {modules} modules...")
+    ccg = synthetic_ccg(classes, modules)
+
+    start = time.perf_counter()
+    graph = hierarchy.Hierarchy(ccg)
+    build = time.perf_counter() - start
+    report = hierarchy.analyze(ccg)
+
+    start = time.perf_counter()
+    ancestors = sum(len(graph.ancestor_ids(i)) for i in range(classes))
+    closure_up = time.perf_counter() - start
+    start = time.perf_counter()
+    descendants = sum(len(graph.descendant_ids(i)) for i in range(classes))
+    closure_down = time.perf_counter() - start
+    start = time.perf_counter()
+    inconsistent = sum(1 for i in range(classes) if not graph.mro_ids(i)[1])
+    mro = time.perf_counter() - start
+
+    print(f"build        {build:8.3f}s  ({report['edges']} repository bases, {report['multiple_bases']} multiple)")
+    print(f"analyze      {report['seconds']:8.3f}s  ({report['roots']} trees)")
+    print(f"ancestors    {closure_up:8.3f}s  ({ancestors} pairs)")
+    print(f"descendants  {closure_down:8.3f}s  ({descendants} pairs)")
+    print(f"mro          {mro:8.3f}s  ({inconsistent} without a C3 order)")
+
+
+if __name__ == "__main__":
+    main()
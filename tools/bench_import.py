@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Import-time benchmark for entry points, based on `python -X importtime`.
+
+Usage:
+    python tools/bench_import.py [module=budget_ms ...] [--runs N]
+
+Defaults check the Jac bridge, the orchestrator and the API server cold start against
+their budgets. Each module is imported in a fresh interpreter (after one warm-up run so
+bytecode caches exist); the best cumulative time over N runs is compared to the budget.
+Exits 1 if any module is over budget, so it can gate CI.
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+proj_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGETS_MS = {
+    "Py.jac_bridge": 10,
+    "Py.orchestrator": 60,
+    "tools.api_server": 900,
+}
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def import_time_ms(module: str) -> tuple:
+    """Cumulative import time of `module` in a fresh interpreter, plus its 5 heaviest dependencies."""
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=proj_root, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    # -X importtime prints children before their parent, indented two more spaces
+    total = None
+    deps = []
+    pending = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        cumulative_ms, indent, name = int(m.group(2)) / 1000, len(m.group(3)), m.group(4)
+        if indent <= 1:
+            if name == module:
+                total = cumulative_ms
+                deps = [(ms, dep) for ms, dep_indent, dep in pending if dep_indent == 3]
+            pending = []
+        else:
+            pending.append((cumulative_ms, indent, name))
+    deps.sort(reverse=True)
+    return total, deps[:5]
+
+
+def main():
+    args = sys.argv[1:]
+    runs = 5
+    if "--runs" in args:
+        i = args.index("--runs")
+        runs = int(args[i + 1])
+        del args[i:i + 2]
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    if args:
+        budgets = {}
+        for arg in args:
+            module, _, budget = arg.partition("=")
+            budgets[module] = float(budget or DEFAULT_BUDGETS_MS.get(module, 100))
+
+    failed = False
+    for module, budget in budgets.items():
+        import_time_ms(module)  # warm-up: populate __pycache__
+        best, deps = min((import_time_ms(module) for _ in range(runs)), key=lambda r: r[0])
+        status = "OK  " if best <= budget else "OVER"
+        failed |= best > budget
+        print(f"{status} {module:<20} {best:8.1f} ms  (budget {budget:g} ms)")
+        for ms, name in deps:
+            print(f"       {name:<30} {ms:8.1f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Compare parser backends (decoded text vs memory-mapped bytes) on a source tree.
+
+Usage:
+    python tools/bench_parser.py <repo_dir> [--repeat N]
+
+Reports wall time and the traced allocation peak (max and mean per file) for each backend.
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+proj_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if proj_root not in sys.path:
+    sys.path.insert(0, proj_root)
+from Py import parser_ccg
+
+BACKENDS = {
+    "text": parser_ccg.parse_python_file_regex,
+    "mmap": parser_ccg.parse_python_file_mmap,
+}
+
+
+def collect(root: str) -> list:
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in {".git", "node_modules", "venv", "__pycache__"}]
+        paths.extend(os.path.join(dirpath, f) for f in filenames if f.endswith(".py"))
+    return sorted(paths)
+
+
+def bench(parse, paths: list) -> dict:
+    # Wall time is measured untraced; peak allocation per file (what bounds worker memory) traced separately
+    start = time.perf_counter()
+    for p in paths:
+        parse(p)
+    elapsed = time.perf_counter() - start
+
+    peak = 0
+    total_peak = 0
+    for p in paths:
+        tracemalloc.start()
+        parse(p)
+        _, file_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak = max(peak, file_peak)
+        total_peak += file_peak
+    return {"seconds": elapsed, "peak_bytes": peak, "mean_peak_bytes": total_peak / max(1, len(paths))}
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(2)
+    root = sys.argv[1]
+    repeat = int(sys.argv[sys.argv.index("--repeat") + 1]) if "--repeat" in sys.argv else 1
+    paths = collect(root)
+    size = sum(os.path.getsize(p) for p in paths)
+    print(f"{len(paths)} Python files, {size / 1024:.0f} KiB\n")
+    print(f"{'backend':<8} {'seconds':>10} {'max peak KiB':>14} {'mean peak KiB':>14}")
+    for name, parse in BACKENDS.items():
+        runs = [bench(parse, paths) for _ in range(repeat)]
+        best = min(runs, key=lambda r: r["seconds"])
+        print(f"{name:<8} {best['seconds']:>10.3f} {best['peak_bytes'] / 1024:>14.1f} "
+              f"{best['mean_peak_bytes'] / 1024:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()